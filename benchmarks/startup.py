@@ -0,0 +1,78 @@
+"""
+Measures the cost of importing ionyx modules in a fresh interpreter.  Each import is run in a separate
+process several times and the median wall time and peak resident memory are reported, along with whether
+the plotting stack (matplotlib/seaborn) was pulled in.
+
+Usage: python -m benchmarks.startup [--repeat N] [--output results.json] [module ...]
+"""
+import sys
+import json
+import argparse
+import subprocess
+
+DEFAULT_MODULES = ['ionyx', 'ionyx.utils', 'ionyx.experiment', 'ionyx.ensemble', 'ionyx.visualization']
+
+PROBE = """
+import sys, time, resource
+t0 = time.time()
+import {module}
+t1 = time.time()
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+scale = 1 if sys.platform == 'darwin' else 1024
+print('{{0}} {{1}} {{2}}'.format(t1 - t0, rss * scale, int('matplotlib' in sys.modules or 'seaborn' in sys.modules)))
+"""
+
+
+def measure_import(module, repeat=5):
+    """
+    Imports a module in a fresh interpreter several times and returns the median timings.
+
+    Parameters
+    ----------
+    module : string
+        Fully qualified module name.
+
+    repeat : int, optional, default 5
+        Number of fresh interpreters to launch.
+
+    Returns
+    ----------
+    result : dict
+        Median import time in seconds, median peak RSS in bytes and whether plotting libraries were loaded.
+    """
+    times = []
+    rss = []
+    plotting = False
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, '-c', PROBE.format(module=module)])
+        t, r, p = output.decode().split()
+        times.append(float(t))
+        rss.append(int(r))
+        plotting = plotting or bool(int(p))
+
+    times.sort()
+    rss.sort()
+
+    return {'module': module, 'import_time': times[len(times) // 2], 'peak_rss': rss[len(rss) // 2],
+            'loads_plotting': plotting}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark ionyx import time and memory.')
+    parser.add_argument('modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    results = [measure_import(m, args.repeat) for m in args.modules]
+    for r in results:
+        print('{0:<24} {1:8.3f} s {2:8.1f} MB  plotting={3}'
+              .format(r['module'], r['import_time'], r['peak_rss'] / 1e6, r['loads_plotting']))
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,458 @@
+"""
+Runs the core ionyx workloads on the bundled data sets and reports wall time, peak memory and throughput
+for each one.  Data sets can be synthetically scaled up by resampling rows (with a little noise added to
+continuous columns so that the extra rows aren't exact duplicates) to see how the workloads behave on
+larger inputs.  Results are written to JSON and can be compared against a stored baseline, in which case
+any workload that got slower or used more memory than the threshold allows, or that fails but ran in the
+baseline, is flagged as a regression.  The process exits with a non-zero status if there are regressions
+or if any workload fails.
+
+Scale factors default to 1x and 10x; pass --scales 1 10 100 to include 100x, which needs several GB of
+memory for the larger data sets.
+
+Peak memory is the peak of allocations traced by tracemalloc during the workload, which includes numpy
+array buffers but not memory allocated directly by C extensions.
+
+Usage: python -m benchmarks.suite [--datasets NAME ...] [--workloads NAME ...] [--scales 1 10 100]
+                                  [--repeat N] [--output results.json] [--baseline baseline.json]
+                                  [--threshold 0.1]
+"""
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+DATASETS = ['bike_sharing', 'forest_cover', 'otto_group', 'property_inspection']
+
+WORKLOADS = ['load_csv', 'load_cached', 'encoders', 'cross_validate', 'grid_search', 'averaged_ensemble',
+             'stacked_ensemble', 'save_load']
+
+# workloads that read the bundled files and so only run at the original scale
+UNSCALED_WORKLOADS = ['load_csv', 'load_cached']
+
+# columns with at most this many distinct values are treated as categorical by the encoder workload
+MAX_CATEGORIES = 50
+
+
+def _load(name, cache=True, cache_dir=None):
+    from ionyx import datasets
+    results = getattr(datasets, 'load_' + name)(cache=cache, cache_dir=cache_dir)
+    X, y = results[1], results[2]
+    task = 'classification' if name in ('forest_cover', 'otto_group') else 'regression'
+
+    return X, y, task
+
+
+def scale_data(X, y, factor, random_state=1337):
+    """
+    Scales a data set up by appending rows sampled with replacement from the original rows.  Columns with
+    non-integral values get gaussian noise with 1% of the column's standard deviation added to the sampled
+    rows, while integer-valued (e.g. categorical) columns are left unchanged.
+
+    Parameters
+    ----------
+    X : array-like
+        Input samples.
+
+    y : array-like
+        Target values.
+
+    factor : int
+        Number of times larger the scaled data set should be.
+
+    random_state : int, optional, default 1337
+        Seed for the random number generator.
+
+    Returns
+    ----------
+    X_scaled : array-like
+        Scaled input samples.  The first rows are the original input samples.
+
+    y_scaled : array-like
+        Scaled target values.
+    """
+    if factor <= 1:
+        return X, y
+
+    rng = np.random.RandomState(random_state)
+    n_records = X.shape[0]
+    index = np.concatenate([np.arange(n_records), rng.randint(0, n_records, n_records * (factor - 1))])
+    X_scaled = X[index]
+    y_scaled = y[index]
+
+    if X.dtype.kind == 'f':
+        continuous = np.where(np.any(X != np.round(X), axis=0))[0]
+        if len(continuous) > 0:
+            scale = 0.01 * X[:, continuous].std(axis=0)
+            # add noise in blocks so that the noise matrix never approaches the size of the data set
+            for start in range(n_records, X_scaled.shape[0], 100000):
+                end = min(start + 100000, X_scaled.shape[0])
+                X_scaled[start:end, continuous] += rng.normal(0, 1, (end - start, len(continuous))) * scale
+
+    return X_scaled, y_scaled
+
+
+def _models(task):
+    from sklearn.linear_model import Ridge, RidgeClassifier
+    if task == 'classification':
+        return [RidgeClassifier(alpha=1.0), RidgeClassifier(alpha=10.0)]
+    else:
+        return [Ridge(alpha=1.0), Ridge(alpha=10.0)]
+
+
+def _metric(task):
+    return 'accuracy' if task == 'classification' else 'r2'
+
+
+def run_workload(workload, name, X, y, task, work_dir, model=None):
+    """
+    Runs a single workload once.
+
+    Parameters
+    ----------
+    workload : string
+        Name of the workload (see WORKLOADS).
+
+    name : string
+        Name of the data set.
+
+    X : array-like
+        Input samples.
+
+    y : array-like
+        Target values.
+
+    task : {'classification', 'regression'}
+        Type of learning task for the data set.
+
+    work_dir : string
+        Scratch directory for files written by the workload.
+
+    model : object, optional, default None
+        Fitted model for the save_load workload (see prepare_workload).
+
+    Returns
+    ----------
+    n_rows : int
+        Number of rows processed, used to calculate throughput.
+    """
+    # each workload imports only what it uses, so a broken module only fails the workloads that need it
+    from sklearn.preprocessing import StandardScaler
+
+    X_float = X.astype(np.float64)
+    metric = _metric(task)
+
+    if workload == 'load_csv':
+        _load(name, cache=False)
+    elif workload == 'load_cached':
+        _load(name, cache=True, cache_dir=os.path.join(work_dir, 'cache'))
+    elif workload == 'encoders':
+        from ionyx.utils import CategoryEncoder, CategoryToNumeric
+        categorical = [i for i in range(X.shape[1]) if len(np.unique(X[:, i])) <= MAX_CATEGORIES]
+        CategoryEncoder(categorical).fit_transform(X)
+        CategoryToNumeric(categorical).fit_transform(X_float, y.astype(np.float64))
+    elif workload == 'cross_validate':
+        from ionyx.experiment import cross_validate
+        cross_validate(X_float, y, _models(task)[0], metric, [StandardScaler()], 5)
+    elif workload == 'grid_search':
+        from ionyx.experiment import parameter_grid_search
+        parameter_grid_search(X_float, y, _models(task)[0], metric, [[StandardScaler()]],
+                              {'alpha': [0.1, 1.0, 10.0]})
+    elif workload == 'averaged_ensemble':
+        from ionyx.ensemble import train_averaged_ensemble
+        train_averaged_ensemble(X_float, y, X_float[:1000], _models(task), metric, [StandardScaler()], 3)
+    elif workload == 'stacked_ensemble':
+        from ionyx.ensemble import train_stacked_ensemble
+        train_stacked_ensemble(X_float, y, X_float[:1000], _models(task), metric, [StandardScaler()], 3)
+    elif workload == 'save_load':
+        from ionyx.utils import save_model, load_model
+        for out_of_band in (False, True):
+            filename = os.path.join(work_dir, 'model_oob' if out_of_band else 'model.pkl')
+            save_model(model, filename, out_of_band=out_of_band)
+            load_model(filename)
+    else:
+        raise Exception('Workload not recognized.')
+
+    return X.shape[0]
+
+
+def prepare_workload(workload, name, X, y, task, work_dir):
+    """
+    Does any set-up a workload needs that shouldn't be timed: writes the data set cache for load_cached and
+    fits the model that save_load persists.  Returns the fitted model, or None.
+    """
+    if workload == 'load_cached':
+        run_workload(workload, name, X, y, task, work_dir)
+    elif workload == 'save_load':
+        from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+        forest = RandomForestClassifier if task == 'classification' else RandomForestRegressor
+        return forest(n_estimators=10, max_depth=12, random_state=1337).fit(X.astype(np.float64), y)
+
+    return None
+
+
+def measure(workload, name, X, y, task, scale, repeat=3):
+    """
+    Runs a workload several times and returns the median wall time, the median peak memory and the
+    throughput.  Errors are recorded in the result rather than raised, so one failing workload doesn't
+    stop the rest of the suite.
+
+    Parameters
+    ----------
+    workload : string
+        Name of the workload (see WORKLOADS).
+
+    name : string
+        Name of the data set.
+
+    X : array-like
+        Input samples.
+
+    y : array-like
+        Target values.
+
+    task : {'classification', 'regression'}
+        Type of learning task for the data set.
+
+    scale : int
+        Scale factor applied to the data set, recorded with the result.
+
+    repeat : int, optional, default 3
+        Number of times to run the workload.
+
+    Returns
+    ----------
+    result : dict
+        Wall time in seconds, peak memory in bytes and throughput in rows per second.
+    """
+    result = {'dataset': name, 'scale': scale, 'workload': workload, 'rows': int(X.shape[0])}
+    work_dir = tempfile.mkdtemp(prefix='ionyx-bench-')
+    times = []
+    peaks = []
+
+    try:
+        model = prepare_workload(workload, name, X, y, task, work_dir)
+
+        for _ in range(repeat):
+            # garbage left over from the previous repeat would otherwise count towards this one's peak
+            gc.collect()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            n_rows = run_workload(workload, name, X, y, task, work_dir, model)
+            times.append(time.perf_counter() - t0)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    except Exception as e:
+        result['error'] = '{0}: {1}'.format(type(e).__name__, e)
+        return result
+    finally:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    times.sort()
+    peaks.sort()
+    result['wall_time'] = times[len(times) // 2]
+    result['peak_memory'] = peaks[len(peaks) // 2]
+    result['throughput'] = n_rows / result['wall_time'] if result['wall_time'] > 0 else None
+
+    return result
+
+
+def run_suite(datasets=None, workloads=None, scales=(1, 10), repeat=3, verbose=True):
+    """
+    Runs every combination of data set, scale factor and workload.
+
+    Parameters
+    ----------
+    datasets : array-like, optional, default None
+        Names of the data sets to use.  Defaults to all of the bundled data sets.
+
+    workloads : array-like, optional, default None
+        Names of the workloads to run.  Defaults to all workloads.
+
+    scales : array-like, optional, default (1, 10)
+        Scale factors to apply to each data set.
+
+    repeat : int, optional, default 3
+        Number of times to run each workload.
+
+    verbose : boolean, optional, default True
+        Prints each result as it completes.
+
+    Returns
+    ----------
+    results : dict
+        Environment description and the list of results.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    datasets = datasets if datasets is not None else DATASETS
+    workloads = workloads if workloads is not None else WORKLOADS
+    results = []
+
+    for name in datasets:
+        try:
+            X_base, y_base, task = _load(name)
+        except Exception as e:
+            error = '{0}: {1}'.format(type(e).__name__, e)
+            for scale in scales:
+                for workload in workloads:
+                    results.append({'dataset': name, 'scale': scale, 'workload': workload, 'error': error})
+            continue
+
+        for scale in scales:
+            X, y = scale_data(X_base, y_base, scale)
+            for workload in workloads:
+                if workload in UNSCALED_WORKLOADS and scale != 1:
+                    continue
+
+                result = measure(workload, name, X, y, task, scale, repeat)
+                results.append(result)
+                plt.close('all')
+                if verbose:
+                    _print_result(result)
+
+    return {'environment': environment(), 'results': results}
+
+
+def environment():
+    """
+    Describes the interpreter, libraries and machine the suite ran on.
+    """
+    import pandas as pd
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'sklearn': sklearn.__version__,
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.time()
+    }
+
+
+def compare(results, baseline, threshold=0.1):
+    """
+    Compares results against a baseline.  A workload regresses if its wall time or peak memory grew by more
+    than the threshold relative to the baseline, or if it failed with an error but ran in the baseline.
+
+    Parameters
+    ----------
+    results : dict
+        Output of run_suite.
+
+    baseline : dict
+        Output of an earlier run_suite.
+
+    threshold : float, optional, default 0.1
+        Allowed relative increase (0.1 is 10%).
+
+    Returns
+    ----------
+    comparisons : array-like
+        List of dictionaries with the wall time and peak memory ratios (None if the workload failed) for
+        each workload that ran in the baseline and is present in both runs, and whether it regressed.
+    """
+    def key(r):
+        return r['dataset'], r['scale'], r['workload']
+
+    previous = dict((key(r), r) for r in baseline['results'] if 'error' not in r)
+    comparisons = []
+    for r in results['results']:
+        if key(r) not in previous:
+            continue
+        if 'error' in r:
+            comparisons.append({
+                'dataset': r['dataset'],
+                'scale': r['scale'],
+                'workload': r['workload'],
+                'time_ratio': None,
+                'memory_ratio': None,
+                'error': r['error'],
+                'regression': True
+            })
+            continue
+
+        b = previous[key(r)]
+        time_ratio = r['wall_time'] / b['wall_time'] if b['wall_time'] > 0 else 1.
+        memory_ratio = float(r['peak_memory']) / b['peak_memory'] if b['peak_memory'] > 0 else 1.
+        comparisons.append({
+            'dataset': r['dataset'],
+            'scale': r['scale'],
+            'workload': r['workload'],
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regression': time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        })
+
+    return comparisons
+
+
+def _print_result(r):
+    if 'error' in r:
+        print('{0:<20} {1:>4}x {2:<18} ERROR {3}'.format(r['dataset'], r['scale'], r['workload'], r['error']))
+    else:
+        print('{0:<20} {1:>4}x {2:<18} {3:9.3f} s {4:9.1f} MB {5:12.0f} rows/s'
+              .format(r['dataset'], r['scale'], r['workload'], r['wall_time'], r['peak_memory'] / 1e6,
+                      r['throughput'] or 0))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the core ionyx workloads.')
+    parser.add_argument('--datasets', nargs='*', default=DATASETS, choices=DATASETS)
+    parser.add_argument('--workloads', nargs='*', default=WORKLOADS, choices=WORKLOADS)
+    parser.add_argument('--scales', nargs='*', type=int, default=[1, 10])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--baseline', default=None)
+    parser.add_argument('--threshold', type=float, default=0.1)
+    args = parser.parse_args()
+
+    results = run_suite(args.datasets, args.workloads, args.scales, args.repeat)
+    errors = [r for r in results['results'] if 'error' in r]
+    failed = len(errors) > 0
+
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+        comparisons = compare(results, baseline, args.threshold)
+        regressions = [c for c in comparisons if c['regression']]
+        for c in comparisons:
+            if 'error' in c:
+                print('{0:<20} {1:>4}x {2:<18} ERROR {3}  REGRESSION'
+                      .format(c['dataset'], c['scale'], c['workload'], c['error']))
+            else:
+                print('{0:<20} {1:>4}x {2:<18} time x{3:.2f} memory x{4:.2f}{5}'
+                      .format(c['dataset'], c['scale'], c['workload'], c['time_ratio'], c['memory_ratio'],
+                              '  REGRESSION' if c['regression'] else ''))
+
+        if len(regressions) > 0:
+            print('{0} regression(s) beyond {1:.0%}.'.format(len(regressions), args.threshold))
+            failed = True
+
+    if len(errors) > 0:
+        print('{0} workload(s) failed with an error.'.format(len(errors)))
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
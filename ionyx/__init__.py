@@ -0,0 +1,12 @@
+import importlib
+
+__all__ = ['datasets', 'ensemble', 'experiment', 'serving', 'utils', 'visualization']
+
+
+def __getattr__(name):
+    """
+    Imports sub-packages on first access so that "import ionyx" stays cheap.
+    """
+    if name in __all__:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError("module 'ionyx' has no attribute '{0}'".format(name))
@@ -1,16 +1,32 @@
 import os
+import json
+import shutil
+import hashlib
+import tempfile
+import numpy as np
 import pandas as pd
 from zipfile import ZipFile
 from sklearn.preprocessing import LabelEncoder
 
 from ..utils import CategoryEncoder
 
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+CACHE_FORMAT_VERSION = 1
 
-def load_bike_sharing():
+
+def load_bike_sharing(cache=True, cache_dir=None):
     """
     Loads and returns several variables for the data set from Kaggle's Bike Sharing Demand competition.
     Link: https://www.kaggle.com/c/bike-sharing-demand
 
+    Parameters
+    ----------
+    cache : boolean, optional, default True
+        Load from (and on first use, write) the binary cache instead of parsing the zipped csv file.
+
+    cache_dir : string, optional, default None
+        Location of the binary cache.  See load_cached_dataset.
+
     Returns
     ----------
     data : array-like
@@ -25,10 +41,13 @@ def load_bike_sharing():
     y2 : array-like
         Second variable target values.
     """
-    file_location = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bike_sharing.zip')
+    return load_cached_dataset('bike_sharing', _read_bike_sharing, ['X', 'y1', 'y2'], cache, cache_dir)
+
+
+def _read_bike_sharing(file_location):
     z = ZipFile(file_location)
     data = pd.read_csv(z.open('train.csv'))
-    data['datetime'] = data['datetime'].convert_objects(convert_dates='coerce')
+    data['datetime'] = pd.to_datetime(data['datetime'], errors='coerce')
     data = data.set_index('datetime')
 
     # drop the total count label and move the registered/casual counts to the front
@@ -44,11 +63,19 @@ def load_bike_sharing():
     return data, X, y1, y2
 
 
-def load_forest_cover():
+def load_forest_cover(cache=True, cache_dir=None):
     """
     Loads and returns several variables for the data set from Kaggle's Forest Cover Type Prediction competition.
     Link: https://www.kaggle.com/c/forest-cover-type-prediction
 
+    Parameters
+    ----------
+    cache : boolean, optional, default True
+        Load from (and on first use, write) the binary cache instead of parsing the zipped csv file.
+
+    cache_dir : string, optional, default None
+        Location of the binary cache.  See load_cached_dataset.
+
     Returns
     ----------
     data : array-like
@@ -60,7 +87,10 @@ def load_forest_cover():
     y : array-like
         Target values.
     """
-    file_location = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'forest_cover.zip')
+    return load_cached_dataset('forest_cover', _read_forest_cover, ['X', 'y'], cache, cache_dir)
+
+
+def _read_forest_cover(file_location):
     z = ZipFile(file_location)
     data = pd.read_csv(z.open('train.csv'))
     data = data.set_index('Id')
@@ -76,11 +106,19 @@ def load_forest_cover():
     return data, X, y
 
 
-def load_otto_group():
+def load_otto_group(cache=True, cache_dir=None):
     """
     Loads and returns several variables for the data set from Kaggle's Otto Group Product Classification competition.
     Link: https://www.kaggle.com/c/otto-group-product-classification-challenge
 
+    Parameters
+    ----------
+    cache : boolean, optional, default True
+        Load from (and on first use, write) the binary cache instead of parsing the zipped csv file.
+
+    cache_dir : string, optional, default None
+        Location of the binary cache.  See load_cached_dataset.
+
     Returns
     ----------
     data : array-like
@@ -92,7 +130,10 @@ def load_otto_group():
     y : array-like
         Target values.
     """
-    file_location = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'otto_group.zip')
+    return load_cached_dataset('otto_group', _read_otto_group, ['X', 'y'], cache, cache_dir)
+
+
+def _read_otto_group(file_location):
     z = ZipFile(file_location)
     data = pd.read_csv(z.open('train.csv'))
     data = data.set_index('id')
@@ -113,11 +154,19 @@ def load_otto_group():
     return data, X, y
 
 
-def load_property_inspection():
+def load_property_inspection(cache=True, cache_dir=None):
     """
     Loads and returns several variables for the data set from Kaggle's Property Inspection Prediction competition.
     Link: https://www.kaggle.com/c/liberty-mutual-group-property-inspection-prediction
 
+    Parameters
+    ----------
+    cache : boolean, optional, default True
+        Load from (and on first use, write) the binary cache instead of parsing the zipped csv file.
+
+    cache_dir : string, optional, default None
+        Location of the binary cache.  See load_cached_dataset.
+
     Returns
     ----------
     data : array-like
@@ -129,7 +178,10 @@ def load_property_inspection():
     y : array-like
         Target values.
     """
-    file_location = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'property_inspection.zip')
+    return load_cached_dataset('property_inspection', _read_property_inspection, ['X', 'y'], cache, cache_dir)
+
+
+def _read_property_inspection(file_location):
     z = ZipFile(file_location)
     data = pd.read_csv(z.open('train.csv'))
     data = data.set_index('Id')
@@ -142,3 +194,195 @@ def load_property_inspection():
     X = encoder.fit_transform(X)
 
     return data, X, y
+
+
+def load_cached_dataset(name, reader, array_names, cache=True, cache_dir=None):
+    """
+    Loads one of the bundled data sets through a columnar binary cache.  On the first call the zipped csv
+    file is parsed by the reader function and the resulting data frame and arrays are written to the cache
+    as one .npy file per column/array plus a metadata file.  Subsequent calls memory-map the .npy files
+    in copy-on-write mode, so loading is nearly instant and every process on the node shares the same
+    physical pages until it writes to them.  The cache is invalidated when the SHA-256 hash of the zip
+    file changes.
+
+    Arrays (e.g. X and y) are always memory-mapped.  Numeric columns of the data frame are memory-mapped on
+    pandas 2 and later, where a frame built from separate columns with copy=False keeps one block per column;
+    older versions consolidate columns of the same type into a single copied block.  Pandas operations that
+    consolidate the frame later on copy the columns as well.  String columns are stored as integer codes
+    plus a list of categories and decoded on load, and object arrays are pickled, so neither of those is
+    shared.
+
+    Parameters
+    ----------
+    name : string
+        Name of the data set (the zip file name without its extension).
+
+    reader : callable
+        Function that accepts the location of the zip file and returns a data frame followed by the arrays.
+
+    array_names : array-like
+        Names of the arrays returned by the reader, in order.
+
+    cache : boolean, optional, default True
+        If False, the reader is called directly and the cache is neither read nor written.
+
+    cache_dir : string, optional, default None
+        Directory to hold the cache.  Defaults to the IONYX_CACHE_DIR environment variable if set, otherwise
+        a "cache" folder next to the bundled data.
+
+    Returns
+    ----------
+    results : tuple
+        The data frame followed by each of the arrays.
+    """
+    file_location = os.path.join(DATA_DIR, name + '.zip')
+    if not cache:
+        return reader(file_location)
+
+    if cache_dir is None:
+        cache_dir = os.environ.get('IONYX_CACHE_DIR', os.path.join(DATA_DIR, 'cache'))
+    path = os.path.join(cache_dir, name)
+
+    source = _source_signature(file_location)
+    results = _read_cache(path, file_location, source, array_names)
+    if results is None:
+        results = reader(file_location)
+        if source['hash'] is None:
+            source['hash'] = _file_hash(file_location)
+        try:
+            _write_cache(path, source, results[0], dict(zip(array_names, results[1:])))
+        except (IOError, OSError):
+            # a read-only install location just means the data set can't be cached
+            pass
+
+    return results
+
+
+def _file_hash(filename):
+    """
+    Computes the SHA-256 hash of a file without reading it into memory all at once.
+    """
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def _source_signature(filename):
+    """
+    Returns the size and modification time of the source file.  The hash is only computed when these
+    don't match what was recorded in the cache.
+    """
+    stat = os.stat(filename)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': None}
+
+
+def _read_cache(path, file_location, source, array_names):
+    """
+    Loads the cached data frame and arrays, or returns None if the cache is missing or stale.
+    """
+    try:
+        with open(os.path.join(path, 'metadata.json')) as f:
+            metadata = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if metadata.get('version') != CACHE_FORMAT_VERSION or metadata.get('arrays_order') != list(array_names):
+        return None
+
+    cached = metadata['source']
+    if cached['size'] != source['size'] or cached['mtime'] != source['mtime']:
+        if source['hash'] is None:
+            source['hash'] = _file_hash(file_location)
+        if cached['hash'] != source['hash']:
+            return None
+
+    try:
+        columns = [(c['name'], _load_entry(path, c)) for c in metadata['columns']]
+        index = _load_entry(path, metadata['index'])
+        arrays = [_load_entry(path, metadata['arrays'][a]) for a in array_names]
+    except (IOError, OSError, ValueError):
+        return None
+
+    # built with copy=False and no consolidation (pandas >= 2), so each column is backed by its own memory map
+    data = pd.DataFrame(dict(columns), index=pd.Index(index, name=metadata['index']['name']),
+                        columns=[c[0] for c in columns], copy=False)
+
+    return tuple([data] + arrays)
+
+
+def _write_cache(path, source, data, arrays):
+    """
+    Writes the data frame and arrays to a temporary directory and then moves it into place, so concurrent
+    readers never see a partially written cache.
+    """
+    parent = os.path.dirname(path)
+    if not os.path.exists(parent):
+        os.makedirs(parent)
+
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+    try:
+        # mkdtemp creates the directory readable only by its owner, but the cache is meant to be shared
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o777 & ~umask)
+
+        metadata = {
+            'version': CACHE_FORMAT_VERSION,
+            'source': source,
+            'columns': [_save_entry(tmp, 'column_%d' % i, data.iloc[:, i].values, name=str(col))
+                        for i, col in enumerate(data.columns)],
+            'index': _save_entry(tmp, 'index', data.index.values, name=data.index.name),
+            'arrays': dict((a, _save_entry(tmp, 'array_' + a, v)) for a, v in arrays.items()),
+            'arrays_order': list(arrays.keys())
+        }
+        with open(os.path.join(tmp, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+
+        if os.path.exists(path):
+            stale = tempfile.mkdtemp(dir=parent, prefix='.stale-')
+            os.rename(path, os.path.join(stale, 'old'))
+            shutil.rmtree(stale, ignore_errors=True)
+        os.rename(tmp, path)
+    except (IOError, OSError):
+        # another process may have won the race to create the cache
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(path):
+            raise
+
+
+def _save_entry(path, key, values, name=None):
+    """
+    Saves a single column or array and returns the metadata needed to load it again.
+    """
+    entry = {'file': key + '.npy', 'name': name, 'categories': None, 'pickled': False}
+    values = np.asarray(values)
+
+    if values.dtype == object:
+        if all(isinstance(v, str) for v in values):
+            codes, categories = pd.factorize(values)
+            entry['categories'] = list(categories)
+            values = codes.astype(np.int32)
+        else:
+            entry['pickled'] = True
+
+    np.save(os.path.join(path, entry['file']), values, allow_pickle=entry['pickled'])
+
+    return entry
+
+
+def _load_entry(path, entry):
+    """
+    Loads a single column or array saved by _save_entry.
+    """
+    filename = os.path.join(path, entry['file'])
+    if entry['pickled']:
+        return np.load(filename, allow_pickle=True)
+
+    values = np.load(filename, mmap_mode='c')
+    if entry['categories'] is not None:
+        values = np.array(entry['categories'], dtype=object)[values]
+
+    return values
@@ -1,13 +1,15 @@
 import time
 import numpy as np
 import pandas as pd
-from sklearn.cross_validation import KFold
+from sklearn.model_selection import KFold
 
-from ..utils import print_status_message, fit_transforms, apply_transforms, score
-from ..visualization import visualize_correlations
+from ..utils import FoldProvider, print_status_message, fit_transforms, apply_transforms, score, average_scores
+from ..utils import score_training, profile_phase, open_checkpoint
+from ..visualization import visualize_correlations, FigureExporter
 
 
-def train_averaged_ensemble(X, y, X_test, models, metric, transforms, n_folds, verbose=False, logger=None):
+def train_averaged_ensemble(X, y, X_test, models, metric, transforms, n_folds, train_score='full', profiler=None,
+                            figure_dir=None, checkpoint_dir=None, verbose=False, logger=None):
     """
     Creates an averaged ensemble of many models together.  This function performs several steps.  First, it uses the
     model definitions and other parameters provided as input to do K-fold cross-validation on the data set, training
@@ -29,7 +31,7 @@ def train_averaged_ensemble(X, y, X_test, models, metric, transforms, n_folds, v
         Model definitions for each of the models in the ensemble.
 
     metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
-        Scoring metric.
+        Scoring metric, or a list of scoring metrics to calculate in a single pass.
 
     transforms : array-like
         List of transforms to apply to the input samples.
@@ -37,6 +39,24 @@ def train_averaged_ensemble(X, y, X_test, models, metric, transforms, n_folds, v
     n_folds : int
         Number of cross-validation folds to perform.
 
+    train_score : {'full', 'sample:N', 'off'}, optional, default 'full'
+        How to calculate training scores: on every training row, on a fixed random subsample of N rows, or
+        not at all.  Skipping or sampling avoids predicting on the entire training set for models where
+        prediction is expensive.
+
+    profiler : object, optional, default None
+        Instance of Profiler that records the time spent in each phase of each fold, per model.
+
+    figure_dir : string, optional, default None
+        If provided, the plot of correlations between the models' out-of-sample predictions is rendered in a
+        background process and written to this directory (see FigureExporter) instead of being drawn inline,
+        so that fitting on the full data set doesn't wait on it.
+
+    checkpoint_dir : string, optional, default None
+        If provided, the predictions, training score and fitted model of each model in each fold, and each
+        model's test predictions, are checkpointed to this directory.  A repeated call with the same inputs
+        skips the units that were already completed (see Checkpoint).
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -61,63 +81,116 @@ def train_averaged_ensemble(X, y, X_test, models, metric, transforms, n_folds, v
     n_models = len(models)
     n_records = y.shape[0]
 
-    model_train_scores = np.zeros((n_folds, n_models))
+    model_train_scores = [[] for _ in range(n_models)]
     y_models = np.zeros((n_records, n_models))
     y_pred = np.zeros(n_records)
     y_true = np.zeros(n_records)
 
-    folds = list(KFold(n_records, n_folds=n_folds, shuffle=True, random_state=1337))
-    for i, (train_index, eval_index) in enumerate(folds):
-        print_status_message('Starting fold {0}...'.format(str(i + 1)), verbose, logger)
-        X_train = X[train_index]
-        y_train = y[train_index]
-        X_eval = X[eval_index]
-        y_eval = y[eval_index]
-
-        transforms = fit_transforms(X_train, y_train, transforms)
-        X_train = apply_transforms(X_train, transforms)
-        X_eval = apply_transforms(X_eval, transforms)
-
-        print_status_message('Fitting individual models...', verbose, logger)
-        for k, model in enumerate(models):
-            model.fit(X_train, y_train)
-
-        print_status_message('Generating predictions and scoring...', verbose, logger)
-        for k, model in enumerate(models):
-            model_train_scores[i, k] = score(y_train, model.predict(X_train), metric)
-            y_models[eval_index, k] = model.predict(X_eval)
+    checkpoint = open_checkpoint(checkpoint_dir, 'averaged_ensemble', [X, y, X_test], models, transforms, verbose,
+                                 logger, metric=metric, n_folds=n_folds, train_score=train_score)
+    folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=1337).split(np.zeros(n_records)))
+    with profile_phase(profiler, 'fold_provider'):
+        provider = FoldProvider(X, y, folds)
+
+    for i in range(n_folds):
+        eval_index = provider.eval_index(i)
+        remaining = []
+        for k in range(n_models):
+            unit = 'fold-{0}-{1}'.format(i, k)
+            if checkpoint.exists(unit):
+                train_fold_score, y_models[eval_index, k] = checkpoint.load(unit, k)
+                if train_fold_score is not None:
+                    model_train_scores[k].append(train_fold_score)
+            else:
+                remaining.append(k)
+
+        # the fold's samples are only gathered if some of its models still have to be fitted
+        if len(remaining) > 0:
+            print_status_message('Starting fold {0}...'.format(str(i + 1)), verbose, logger)
+            with profile_phase(profiler, 'fold_materialize', i):
+                X_train, y_train = provider.train_fold(i)
+                X_eval, _ = provider.eval_fold(i)
+
+            with profile_phase(profiler, 'transform_fit', i):
+                transforms = fit_transforms(X_train, y_train, transforms)
+            with profile_phase(profiler, 'transform_apply', i):
+                X_train = apply_transforms(X_train, transforms)
+                X_eval = apply_transforms(X_eval, transforms)
+
+            print_status_message('Fitting individual models...', verbose, logger)
+            for k in remaining:
+                models[k] = checkpoint.restore(k, models[k])
+                with profile_phase(profiler, 'model_fit', i, k):
+                    models[k].fit(X_train, y_train)
+
+            print_status_message('Generating predictions and scoring...', verbose, logger)
+            for k in remaining:
+                with profile_phase(profiler, 'train_score', i, k):
+                    train_fold_score = score_training(X_train, y_train, models[k], metric, train_score)
+                if train_fold_score is not None:
+                    model_train_scores[k].append(train_fold_score)
+                with profile_phase(profiler, 'predict', i, k):
+                    y_models[eval_index, k] = models[k].predict(X_eval)
+                checkpoint.save('fold-{0}-{1}'.format(i, k), (train_fold_score, y_models[eval_index, k]), models[k])
 
         y_pred[eval_index] = y_models[eval_index, :].sum(axis=1) / n_models
-        y_true[eval_index] = y_eval
+        y_true[eval_index] = y[eval_index]
+
+    # release the scratch buffer before fitting on the full data set
+    del provider
 
     t1 = time.time()
     print_status_message('Ensemble training completed in {0:3f} s.'.format(t1 - t0), verbose, logger)
 
     for k, model in enumerate(models):
-        avg_train_score = model_train_scores[:, k].sum(axis=0) / n_folds
+        if len(model_train_scores[k]) > 0:
+            avg_train_score = average_scores(model_train_scores[k])
+            print_status_message('Model {0} average training score = {1}'
+                                 .format(str(k), str(avg_train_score)), verbose, logger)
         eval_score = score(y_true, y_models[:, k], metric)
-        print_status_message('Model {0} average training score = {1}'
-                             .format(str(k), str(avg_train_score)), verbose, logger)
         print_status_message('Model {0} eval score = {1}'.format(str(k), str(eval_score)), verbose, logger)
     print_status_message('Ensemble eval score = {0}'.format(str(score(y_true, y_pred, metric))), verbose, logger)
 
     df = pd.DataFrame(y_models, columns=['Model ' + str(i) for i in range(n_models)])
-    visualize_correlations(df)
+    if figure_dir is not None:
+        exporter = FigureExporter(figure_dir)
+        exporter.submit('model_correlations', 'visualize_correlations', df)
+        exporter.close(wait=False)
+    else:
+        visualize_correlations(df)
 
     print_status_message('Fitting models on full data set...', verbose, logger)
     n_test_records = X_test.shape[0]
     y_models_test = np.zeros((n_test_records, n_models))
 
-    transforms = fit_transforms(X, y, transforms)
-    X = apply_transforms(X, transforms)
-    X_test = apply_transforms(X_test, transforms)
-
-    for k, model in enumerate(models):
-        model.fit(X, y)
+    remaining = []
+    for k in range(n_models):
+        if checkpoint.exists('full-{0}'.format(k)):
+            y_models_test[:, k] = checkpoint.load('full-{0}'.format(k), k)
+        else:
+            remaining.append(k)
+
+    if len(remaining) > 0:
+        with profile_phase(profiler, 'transform_fit'):
+            transforms = fit_transforms(X, y, transforms)
+        with profile_phase(profiler, 'transform_apply'):
+            X = apply_transforms(X, transforms)
+            X_test = apply_transforms(X_test, transforms)
+
+    for k in remaining:
+        models[k] = checkpoint.restore(k, models[k])
+        with profile_phase(profiler, 'model_fit', model=k):
+            models[k].fit(X, y)
 
     print_status_message('Generating test data predictions...', verbose, logger)
-    for k, model in enumerate(models):
-        y_models_test[:, k] = model.predict(X_test)
+    for k in remaining:
+        with profile_phase(profiler, 'predict', model=k):
+            y_models_test[:, k] = models[k].predict(X_test)
+        checkpoint.save('full-{0}'.format(k), y_models_test[:, k], models[k])
+
+    # models restored from the checkpoint replace their definitions, so the caller gets fitted models back
+    for k in range(n_models):
+        models[k] = checkpoint.restore(k, models[k])
 
     y_pred_test = y_models_test.sum(axis=1) / n_models
 
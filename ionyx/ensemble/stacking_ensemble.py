@@ -1,14 +1,16 @@
 import time
 import numpy as np
 import pandas as pd
-from sklearn.cross_validation import KFold
+from sklearn.model_selection import KFold
 from sklearn.linear_model import Ridge
 
-from ..utils import print_status_message, fit_transforms, apply_transforms, score
-from ..visualization import visualize_correlations
+from ..utils import FoldProvider, print_status_message, fit_transforms, apply_transforms, score, average_scores
+from ..utils import training_subset, profile_phase, open_checkpoint
+from ..visualization import visualize_correlations, FigureExporter
 
 
-def train_stacked_ensemble(X, y, X_test, models, metric, transforms, n_folds, verbose=False, logger=None):
+def train_stacked_ensemble(X, y, X_test, models, metric, transforms, n_folds, train_score='full', profiler=None,
+                           figure_dir=None, checkpoint_dir=None, verbose=False, logger=None):
     """
     Creates an stacked ensemble of many models together.  This function performs several steps.  First, it uses the
     model definitions and other parameters provided as input to do K-fold cross-validation on the data set, training
@@ -38,7 +40,7 @@ def train_stacked_ensemble(X, y, X_test, models, metric, transforms, n_folds, ve
         Model definitions for each of the models in the ensemble.
 
     metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
-        Scoring metric.
+        Scoring metric, or a list of scoring metrics to calculate in a single pass.
 
     transforms : array-like
         List of transforms to apply to the input samples.
@@ -46,6 +48,26 @@ def train_stacked_ensemble(X, y, X_test, models, metric, transforms, n_folds, ve
     n_folds : int
         Number of cross-validation folds to perform.
 
+    train_score : {'full', 'sample:N', 'off'}, optional, default 'full'
+        How to calculate training scores: on every training row, on a fixed random subsample of N rows, or
+        not at all.  Skipping or sampling avoids predicting on the entire training set for models where
+        prediction is expensive.
+
+    profiler : object, optional, default None
+        Instance of Profiler that records the time spent in each phase of each fold, per model.  Phases of
+        the inner folds used to generate out-of-sample predictions are prefixed with 'oos_'.
+
+    figure_dir : string, optional, default None
+        If provided, the plot of correlations between the models' out-of-sample predictions is rendered in a
+        background process and written to this directory (see FigureExporter) instead of being drawn inline,
+        so that fitting on the full data set doesn't wait on it.
+
+    checkpoint_dir : string, optional, default None
+        If provided, the out-of-sample predictions of each model in each inner fold, the predictions and
+        fitted model of each model in each outer fold, and each model's test predictions are checkpointed to
+        this directory.  A repeated call with the same inputs skips the units that were already completed
+        (see Checkpoint), which lets a long run that was interrupted pick up where it stopped.
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -71,116 +93,195 @@ def train_stacked_ensemble(X, y, X_test, models, metric, transforms, n_folds, ve
     n_models = len(models)
     n_records = y.shape[0]
 
-    model_train_scores = np.zeros((n_folds, n_models))
-    stacker_train_scores = np.zeros(n_folds)
+    model_train_scores = [[] for _ in range(n_models)]
+    stacker_train_scores = []
     y_models = np.zeros((n_records, n_models))
     y_pred = np.zeros(n_records)
     y_true = np.zeros(n_records)
 
-    folds = list(KFold(n_records, n_folds=n_folds, shuffle=True, random_state=1337))
-    for i, (train_out_index, eval_out_index) in enumerate(folds):
+    checkpoint = open_checkpoint(checkpoint_dir, 'stacked_ensemble', [X, y, X_test], models, transforms, verbose,
+                                 logger, metric=metric, n_folds=n_folds, train_score=train_score)
+    folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=1337).split(np.zeros(n_records)))
+    with profile_phase(profiler, 'fold_provider'):
+        provider = FoldProvider(X, y, folds)
+
+    for i in range(n_folds):
         print_status_message('Starting fold {0}...'.format(str(i + 1)), verbose, logger)
-        X_out_train = X[train_out_index]
-        y_out_train = y[train_out_index]
-        X_out_eval = X[eval_out_index]
-        y_out_eval = y[eval_out_index]
+        train_out_index = provider.train_index(i)
+        eval_out_index = provider.eval_index(i)
 
         y_oos = np.zeros((n_records, n_models))
 
         print_status_message('Generating out-of-sample predictions for first-level models...', verbose, logger)
-        for j, (train_index, eval_index) in enumerate(folds):
+        for j in range(n_folds):
             if j != i:
-                X_train = X[train_index]
-                y_train = y[train_index]
-                X_eval = X[eval_index]
-
-                transforms = fit_transforms(X_train, y_train, transforms)
-                X_train = apply_transforms(X_train, transforms)
-                X_eval = apply_transforms(X_eval, transforms)
-
-                for k, model in enumerate(models):
-                    if k < 3:
-                        model.fit(X_train, y_train)
-                    elif k == 3:
-                        model.fit(X_train, y_train, batch_size=128, nb_epoch=400, verbose=0, shuffle=True)
+                eval_index = provider.eval_index(j)
+                remaining = []
+                for k in range(n_models):
+                    unit = 'oos-{0}-{1}-{2}'.format(i, j, k)
+                    if checkpoint.exists(unit):
+                        y_oos[eval_index, k] = checkpoint.load(unit, k)
                     else:
-                        model.fit(X_train, y_train, batch_size=128, nb_epoch=1000, verbose=0, shuffle=True)
+                        remaining.append(k)
 
-                for k, model in enumerate(models):
-                    y_oos[eval_index, k] = model.predict(X_eval).ravel()
+                if len(remaining) == 0:
+                    continue
 
-        print_status_message('Fitting second-level model...', verbose, logger)
-        stacker.fit(y_oos[train_out_index], y_out_train)
-
-        print_status_message('Re-fitting first-level models...', verbose, logger)
-        transforms = fit_transforms(X_out_train, y_out_train, transforms)
-        X_out_train = apply_transforms(X_out_train, transforms)
-        X_out_eval = apply_transforms(X_out_eval, transforms)
-
-        for k, model in enumerate(models):
-            if k < 3:
-                model.fit(X_out_train, y_out_train)
-            elif k == 3:
-                model.fit(X_out_train, y_out_train, batch_size=128, nb_epoch=400, verbose=0, shuffle=True)
-            else:
-                model.fit(X_out_train, y_out_train, batch_size=128, nb_epoch=1000, verbose=0, shuffle=True)
+                with profile_phase(profiler, 'oos_fold_materialize', i):
+                    X_train, y_train = provider.train_fold(j)
+                    X_eval, _ = provider.eval_fold(j)
 
-        print_status_message('Generating predictions and scoring...', verbose, logger)
-        training_predictions = np.zeros((X_out_train.shape[0], n_models))
+                with profile_phase(profiler, 'oos_transform_fit', i):
+                    transforms = fit_transforms(X_train, y_train, transforms)
+                with profile_phase(profiler, 'oos_transform_apply', i):
+                    X_train = apply_transforms(X_train, transforms)
+                    X_eval = apply_transforms(X_eval, transforms)
 
-        for k, model in enumerate(models):
-            training_predictions[:, k] = model.predict(X_out_train).ravel()
-            model_train_scores[i, k] = score(y_out_train, training_predictions[:, k], metric)
+                for k in remaining:
+                    models[k] = checkpoint.restore(k, models[k])
+                    with profile_phase(profiler, 'oos_model_fit', i, k):
+                        _fit_model(models[k], k, X_train, y_train)
 
-        stacker_train_scores[i] = score(y_out_train, stacker.predict(training_predictions), metric)
+                for k in remaining:
+                    with profile_phase(profiler, 'oos_predict', i, k):
+                        y_oos[eval_index, k] = models[k].predict(X_eval).ravel()
+                    checkpoint.save('oos-{0}-{1}-{2}'.format(i, j, k), y_oos[eval_index, k], models[k])
 
-        for k, model in enumerate(models):
-            y_models[eval_out_index, k] = model.predict(X_out_eval).ravel()
+        # the inner folds share the scratch buffer, so the outer fold is materialized only once they are done
+        with profile_phase(profiler, 'fold_materialize', i):
+            X_out_train, y_out_train = provider.train_fold(i)
+            X_out_eval, y_out_eval = provider.eval_fold(i)
 
-        y_pred[eval_out_index] = stacker.predict(y_models[eval_out_index, :])
+        print_status_message('Fitting second-level model...', verbose, logger)
+        with profile_phase(profiler, 'stacker_fit', i):
+            stacker.fit(y_oos[train_out_index], y_out_train)
+
+        subset = training_subset(X_out_train.shape[0], train_score)
+        if subset is not None:
+            y_score = y_out_train[subset]
+            training_predictions = np.zeros((y_score.shape[0], n_models))
+
+        remaining = []
+        for k in range(n_models):
+            unit = 'fold-{0}-{1}'.format(i, k)
+            if checkpoint.exists(unit):
+                train_predictions, y_models[eval_out_index, k] = checkpoint.load(unit, k)
+                if subset is not None:
+                    training_predictions[:, k] = train_predictions
+            else:
+                remaining.append(k)
+
+        if len(remaining) > 0:
+            print_status_message('Re-fitting first-level models...', verbose, logger)
+            with profile_phase(profiler, 'transform_fit', i):
+                transforms = fit_transforms(X_out_train, y_out_train, transforms)
+            with profile_phase(profiler, 'transform_apply', i):
+                X_out_train = apply_transforms(X_out_train, transforms)
+                X_out_eval = apply_transforms(X_out_eval, transforms)
+
+            for k in remaining:
+                models[k] = checkpoint.restore(k, models[k])
+                with profile_phase(profiler, 'model_fit', i, k):
+                    _fit_model(models[k], k, X_out_train, y_out_train)
+
+            print_status_message('Generating predictions and scoring...', verbose, logger)
+            X_score = X_out_train[subset] if subset is not None else None
+            for k in remaining:
+                if subset is not None:
+                    with profile_phase(profiler, 'train_score', i, k):
+                        training_predictions[:, k] = models[k].predict(X_score).ravel()
+                with profile_phase(profiler, 'predict', i, k):
+                    y_models[eval_out_index, k] = models[k].predict(X_out_eval).ravel()
+                checkpoint.save('fold-{0}-{1}'.format(i, k), (training_predictions[:, k] if subset is not None
+                                                              else None, y_models[eval_out_index, k]), models[k])
+
+        # the first-level predictions are re-used as input to score the stacker
+        if subset is not None:
+            for k in range(n_models):
+                model_train_scores[k].append(score(y_score, training_predictions[:, k], metric))
+            with profile_phase(profiler, 'train_score', i, 'stacker'):
+                stacker_train_scores.append(score(y_score, stacker.predict(training_predictions), metric))
+
+        with profile_phase(profiler, 'predict', i, 'stacker'):
+            y_pred[eval_out_index] = stacker.predict(y_models[eval_out_index, :])
         y_true[eval_out_index] = y_out_eval
 
+    # release the scratch buffer before fitting on the full data set
+    del provider
+
     t1 = time.time()
     print_status_message('Ensemble training completed in {0:3f} s.'.format(t1 - t0), verbose, logger)
 
     for k, model in enumerate(models):
-        avg_train_score = model_train_scores[:, k].sum(axis=0) / n_folds
+        if len(model_train_scores[k]) > 0:
+            avg_train_score = average_scores(model_train_scores[k])
+            print_status_message('Model {0} average training score = {1}'
+                                 .format(str(k), str(avg_train_score)), verbose, logger)
         eval_score = score(y_true, y_models[:, k], metric)
-        print_status_message('Model {0} average training score = {1}'
-                             .format(str(k), str(avg_train_score)), verbose, logger)
         print_status_message('Model {0} eval score = {1}'
                              .format(str(k), str(eval_score)), verbose, logger)
-    print_status_message('Ensemble average training score = {0}'
-                         .format(str(stacker_train_scores.sum() / n_folds)), verbose, logger)
+    if len(stacker_train_scores) > 0:
+        print_status_message('Ensemble average training score = {0}'
+                             .format(str(average_scores(stacker_train_scores))), verbose, logger)
     print_status_message('Ensemble eval score = {0}'
                          .format(str(score(y_true, y_pred, metric))), verbose, logger)
 
     df = pd.DataFrame(y_models, columns=['Model ' + str(i) for i in range(n_models)])
-    visualize_correlations(df)
+    if figure_dir is not None:
+        exporter = FigureExporter(figure_dir)
+        exporter.submit('model_correlations', 'visualize_correlations', df)
+        exporter.close(wait=False)
+    else:
+        visualize_correlations(df)
 
     print_status_message('Fitting models on full data set...', verbose, logger)
     n_test_records = X_test.shape[0]
     y_models_test = np.zeros((n_test_records, n_models))
 
-    transforms = fit_transforms(X, y, transforms)
-    X = apply_transforms(X, transforms)
-    X_test = apply_transforms(X_test, transforms)
-
-    for k, model in enumerate(models):
-        if k < 3:
-            model.fit(X, y)
-        elif k == 3:
-            model.fit(X, y, batch_size=128, nb_epoch=400, verbose=0, shuffle=True)
+    remaining = []
+    for k in range(n_models):
+        if checkpoint.exists('full-{0}'.format(k)):
+            y_models_test[:, k] = checkpoint.load('full-{0}'.format(k), k)
         else:
-            model.fit(X, y, batch_size=128, nb_epoch=1000, verbose=0, shuffle=True)
+            remaining.append(k)
+
+    if len(remaining) > 0:
+        with profile_phase(profiler, 'transform_fit'):
+            transforms = fit_transforms(X, y, transforms)
+        with profile_phase(profiler, 'transform_apply'):
+            X = apply_transforms(X, transforms)
+            X_test = apply_transforms(X_test, transforms)
+
+    for k in remaining:
+        models[k] = checkpoint.restore(k, models[k])
+        with profile_phase(profiler, 'model_fit', model=k):
+            _fit_model(models[k], k, X, y)
 
-    stacker.fit(y_models, y_true)
+    with profile_phase(profiler, 'stacker_fit'):
+        stacker.fit(y_models, y_true)
 
     print_status_message('Generating test data predictions...', verbose, logger)
-    for k, model in enumerate(models):
-        y_models_test[:, k] = model.predict(X_test).ravel()
+    for k in remaining:
+        with profile_phase(profiler, 'predict', model=k):
+            y_models_test[:, k] = models[k].predict(X_test).ravel()
+        checkpoint.save('full-{0}'.format(k), y_models_test[:, k], models[k])
+
+    # models restored from the checkpoint replace their definitions, so the caller gets fitted models back
+    for k in range(n_models):
+        models[k] = checkpoint.restore(k, models[k])
 
-    y_pred_test = stacker.predict(y_models_test)
+    with profile_phase(profiler, 'predict', model='stacker'):
+        y_pred_test = stacker.predict(y_models_test)
 
     print_status_message('Ensemble complete.', verbose, logger)
     return y_models, y_true, y_models_test, y_pred_test
+
+
+def _fit_model(model, k, X, y):
+    # the fourth and later models are keras networks, which take training options
+    if k < 3:
+        model.fit(X, y)
+    elif k == 3:
+        model.fit(X, y, batch_size=128, nb_epoch=400, verbose=0, shuffle=True)
+    else:
+        model.fit(X, y, batch_size=128, nb_epoch=1000, verbose=0, shuffle=True)
@@ -1,5 +1,8 @@
 from .cross_validation import cross_validate
 from .cross_validation import sequence_cross_validate
 from .cross_validation import plot_learning_curve
+from .experiment import Experiment
+from .feature_importance import permutation_importance
 from .model import train_model
+from .model import train_model_incremental
 from .param_search import parameter_grid_search
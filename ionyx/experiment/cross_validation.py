@@ -1,13 +1,13 @@
 import time
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.cross_validation import KFold
-from sklearn.learning_curve import learning_curve
+from sklearn.model_selection import KFold
 
-from ..utils import print_status_message, fit_transforms, apply_transforms, score
+from ..utils import FoldProvider, print_status_message, fit_transforms, apply_transforms, score, average_scores
+from ..utils import score_training, profile_phase, open_checkpoint
 
 
-def cross_validate(X, y, model, metric, transforms, n_folds, verbose=False, logger=None):
+def cross_validate(X, y, model, metric, transforms, n_folds, train_score='full', profiler=None,
+                   checkpoint_dir=None, verbose=False, logger=None):
     """
     Performs cross-validation to estimate the true performance of the model.
 
@@ -23,7 +23,7 @@ def cross_validate(X, y, model, metric, transforms, n_folds, verbose=False, logg
         An object in memory that represents a model definition.
 
     metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
-        Scoring metric.
+        Scoring metric, or a list of scoring metrics to calculate in a single pass.
 
     transforms : array-like
         List of objects with a transform function that accepts one parameter.
@@ -31,6 +31,19 @@ def cross_validate(X, y, model, metric, transforms, n_folds, verbose=False, logg
     n_folds : int
         Number of cross-validation folds.
 
+    train_score : {'full', 'sample:N', 'off'}, optional, default 'full'
+        How to calculate training scores: on every training row, on a fixed random subsample of N rows, or
+        not at all.  Skipping or sampling avoids predicting on the entire training set for models where
+        prediction is expensive.
+
+    profiler : object, optional, default None
+        Instance of Profiler that records the time spent in each phase of each fold.
+
+    checkpoint_dir : string, optional, default None
+        If provided, the predictions, training score and fitted model of each fold are checkpointed to this
+        directory, and a repeated call with the same inputs skips the folds that were already completed
+        (see Checkpoint).
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -39,46 +52,70 @@ def cross_validate(X, y, model, metric, transforms, n_folds, verbose=False, logg
 
     Returns
     ----------
-    cross_validation_score : float
-        An aggregated evaluation of the performance of the model on validation data from each fold.
+    cross_validation_score : float or dict
+        An aggregated evaluation of the performance of the model on validation data from each fold, or a
+        dictionary of scores if a list of metrics was provided.
     """
     t0 = time.time()
     y_train_scores = []
-    y_pred = np.array([])
-    y_true = np.array([])
+    y_pred = []
+
+    checkpoint = open_checkpoint(checkpoint_dir, 'cross_validate', [X, y], [model], transforms, verbose, logger,
+                                 metric=metric, n_folds=n_folds, train_score=train_score)
+    folds = list(KFold(n_splits=n_folds, shuffle=True, random_state=1337).split(np.zeros(y.shape[0])))
+    with profile_phase(profiler, 'fold_provider'):
+        provider = FoldProvider(X, y, folds)
+
+    for i in range(n_folds):
+        unit = 'fold-{0}'.format(i)
+        if checkpoint.exists(unit):
+            train_fold_score, y_eval_pred = checkpoint.load(unit, 0)
+            if train_fold_score is not None:
+                y_train_scores.append(train_fold_score)
+            y_pred.append(y_eval_pred)
+            continue
 
-    folds = list(KFold(y.shape[0], n_folds=n_folds, shuffle=True, random_state=1337))
-    for i, (train_index, eval_index) in enumerate(folds):
         print_status_message('Starting fold {0}...'.format(str(i + 1)), verbose, logger)
-        X_train = X[train_index]
-        y_train = y[train_index]
-        X_eval = X[eval_index]
-        y_eval = y[eval_index]
+        with profile_phase(profiler, 'fold_materialize', i):
+            X_train, y_train = provider.train_fold(i)
+            X_eval, y_eval = provider.eval_fold(i)
 
-        transforms = fit_transforms(X_train, y_train, transforms)
-        X_train = apply_transforms(X_train, transforms)
-        X_eval = apply_transforms(X_eval, transforms)
+        with profile_phase(profiler, 'transform_fit', i):
+            transforms = fit_transforms(X_train, y_train, transforms)
+        with profile_phase(profiler, 'transform_apply', i):
+            X_train = apply_transforms(X_train, transforms)
+            X_eval = apply_transforms(X_eval, transforms)
 
-        model.fit(X_train, y_train)
+        model = checkpoint.restore(0, model)
+        with profile_phase(profiler, 'model_fit', i):
+            model.fit(X_train, y_train)
 
-        y_train_scores.append(score(y_train, model.predict(X_train), metric))
-        y_pred = np.append(y_pred, model.predict(X_eval))
-        y_true = np.append(y_true, y_eval)
+        with profile_phase(profiler, 'train_score', i):
+            train_fold_score = score_training(X_train, y_train, model, metric, train_score)
+        if train_fold_score is not None:
+            y_train_scores.append(train_fold_score)
+
+        with profile_phase(profiler, 'predict', i):
+            y_pred.append(model.predict(X_eval))
+        checkpoint.save(unit, (train_fold_score, y_pred[-1]), model)
 
     t1 = time.time()
     print_status_message('Cross-validation completed in {0:3f} s.'.format(t1 - t0), verbose, logger)
 
-    avg_train_score = sum(y_train_scores) / len(y_train_scores)
-    print_status_message('Average training score = {0}'.format(str(avg_train_score)), verbose, logger)
+    if len(y_train_scores) > 0:
+        avg_train_score = average_scores(y_train_scores)
+        print_status_message('Average training score = {0}'.format(str(avg_train_score)), verbose, logger)
 
-    xval_score = score(y_true, y_pred, metric)
+    # eval folds are contiguous in the provider's ordering, so the targets line up with the predictions
+    with profile_phase(profiler, 'score'):
+        xval_score = score(provider.y_, np.concatenate(y_pred), metric)
     print_status_message('Cross-validation score = {0}'.format(str(xval_score)), verbose, logger)
 
     return xval_score
 
 
 def sequence_cross_validate(X, y, model, metric, transforms, n_folds, strategy='traditional', window_type='fixed',
-                            min_window=0, forecast_range=1, plot=False, verbose=False, logger=None):
+                            min_window=0, forecast_range=1, plot=False, profiler=None, verbose=False, logger=None):
     """
     Performs time series cross-validation to estimate the true performance of the model.  Normal
     cross-validation can't be applied to time series data since it can't be randomly shuffled.  This
@@ -122,6 +159,9 @@ def sequence_cross_validate(X, y, model, metric, transforms, n_folds, strategy='
     plot : boolean, optional, default False
         Plot the forecast performance for each fold.
 
+    profiler : object, optional, default None
+        Instance of Profiler that records the time spent in each phase of each fold.
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -140,7 +180,7 @@ def sequence_cross_validate(X, y, model, metric, transforms, n_folds, strategy='
         n_folds = train_count - min_window - forecast_range
         fold_size = 1
     else:
-        fold_size = train_count / n_folds
+        fold_size = train_count // n_folds
 
     t0 = time.time()
     for i in range(n_folds):
@@ -155,15 +195,21 @@ def sequence_cross_validate(X, y, model, metric, transforms, n_folds, strategy='
         X_train, X_eval = X[fold_start:fold_train_end, :], X[fold_train_end:fold_end, :]
         y_train, y_eval = y[fold_start:fold_train_end], y[fold_train_end:fold_end]
 
-        transforms = fit_transforms(X_train, y_train, transforms)
-        X_train = apply_transforms(X_train, transforms)
-        X_eval = apply_transforms(X_eval, transforms)
+        with profile_phase(profiler, 'transform_fit', i):
+            transforms = fit_transforms(X_train, y_train, transforms)
+        with profile_phase(profiler, 'transform_apply', i):
+            X_train = apply_transforms(X_train, transforms)
+            X_eval = apply_transforms(X_eval, transforms)
 
-        model.fit(X_train, y_train)
-        y_pred = model.predict(X_eval)
-        scores.append(score(y, y_pred, metric))
+        with profile_phase(profiler, 'model_fit', i):
+            model.fit(X_train, y_train)
+        with profile_phase(profiler, 'predict', i):
+            y_pred = model.predict(X_eval)
+        with profile_phase(profiler, 'score', i):
+            scores.append(score(y_eval, y_pred, metric))
 
         if plot is True:
+            import matplotlib.pyplot as plt
             fig, ax = plt.subplots(figsize=(16, 10))
             ax.set_title('Estimation Error')
             ax.plot(y_pred - y_eval)
@@ -209,6 +255,9 @@ def plot_learning_curve(X, y, model, metric, transforms, n_folds, verbose=False,
     logger : object, optional, default None
         Instance of a class that can log messages to an output file.
     """
+    import matplotlib.pyplot as plt
+    from sklearn.model_selection import learning_curve
+
     transforms = fit_transforms(X, y, transforms)
     X = apply_transforms(X, transforms)
 
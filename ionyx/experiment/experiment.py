@@ -0,0 +1,396 @@
+import copy
+import time
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from ..utils import print_status_message, ArtifactStore, fingerprint, params_key
+
+
+class Experiment(object):
+    """
+    Runs an experiment declared as a graph of steps (e.g. load data -> fit transforms -> train model ->
+    cross-validate or ensemble) and caches the output of every step, so that re-running after a change only
+    recomputes the steps affected by it.
+
+    Each step is a function called with the outputs of its input steps and its own parameters.  A step's
+    key is a hash of its function, its parameters and the keys of its inputs, so changing a parameter (say,
+    the model) changes the key of that step and every step downstream of it while the keys, and therefore
+    the cached outputs, of everything else stay the same.  Since keys don't depend on outputs, a step whose
+    output is cached doesn't need its inputs to be loaded or computed at all.  Outputs are cached in memory
+    and, if a cache directory is provided, in an ArtifactStore on disk so they survive across sessions.
+    Steps that don't depend on each other run in parallel on a pool of threads.
+
+    Example:
+
+        experiment = Experiment(cache_dir='cache', n_jobs=2)
+        experiment.add_step('data', load_otto_group)
+        experiment.add_step('cv', cross_validate, inputs={'X': ('data', 0), 'y': ('data', 1)},
+                            params={'model': LogisticRegression(), 'metric': 'log_loss', 'transforms': [],
+                                    'n_folds': 5})
+        experiment.run()
+        experiment.set_params('cv', model=RandomForestClassifier())
+        experiment.run()  # only the cv step runs
+
+    Parameters
+    ----------
+    cache_dir : string, optional, default None
+        Directory for the on-disk cache.  If None, outputs are only cached in memory.
+
+    memory : boolean, optional, default True
+        Keep step outputs in memory between runs.
+
+    n_jobs : int, optional, default 1
+        Number of steps to run at the same time.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+    """
+    def __init__(self, cache_dir=None, memory=True, n_jobs=1, verbose=False, logger=None):
+        self.cache_dir = cache_dir
+        self.memory = memory
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+        self.logger = logger
+        self.steps_ = {}
+        self.outputs_ = {}
+        self.stats_ = []
+        self.store_ = ArtifactStore(cache_dir) if cache_dir is not None else None
+        self.lock_ = threading.Lock()
+
+    def add_step(self, name, func, inputs=None, params=None, cache=True):
+        """
+        Adds a step to the experiment, replacing any existing step with the same name.
+
+        Parameters
+        ----------
+        name : string
+            Name of the step.
+
+        func : callable
+            Function that computes the step's output.
+
+        inputs : array-like or dict, optional, default None
+            Outputs of other steps to pass to the function, either as a list of positional arguments or a
+            dictionary of keyword arguments.  Each entry is a step name, or a (step name, index) tuple to pass
+            one element of a step's output (e.g. ('data', 0) for X when the step returns (X, y)).
+
+        params : dict, optional, default None
+            Keyword arguments for the function.  Models, transforms and other estimators are hashed by
+            their class and get_params, and arrays by their contents.  Estimators are copied before each
+            call, so the declared ones are never fitted in place.
+
+        cache : boolean, optional, default True
+            Store the output in the on-disk cache.  Disable for outputs that can't be pickled.
+
+        Returns
+        ----------
+        self : object
+            The experiment, so that calls can be chained.
+        """
+        if inputs is None:
+            inputs = []
+        refs = inputs.values() if isinstance(inputs, dict) else inputs
+        for ref in refs:
+            source = ref[0] if isinstance(ref, tuple) else ref
+            if source not in self.steps_:
+                raise Exception('Input step "{0}" must be added before step "{1}".'.format(source, name))
+
+        self.steps_[name] = {'func': func, 'inputs': inputs, 'params': dict(params or {}), 'cache': cache}
+
+        return self
+
+    def add_data(self, name, *values):
+        """
+        Adds a step whose output is the given values, e.g. add_data('data', X, y).  The step's key is the
+        fingerprint of the values, so replacing the data invalidates everything downstream.
+
+        Returns
+        ----------
+        self : object
+            The experiment, so that calls can be chained.
+        """
+        return self.add_step(name, _identity, params={'values': values}, cache=False)
+
+    def set_params(self, name, **params):
+        """
+        Changes some of a step's parameters.
+
+        Returns
+        ----------
+        self : object
+            The experiment, so that calls can be chained.
+        """
+        self.steps_[name]['params'].update(params)
+
+        return self
+
+    def run(self, targets=None):
+        """
+        Computes the given steps, using cached outputs wherever a step's key hasn't changed.
+
+        Parameters
+        ----------
+        targets : string or array-like, optional, default None
+            Name or list of names of the steps to compute.  Defaults to every step that isn't an input to
+            another step.
+
+        Returns
+        ----------
+        outputs : dict
+            Dictionary mapping each target to its output.
+        """
+        if targets is None:
+            used = set(_source(ref) for step in self.steps_.values() for ref in _refs(step['inputs']))
+            targets = [name for name in self.steps_ if name not in used]
+        elif isinstance(targets, str):
+            targets = [targets]
+
+        t0 = time.time()
+        self.stats_ = []
+        keys = {}
+        for name in self.steps_:
+            keys[name] = self._key(name, keys)
+
+        # walk back from the targets, stopping at steps whose output is already cached
+        pending = {}
+        visited = set()
+        visit = list(targets)
+        while visit:
+            name = visit.pop()
+            if name in visited:
+                continue
+            visited.add(name)
+            if name in self.outputs_ and self.outputs_[name][0] == keys[name]:
+                self.stats_.append({'step': name, 'status': 'memory', 'time': 0., 'key': keys[name][:12]})
+                continue
+            if self._load(name, keys[name]):
+                continue
+            pending[name] = set(_source(ref) for ref in _refs(self.steps_[name]['inputs']))
+            visit.extend(pending[name])
+
+        for deps in pending.values():
+            deps.intersection_update(pending)
+
+        if self.n_jobs == 1:
+            while pending:
+                name = next(n for n in self.steps_ if n in pending and not pending[n])
+                self._compute(name, keys[name])
+                self._finish(name, pending)
+        else:
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+                running = {}
+                while pending or running:
+                    for name in [n for n in self.steps_ if n in pending and not pending[n] and n not in running]:
+                        running[name] = executor.submit(self._compute, name, keys[name])
+                    done, _ = wait(list(running.values()), return_when=FIRST_COMPLETED)
+                    for name in [n for n, future in running.items() if future in done]:
+                        running.pop(name).result()
+                        self._finish(name, pending)
+
+        outputs = dict((name, self.outputs_[name][1]) for name in targets)
+        if not self.memory:
+            self.outputs_ = {}
+
+        t1 = time.time()
+        print_status_message('Experiment run completed in {0:3f} s.'.format(t1 - t0), self.verbose, self.logger)
+
+        return outputs
+
+    def output(self, name):
+        """
+        Returns the output of a step, computing it if necessary.
+        """
+        return self.run(name)[name]
+
+    def summary(self):
+        """
+        Builds a table of the steps used by the last run.
+
+        Returns
+        ----------
+        summary : DataFrame
+            Status ('run', or 'memory' or 'disk' for cache hits), duration in seconds and key of each step,
+            in the order they were resolved.
+        """
+        return pd.DataFrame(self.stats_, columns=['step', 'status', 'time', 'key']).set_index('step')
+
+    def report(self, verbose=True, logger=None):
+        """
+        Prints the table produced by summary along with the number of cache hits.
+
+        Parameters
+        ----------
+        verbose : boolean, optional, default True
+            Prints status messages to the console if enabled.
+
+        logger : object, optional, default None
+            Instance of a class that can log messages to an output file.
+        """
+        summary = self.summary()
+        hits = int((summary['status'] != 'run').sum())
+        print_status_message('Steps ({0} of {1} from cache):\n{2}'
+                             .format(hits, len(summary), summary.to_string(float_format='{0:.4f}'.format)),
+                             verbose, logger)
+
+    def _key(self, name, keys):
+        step = self.steps_[name]
+        refs = step['inputs'].items() if isinstance(step['inputs'], dict) else enumerate(step['inputs'])
+        inputs = [(position, keys[_source(ref)], ref[1] if isinstance(ref, tuple) else None) for position, ref in refs]
+        token = [name, _token(step['func']), _token(step['params']), inputs]
+
+        return params_key(token)
+
+    def _load(self, name, key):
+        if self.store_ is None:
+            return False
+
+        t0 = time.time()
+        with self.lock_:
+            artifact = self.store_.find('step:' + name, key)
+            if artifact is None:
+                return False
+            output = self.store_.get(artifact)
+            self.outputs_[name] = (key, output)
+            self.stats_.append({'step': name, 'status': 'disk', 'time': time.time() - t0, 'key': key[:12]})
+
+        return True
+
+    def _compute(self, name, key):
+        step = self.steps_[name]
+        print_status_message('Running step {0}...'.format(name), self.verbose, self.logger)
+        t0 = time.time()
+
+        if isinstance(step['inputs'], dict):
+            args = []
+            kwargs = dict((k, self._input(ref)) for k, ref in step['inputs'].items())
+        else:
+            args = [self._input(ref) for ref in step['inputs']]
+            kwargs = {}
+        kwargs.update(_copy_params(step['params']))
+        output = step['func'](*args, **kwargs)
+
+        t1 = time.time()
+        with self.lock_:
+            self.outputs_[name] = (key, output)
+            self.stats_.append({'step': name, 'status': 'run', 'time': t1 - t0, 'key': key[:12]})
+            if self.store_ is not None and step['cache']:
+                try:
+                    self.store_.put(output, 'step:' + name, key)
+                except Exception as e:
+                    print_status_message('Could not cache output of step {0}: {1}'.format(name, e),
+                                         self.verbose, self.logger)
+
+        print_status_message('Step {0} completed in {1:3f} s.'.format(name, t1 - t0), self.verbose, self.logger)
+
+    def _input(self, ref):
+        output = self.outputs_[_source(ref)][1]
+        return output[ref[1]] if isinstance(ref, tuple) else output
+
+    def _finish(self, name, pending):
+        del pending[name]
+        for deps in pending.values():
+            deps.discard(name)
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+def _identity(values):
+    return values if len(values) > 1 else values[0]
+
+
+def _copy_params(value):
+    # estimators are copied so the declared ones are never fitted in place, but data is passed as is
+    if isinstance(value, dict):
+        return dict((k, _copy_params(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return type(value)(_copy_params(v) for v in value)
+    elif hasattr(value, 'get_params'):
+        return copy.deepcopy(value)
+    else:
+        return value
+
+
+def _refs(inputs):
+    return list(inputs.values()) if isinstance(inputs, dict) else list(inputs)
+
+
+def _source(ref):
+    return ref[0] if isinstance(ref, tuple) else ref
+
+
+def _code_hash(code):
+    """
+    Hashes a code object's bytecode, constants and the names it refers to (globals and attributes, so that
+    e.g. changing x.min() to x.max() changes the hash).  Nested code objects (lambdas, comprehensions, inner
+    functions) are hashed recursively since their repr includes a memory address, and frozensets are sorted
+    since their iteration order changes with string hash randomization, so the hash is stable across
+    processes.
+    """
+    def const(value):
+        if hasattr(value, 'co_code'):
+            return 'code:' + _code_hash(value)
+        elif isinstance(value, tuple):
+            return '(' + ', '.join(const(v) for v in value) + ')'
+        elif isinstance(value, frozenset):
+            return 'frozenset(' + ', '.join(sorted(const(v) for v in value)) + ')'
+        else:
+            return repr(value)
+
+    return hashlib.sha256(code.co_code + const(code.co_consts).encode() + repr(code.co_names).encode()).hexdigest()
+
+
+def _cell_contents(cell, func):
+    try:
+        contents = cell.cell_contents
+    except ValueError:
+        # the variable hasn't been assigned yet
+        return None
+
+    # a recursive inner function refers to itself through its closure
+    return '<self>' if contents is func else contents
+
+
+def _token(value):
+    """
+    Converts a parameter value into a JSON-serializable structure that identifies it.
+    """
+    if isinstance(value, dict):
+        return dict((str(k), _token(v)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return [_token(v) for v in value]
+    elif isinstance(value, (pd.DataFrame, pd.Series)):
+        return {'frame': fingerprint(value.values) if value.values.dtype != object else
+                hashlib.sha256(pd.util.hash_pandas_object(value).values.tobytes()).hexdigest(),
+                'columns': [str(c) for c in getattr(value, 'columns', [value.name])]}
+    elif isinstance(value, np.ndarray):
+        return {'array': fingerprint(value)}
+    elif hasattr(value, 'get_params'):
+        return {'class': type(value).__module__ + '.' + type(value).__name__,
+                'params': _token(value.get_params(deep=False))}
+    elif callable(value):
+        module = getattr(value, '__module__', None) or ''
+        token = {'function': module + '.' + getattr(value, '__qualname__', repr(value))}
+        code = getattr(value, '__code__', None)
+        if code is not None:
+            # editing a function's body, its default arguments or the variables it closes over changes its key
+            token['code'] = _code_hash(code)
+            token['defaults'] = _token(value.__defaults__)
+            token['kwdefaults'] = _token(value.__kwdefaults__)
+            token['closure'] = [_token(_cell_contents(cell, value)) for cell in value.__closure__ or []]
+        return token
+    elif value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    elif isinstance(value, np.generic):
+        return value.item()
+    else:
+        return repr(value)
@@ -0,0 +1,121 @@
+import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from ..utils import print_status_message, score, greater_is_better
+
+
+def permutation_importance(X, y, model, metric, n_repeats=5, features=None, max_samples=None, n_jobs=1,
+                           batch_size=16, random_state=1337, verbose=False, logger=None):
+    """
+    Estimates feature importance for any fitted model by measuring how much the model's score drops when a
+    feature's values are randomly shuffled, which breaks the relationship between that feature and the target.
+    Works with models that don't expose importances of their own (linear models, kNN, neural nets, etc.).
+    Should be run on data the model wasn't trained on, e.g. an eval fold.
+
+    Each worker thread shuffles columns inside its own scratch copy of X and restores them after scoring, so
+    the only full copies made are one per thread.  Features are processed in batches spread across the
+    threads, which run in parallel as long as the model's predict function releases the GIL (as numpy and
+    most scikit-learn estimators do).
+
+    Parameters
+    ----------
+    X : array-like
+        Evaluation input samples.
+
+    y : array-like
+        Evaluation target values.
+
+    model : object
+        An object in memory that represents a fitted model.
+
+    metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
+        Scoring metric, or the name of a metric added with register_metric.  Lists of metrics aren't supported.
+
+    n_repeats : int, optional, default 5
+        Number of times to shuffle each feature.
+
+    features : array-like, optional, default None
+        List of column indices to evaluate.  An entry may also be a list of indices, in which case those
+        columns are shuffled together (e.g. the one-hot columns of a single variable).  Defaults to every
+        column.
+
+    max_samples : int, optional, default None
+        Evaluate on a fixed random subsample of this many rows to bound the cost for large data sets.
+
+    n_jobs : int, optional, default 1
+        Number of threads to use.
+
+    batch_size : int, optional, default 16
+        Number of features each task evaluates.
+
+    random_state : int, optional, default 1337
+        Seed for the random number generator.  Results don't depend on n_jobs or batch_size.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    importance_mean : array-like
+        Mean decrease in score for each feature (positive values mean the feature helps the model).  Can be
+        passed directly to visualize_feature_importance.
+
+    importance_std : array-like
+        Standard deviation of the decrease in score across repeats.
+    """
+    if isinstance(metric, (list, tuple)):
+        raise Exception('Permutation importance requires a single metric.')
+
+    print_status_message('Calculating permutation importance...', verbose, logger)
+    t0 = time.time()
+    X = np.asarray(X)
+    y = np.asarray(y)
+
+    if max_samples is not None and max_samples < X.shape[0]:
+        rows = np.sort(np.random.RandomState(random_state).choice(X.shape[0], max_samples, replace=False))
+        X = X[rows]
+        y = y[rows]
+
+    if features is None:
+        features = list(range(X.shape[1]))
+    columns = [np.atleast_1d(np.asarray(f, dtype=np.intp)) for f in features]
+
+    baseline = score(y, model.predict(X), metric)
+    sign = 1. if greater_is_better(metric) else -1.
+    importances = np.zeros((len(columns), n_repeats))
+    local = threading.local()
+
+    def evaluate(batch):
+        # each thread shuffles columns in its own copy of the data, which is created once and re-used
+        if not hasattr(local, 'X'):
+            local.X = X.copy()
+        X_work = local.X
+
+        for i in batch:
+            cols = columns[i]
+            rng = np.random.RandomState([random_state, i])
+            for r in range(n_repeats):
+                order = rng.permutation(X.shape[0])
+                X_work[:, cols] = X[order[:, np.newaxis], cols]
+                importances[i, r] = sign * (baseline - score(y, model.predict(X_work), metric))
+            X_work[:, cols] = X[:, cols]
+
+    batches = [range(start, min(start + batch_size, len(columns)))
+               for start in range(0, len(columns), batch_size)]
+    if n_jobs == 1:
+        for batch in batches:
+            evaluate(batch)
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+            # consume the results so that exceptions raised by a worker propagate
+            list(executor.map(evaluate, batches))
+
+    t1 = time.time()
+    print_status_message('Permutation importance calculated in {0:3f} s.'.format(t1 - t0), verbose, logger)
+
+    return importances.mean(axis=1), importances.std(axis=1)
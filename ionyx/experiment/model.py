@@ -1,11 +1,14 @@
 import time
-from sklearn.cross_validation import train_test_split
+from sklearn.model_selection import train_test_split
 
-from ..utils import print_status_message, fit_transforms, apply_transforms, predict_score
+from ..utils import print_status_message, fit_transforms, apply_transforms, predict_score, score_training
+from ..utils import create_accumulator, profile_phase
+from ..utils import split_chunks, fit_transforms_incremental, apply_transforms_chunked
 
 
 def train_model(X, y, model, library, metric, transforms, eval=False, plot_eval_history=False,
-                early_stopping=False, early_stopping_rounds=None, verbose=False, logger=None):
+                early_stopping=False, early_stopping_rounds=None, train_score='full', profiler=None,
+                verbose=False, logger=None):
     """
     Trains a new model using the provided training data.
 
@@ -26,7 +29,7 @@ def train_model(X, y, model, library, metric, transforms, eval=False, plot_eval_
         on which library is used.
 
     metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
-        Scoring metric.
+        Scoring metric, or a list of scoring metrics to calculate in a single pass.
 
     transforms : array-like
         List of objects with a transform function that accepts one parameter.
@@ -44,6 +47,14 @@ def train_model(X, y, model, library, metric, transforms, eval=False, plot_eval_
         Number of training iterations to allow before stopping training due to performance on a validation set.
         Eval and early_stopping must be enabled.
 
+    train_score : {'full', 'sample:N', 'off'}, optional, default 'full'
+        How to calculate training scores: on every training row, on a fixed random subsample of N rows, or
+        not at all.  Skipping or sampling avoids predicting on the entire training set for models where
+        prediction is expensive.
+
+    profiler : object, optional, default None
+        Instance of Profiler that records the time spent in each phase.
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -68,39 +79,46 @@ def train_model(X, y, model, library, metric, transforms, eval=False, plot_eval_
 
     if eval:
         X_train, X_eval, y_train, y_eval = train_test_split(X, y, test_size=0.1)
-        transforms = fit_transforms(X_train, y_train, transforms)
-        X_train = apply_transforms(X_train, transforms)
-        X_eval = apply_transforms(X_eval, transforms)
-
-        if early_stopping:
-            if library == 'xgboost':
-                model.fit(X_train, y_train, eval_set=[(X_eval, y_eval)], eval_metric='rmse',
-                          early_stopping_rounds=early_stopping_rounds)
-                training_history = model.eval_results
-                print_status_message('Best iteration found = {0}'.format(str(model.best_iteration)), verbose, logger)
-            else:
-                raise Exception('Early stopping not supported.')
-        else:
-            if library == 'xgboost':
-                model.fit(X_train, y_train, eval_set=[(X_eval, y_eval)], eval_metric='rmse')
-                training_history = model.eval_results
-                print('TODO')
-            elif library == 'keras':
-                model.validation_data = (X_eval, y_eval)
-                training_history = model.fit(X_train, y_train)
-                min_eval_loss = min(training_history.history['val_loss'])
-                min_eval_epoch = min(enumerate(training_history.history['loss']), key=lambda x: x[1])[0] + 1
-                print_status_message('Min eval loss = {0}'.format(str(min_eval_loss)), verbose, logger)
-                print_status_message('Min eval epoch = {0}'.format(str(min_eval_epoch)), verbose, logger)
+        with profile_phase(profiler, 'transform_fit'):
+            transforms = fit_transforms(X_train, y_train, transforms)
+        with profile_phase(profiler, 'transform_apply'):
+            X_train = apply_transforms(X_train, transforms)
+            X_eval = apply_transforms(X_eval, transforms)
+
+        with profile_phase(profiler, 'model_fit'):
+            if early_stopping:
+                if library == 'xgboost':
+                    model.fit(X_train, y_train, eval_set=[(X_eval, y_eval)], eval_metric='rmse',
+                              early_stopping_rounds=early_stopping_rounds)
+                    training_history = model.eval_results
+                    print_status_message('Best iteration found = {0}'.format(str(model.best_iteration)),
+                                         verbose, logger)
+                else:
+                    raise Exception('Early stopping not supported.')
             else:
-                raise Exception('Model evaluation not supported.')
+                if library == 'xgboost':
+                    model.fit(X_train, y_train, eval_set=[(X_eval, y_eval)], eval_metric='rmse')
+                    training_history = model.eval_results
+                    print('TODO')
+                elif library == 'keras':
+                    model.validation_data = (X_eval, y_eval)
+                    training_history = model.fit(X_train, y_train)
+                    min_eval_loss = min(training_history.history['val_loss'])
+                    min_eval_epoch = min(enumerate(training_history.history['loss']), key=lambda x: x[1])[0] + 1
+                    print_status_message('Min eval loss = {0}'.format(str(min_eval_loss)), verbose, logger)
+                    print_status_message('Min eval epoch = {0}'.format(str(min_eval_epoch)), verbose, logger)
+                else:
+                    raise Exception('Model evaluation not supported.')
     else:
-        transforms = fit_transforms(X, y, transforms)
-        X = apply_transforms(X, transforms)
-        if library == 'keras':
-            training_history = model.fit(X, y)
-        else:
-            model.fit(X, y)
+        with profile_phase(profiler, 'transform_fit'):
+            transforms = fit_transforms(X, y, transforms)
+        with profile_phase(profiler, 'transform_apply'):
+            X = apply_transforms(X, transforms)
+        with profile_phase(profiler, 'model_fit'):
+            if library == 'keras':
+                training_history = model.fit(X, y)
+            else:
+                model.fit(X, y)
 
     t1 = time.time()
     print_status_message('Model trained in {0:3f} s.'.format(t1 - t0), verbose, logger)
@@ -109,12 +127,15 @@ def train_model(X, y, model, library, metric, transforms, eval=False, plot_eval_
     print_status_message(str(model.get_params()), verbose, logger)
 
     if eval:
-        print_status_message('Calculating training score...', verbose, logger)
-        train_score = predict_score(X_train, y_train, model, metric)
-        print_status_message('Training score = {0}'.format(str(train_score)), verbose, logger)
+        if train_score != 'off':
+            print_status_message('Calculating training score...', verbose, logger)
+            with profile_phase(profiler, 'train_score'):
+                training_score = score_training(X_train, y_train, model, metric, train_score)
+            print_status_message('Training score = {0}'.format(str(training_score)), verbose, logger)
 
         print_status_message('Calculating evaluation score...', verbose, logger)
-        eval_score = predict_score(X_eval, y_eval, model, metric)
+        with profile_phase(profiler, 'eval_score'):
+            eval_score = predict_score(X_eval, y_eval, model, metric)
         print_status_message('Evaluation score = {0}'.format(str(eval_score)), verbose, logger)
 
         if plot_eval_history:
@@ -124,9 +145,102 @@ def train_model(X, y, model, library, metric, transforms, eval=False, plot_eval_
                 print('TODO')
             else:
                 raise Exception('Eval history not supported.')
-    else:
+    elif train_score != 'off':
         print_status_message('Calculating training score...', verbose, logger)
-        train_score = predict_score(X, y, model, metric)
-        print_status_message('Training score = {0}'.format(str(train_score)), verbose, logger)
+        with profile_phase(profiler, 'train_score'):
+            training_score = score_training(X, y, model, metric, train_score)
+        print_status_message('Training score = {0}'.format(str(training_score)), verbose, logger)
 
     return model, training_history
+
+
+def train_model_incremental(chunks, model, metric, transforms, n_epochs=1, holdout_every=None, classes=None,
+                            verbose=False, logger=None):
+    """
+    Trains a new model from a stream of (X, y) chunks so that memory use is bounded by the chunk size rather
+    than the size of the data set.  Transforms are fitted with partial_fit in a pass over the training chunks,
+    then the model is trained with partial_fit over one or more epochs.  Evaluation holds out entire chunks.
+
+    Parameters
+    ----------
+    chunks : callable or array-like
+        Either a function with no arguments that returns an iterator of (X, y) chunks (e.g. from a chunked CSV
+        reader, a SQL cursor or iter_array_chunks over a memory-mapped array), or a list of (X, y) chunks.
+
+    model : object
+        An object in memory that represents a model definition.  Must support partial_fit.
+
+    metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
+        Scoring metric, or a list of scoring metrics to calculate in a single pass.
+
+    transforms : array-like
+        List of objects with partial_fit and transform functions.
+
+    n_epochs : int, optional, default 1
+        Number of passes over the training chunks.
+
+    holdout_every : int, optional, default None
+        Hold out every n-th chunk for evaluation.  If None, the model is trained on every chunk.
+
+    classes : array-like, optional, default None
+        List of all class labels.  Required by classifiers on the first call to partial_fit since a single
+        chunk may not contain every class.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    model : object
+        An object in memory that represents a fitted model.
+
+    transforms : array-like
+        List of fitted transform objects.
+    """
+    if not hasattr(model, 'partial_fit'):
+        raise Exception('Model does not support incremental training.')
+
+    print_status_message('Beginning incremental model training...', verbose, logger)
+    t0 = time.time()
+    train_source, holdout_source = split_chunks(chunks, holdout_every)
+    transforms = fit_transforms_incremental(train_source, transforms, verbose, logger)
+
+    for epoch in range(n_epochs):
+        n_chunks = 0
+        for X_chunk, y_chunk in apply_transforms_chunked(train_source, transforms):
+            if classes is not None:
+                model.partial_fit(X_chunk, y_chunk, classes=classes)
+            else:
+                model.partial_fit(X_chunk, y_chunk)
+            n_chunks += 1
+        print_status_message('Epoch {0} complete ({1} chunks).'.format(str(epoch + 1), str(n_chunks)),
+                             verbose, logger)
+
+    t1 = time.time()
+    print_status_message('Model trained in {0:3f} s.'.format(t1 - t0), verbose, logger)
+
+    print_status_message('Calculating training score...', verbose, logger)
+    train_score = _score_chunks(apply_transforms_chunked(train_source, transforms), model, metric)
+    print_status_message('Training score = {0}'.format(str(train_score)), verbose, logger)
+
+    if holdout_source is not None:
+        print_status_message('Calculating evaluation score...', verbose, logger)
+        eval_score = _score_chunks(apply_transforms_chunked(holdout_source, transforms), model, metric)
+        print_status_message('Evaluation score = {0}'.format(str(eval_score)), verbose, logger)
+
+    return model, transforms
+
+
+def _score_chunks(chunks, model, metric):
+    """
+    Predicts each chunk and scores the results with a streaming accumulator, so neither the targets nor
+    the predictions are retained.
+    """
+    accumulator = create_accumulator(metric)
+    for X_chunk, y_chunk in chunks:
+        accumulator.update(y_chunk, model.predict(X_chunk))
+
+    return accumulator.result()
@@ -1,12 +1,12 @@
 import time
-from sklearn.cross_validation import train_test_split
-from sklearn.grid_search import ParameterGrid
+from sklearn.model_selection import train_test_split
+from sklearn.model_selection import ParameterGrid
 
-from ..utils import print_status_message, fit_transforms, apply_transforms, predict_score
+from ..utils import print_status_message, fit_transforms, apply_transforms, predict_score, profile_phase
 
 
 def parameter_grid_search(X, y, model, metric, transform_grid, param_grid,
-                          test_split_size=0.2, verbose=False, logger=None):
+                          test_split_size=0.2, profiler=None, verbose=False, logger=None):
     """
     Performs an exhaustive search over the specified model parameters.
 
@@ -22,7 +22,7 @@ def parameter_grid_search(X, y, model, metric, transform_grid, param_grid,
         An object in memory that represents a model definition.
 
     metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
-        Scoring metric.
+        Scoring metric, or a list of scoring metrics to calculate in a single pass.
 
     transform_grid : array-like
         List of lists of transforms to experiment with.  The function will try each combination
@@ -34,6 +34,10 @@ def parameter_grid_search(X, y, model, metric, transform_grid, param_grid,
     test_split_size : float, optional, default 0.2
         Proportion of the data to hold out for evaluation (range 0 to 1).
 
+    profiler : object, optional, default None
+        Instance of Profiler that records the time spent in each phase.  Phases are tagged with the index of
+        the parameter combination as the model.
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -49,23 +53,28 @@ def parameter_grid_search(X, y, model, metric, transform_grid, param_grid,
         print_status_message('Transforms = {0}'.format(str(transforms)), verbose, logger)
         print_status_message('', verbose, logger)
         print_status_message('', verbose, logger)
-        transforms = fit_transforms(X_train, y_train, transforms)
-        X_train = apply_transforms(X_train, transforms)
-        X_eval = apply_transforms(X_eval, transforms)
+        with profile_phase(profiler, 'transform_fit'):
+            transforms = fit_transforms(X_train, y_train, transforms)
+        with profile_phase(profiler, 'transform_apply'):
+            X_train = apply_transforms(X_train, transforms)
+            X_eval = apply_transforms(X_eval, transforms)
 
-        for params in params_list:
+        for j, params in enumerate(params_list):
             tsub0 = time.time()
-            for param, value in params.iteritems():
+            for param, value in params.items():
                 print(param + " = " + str(value))
                 setattr(model, param, value)
 
             print_status_message('Fitting model...', verbose, logger)
-            model.fit(X_train, y_train)
+            with profile_phase(profiler, 'model_fit', model=j):
+                model.fit(X_train, y_train)
 
-            train_score = predict_score(X_train, y_train, model, metric)
+            with profile_phase(profiler, 'train_score', model=j):
+                train_score = predict_score(X_train, y_train, model, metric)
             print_status_message('Training score = {0}'.format(str(train_score)), verbose, logger)
 
-            eval_score = predict_score(X_eval, y_eval, model, metric)
+            with profile_phase(profiler, 'eval_score', model=j):
+                eval_score = predict_score(X_eval, y_eval, model, metric)
             print_status_message('Evaluation score = {0}'.format(str(eval_score)), verbose, logger)
 
             tsub1 = time.time()
@@ -0,0 +1,4 @@
+from .client import PredictionClient
+from .client import run_load_test
+from .server import PredictionServer
+from .server import create_server
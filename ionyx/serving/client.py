@@ -0,0 +1,160 @@
+import json
+import time
+import socket
+import threading
+import numpy as np
+from http.client import HTTPConnection
+
+
+class _UnixHTTPConnection(HTTPConnection):
+    """
+    HTTP connection over a Unix socket.
+    """
+    def __init__(self, path):
+        HTTPConnection.__init__(self, 'localhost')
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+class PredictionClient(object):
+    """
+    Client for a PredictionServer.  Keeps a single persistent connection open, so an instance should not
+    be shared between threads.
+
+    Parameters
+    ----------
+    host : string, optional, default '127.0.0.1'
+        Address of the server.
+
+    port : int, optional, default 8080
+        Port of the server.
+
+    unix_socket : string, optional, default None
+        Path of the server's Unix socket.  Overrides host and port.
+    """
+    def __init__(self, host='127.0.0.1', port=8080, unix_socket=None):
+        if unix_socket is not None:
+            self.connection = _UnixHTTPConnection(unix_socket)
+        else:
+            self.connection = HTTPConnection(host, port)
+
+    def _request(self, method, path, payload=None):
+        body = json.dumps(payload) if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        self.connection.request(method, path, body=body, headers=headers)
+        response = self.connection.getresponse()
+        result = json.loads(response.read().decode())
+        if response.status != 200:
+            raise Exception('Prediction server error: ' + result.get('error', str(response.status)))
+
+        return result
+
+    def predict(self, X):
+        """
+        Requests predictions for the given input samples.
+
+        Parameters
+        ----------
+        X : array-like
+            Input samples.
+
+        Returns
+        ----------
+        y_pred : array-like
+            Predicted target values.
+        """
+        return np.array(self._request('POST', '/predict', {'instances': np.atleast_2d(X).tolist()})['predictions'])
+
+    def stats(self):
+        """
+        Returns the server's request, batch size and latency statistics.
+        """
+        return self._request('GET', '/stats')
+
+    def close(self):
+        """
+        Close the connection to the server.
+        """
+        self.connection.close()
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+def run_load_test(X, n_clients=16, n_requests=1000, rows_per_request=1, host='127.0.0.1', port=8080,
+                  unix_socket=None):
+    """
+    Generates load against a prediction server from several concurrent clients and reports the observed
+    throughput and client-side latency.
+
+    Parameters
+    ----------
+    X : array-like
+        Input samples to draw requests from.
+
+    n_clients : int, optional, default 16
+        Number of concurrent clients, each on its own thread and connection.
+
+    n_requests : int, optional, default 1000
+        Total number of requests to send across all clients.
+
+    rows_per_request : int, optional, default 1
+        Number of rows in each request.
+
+    host : string, optional, default '127.0.0.1'
+        Address of the server.
+
+    port : int, optional, default 8080
+        Port of the server.
+
+    unix_socket : string, optional, default None
+        Path of the server's Unix socket.  Overrides host and port.
+
+    Returns
+    ----------
+    results : dict
+        Throughput, latency percentiles and the server's own statistics.
+    """
+    latencies = [[] for _ in range(n_clients)]
+    n_records = X.shape[0]
+
+    def worker(i):
+        client = PredictionClient(host, port, unix_socket)
+        rng = np.random.RandomState(i)
+        # the first n_requests % n_clients clients send one extra request so that the total is exact
+        for _ in range(n_requests // n_clients + (1 if i < n_requests % n_clients else 0)):
+            start = rng.randint(0, max(n_records - rows_per_request, 0) + 1)
+            t0 = time.time()
+            client.predict(X[start:start + rows_per_request])
+            latencies[i].append(time.time() - t0)
+        client.close()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_clients)]
+    t0 = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.time() - t0
+
+    observed = np.concatenate([np.array(l) for l in latencies])
+    client = PredictionClient(host, port, unix_socket)
+    server_stats = client.stats()
+    client.close()
+
+    return {
+        'requests': observed.shape[0],
+        'elapsed': elapsed,
+        'requests_per_second': observed.shape[0] / elapsed,
+        'rows_per_second': observed.shape[0] * rows_per_request / elapsed,
+        'latency_p50': float(np.percentile(observed, 50)),
+        'latency_p90': float(np.percentile(observed, 90)),
+        'latency_p99': float(np.percentile(observed, 99)),
+        'server': server_stats
+    }
@@ -0,0 +1,342 @@
+import json
+import time
+import asyncio
+import threading
+import collections
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from ..utils import print_status_message, load_model, apply_transforms
+
+
+class PredictionServer(object):
+    """
+    Asynchronous prediction server for a fitted model and its transforms.  Concurrent requests are queued
+    and coalesced into a single batched call to apply_transforms and predict, which amortizes the per-call
+    overhead across requests.  A batch is dispatched as soon as it reaches max_batch_size rows or the oldest
+    request in it has waited max_latency seconds, whichever comes first.
+
+    The server speaks a minimal subset of HTTP/1.1 with keep-alive over TCP or a Unix socket:
+
+        POST /predict   body {"instances": [[...], ...]}, returns {"predictions": [...]}
+        GET  /stats     returns request, batch size and latency statistics
+
+    Parameters
+    ----------
+    model : object
+        An object in memory that represents a fitted model.
+
+    transforms : array-like, optional, default None
+        List of fitted transforms to apply before predicting.
+
+    max_batch_size : int, optional, default 256
+        Maximum number of rows per predict call.
+
+    max_latency : float, optional, default 0.005
+        Maximum time in seconds a request waits for other requests to join its batch.
+
+    host : string, optional, default '127.0.0.1'
+        Address to listen on.
+
+    port : int, optional, default 8080
+        Port to listen on.  Use 0 to pick a free port (see the port attribute once started).
+
+    unix_socket : string, optional, default None
+        Path of a Unix socket to listen on instead of TCP.
+
+    n_features : int, optional, default None
+        Number of features each row must have.  Requests with a different number are rejected before they
+        are batched with other requests.  Defaults to n_features_in_ of the first transform, or of the model
+        if there are no transforms.  If that isn't available either, widths aren't checked up front and a
+        mismatched request only fails the batch it lands in.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+    """
+    def __init__(self, model, transforms=None, max_batch_size=256, max_latency=0.005, host='127.0.0.1',
+                 port=8080, unix_socket=None, n_features=None, verbose=False, logger=None):
+        self.model = model
+        self.transforms = transforms if transforms is not None else []
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+        if n_features is None:
+            n_features = getattr(self.transforms[0] if len(self.transforms) > 0 else model, 'n_features_in_', None)
+        self.n_features = n_features
+        self.verbose = verbose
+        self.logger = logger
+
+        self.n_requests = 0
+        self.n_batches = 0
+        self.n_rows = 0
+        self.max_observed_batch = 0
+        self.latencies_ = collections.deque(maxlen=10000)
+        self.batch_sizes_ = collections.deque(maxlen=10000)
+
+        self._queue = None
+        self._server = None
+        self._loop = None
+        self._thread = None
+        self._handlers = set()
+        self._error = None
+        self._started = threading.Event()
+        # a single worker keeps predict calls serialized and off the event loop
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    async def predict(self, X):
+        """
+        Queues rows for prediction and waits for the batch containing them to complete.
+
+        Parameters
+        ----------
+        X : array-like
+            Input samples for a single request.
+
+        Returns
+        ----------
+        y_pred : array-like
+            Predictions for the request's rows.
+        """
+        X = np.atleast_2d(np.asarray(X))
+        if X.ndim != 2:
+            raise Exception('Instances must be a list of rows.')
+        if self.n_features is not None and X.shape[1] != self.n_features:
+            raise Exception('Expected {0} features per row but got {1}.'.format(self.n_features, X.shape[1]))
+
+        future = self._loop.create_future()
+        await self._queue.put((X, future, time.time()))
+        return await future
+
+    async def _batcher(self):
+        while True:
+            pending = [await self._queue.get()]
+            n_rows = pending[0][0].shape[0]
+            deadline = pending[0][2] + self.max_latency
+
+            while n_rows < self.max_batch_size:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                pending.append(item)
+                n_rows += item[0].shape[0]
+
+            try:
+                # inside the try so that rows that can't be stacked only fail this batch
+                X = np.vstack([item[0] for item in pending]) if len(pending) > 1 else pending[0][0]
+                y_pred = await self._loop.run_in_executor(self._executor, self._predict_batch, X)
+            except Exception as e:
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            now = time.time()
+            start = 0
+            for X_request, future, received in pending:
+                end = start + X_request.shape[0]
+                if not future.done():
+                    future.set_result(y_pred[start:end])
+                self.latencies_.append(now - received)
+                start = end
+
+            self.n_requests += len(pending)
+            self.n_batches += 1
+            self.n_rows += n_rows
+            self.max_observed_batch = max(self.max_observed_batch, n_rows)
+            self.batch_sizes_.append(n_rows)
+
+    def _predict_batch(self, X):
+        return self.model.predict(apply_transforms(X, self.transforms))
+
+    def stats(self):
+        """
+        Returns request, batch size and latency statistics.  Latency percentiles and batch size averages
+        cover the most recent 10,000 requests and batches.
+
+        Returns
+        ----------
+        stats : dict
+            Summary statistics for the server.
+        """
+        latencies = np.array(self.latencies_) if len(self.latencies_) > 0 else np.zeros(1)
+        batch_sizes = np.array(self.batch_sizes_) if len(self.batch_sizes_) > 0 else np.zeros(1)
+        return {
+            'requests': self.n_requests,
+            'batches': self.n_batches,
+            'rows': self.n_rows,
+            'mean_batch_size': float(batch_sizes.mean()),
+            'max_batch_size': self.max_observed_batch,
+            'latency_mean': float(latencies.mean()),
+            'latency_p50': float(np.percentile(latencies, 50)),
+            'latency_p90': float(np.percentile(latencies, 90)),
+            'latency_p99': float(np.percentile(latencies, 99))
+        }
+
+    async def _handle_connection(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                method, path = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length > 0 else b''
+                status, response = await self._route(method, path, body)
+
+                payload = json.dumps(response).encode()
+                writer.write(('HTTP/1.1 {0}\r\nContent-Type: application/json\r\nContent-Length: {1}\r\n\r\n'
+                              .format(status, len(payload))).encode() + payload)
+                await writer.drain()
+
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # the server is stopping while a keep-alive client is still connected
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == 'POST' and path == '/predict':
+            try:
+                instances = json.loads(body.decode())['instances']
+                y_pred = await self.predict(instances)
+                return '200 OK', {'predictions': np.asarray(y_pred).tolist()}
+            except Exception as e:
+                return '400 Bad Request', {'error': str(e)}
+        elif method == 'GET' and path == '/stats':
+            return '200 OK', self.stats()
+        else:
+            return '404 Not Found', {'error': 'Unknown endpoint: ' + path}
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+        if self.unix_socket is not None:
+            self._server = await asyncio.start_unix_server(self._handle_connection, path=self.unix_socket)
+            address = self.unix_socket
+        else:
+            self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+            self.port = self._server.sockets[0].getsockname()[1]
+            address = '{0}:{1}'.format(self.host, self.port)
+
+        print_status_message('Prediction server listening on {0}.'.format(address), self.verbose, self.logger)
+        batcher = self._loop.create_task(self._batcher())
+        self._started.set()
+
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # close connections that are still open so that their handlers finish before the loop does
+            handlers = list(self._handlers)
+            for task in handlers:
+                task.cancel()
+            batcher.cancel()
+            await asyncio.gather(batcher, *handlers, return_exceptions=True)
+
+    def serve_forever(self):
+        """
+        Runs the server on the current thread until interrupted.
+        """
+        asyncio.run(self._serve())
+
+    def _run(self):
+        try:
+            self.serve_forever()
+        except BaseException as e:
+            self._error = e
+        finally:
+            # always wake up start, including when the server failed to start (e.g. the port is in use)
+            self._started.set()
+
+    def start(self):
+        """
+        Starts the server on a background thread and returns once it is accepting connections.  Raises the
+        exception that stopped the server from starting, if any.
+        """
+        self._error = None
+        self._started.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+
+    def stop(self):
+        """
+        Stops a server started with start.
+        """
+        if self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._executor.shutdown(wait=False)
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+def create_server(filename, transforms_filename=None, **kwargs):
+    """
+    Creates a prediction server for a pipeline saved with save_model.  The saved object may be either a
+    fitted model or a dictionary with "model" and "transforms" entries.
+
+    Parameters
+    ----------
+    filename : string
+        Location of the saved model or pipeline.
+
+    transforms_filename : string, optional, default None
+        Location of a separately saved list of fitted transforms.
+
+    kwargs : dict
+        Additional arguments passed to PredictionServer.
+
+    Returns
+    ----------
+    server : object
+        A PredictionServer that has not been started yet.
+    """
+    pipeline = load_model(filename)
+    if isinstance(pipeline, dict):
+        model, transforms = pipeline['model'], pipeline.get('transforms')
+    else:
+        model, transforms = pipeline, None
+
+    if transforms_filename is not None:
+        transforms = load_model(transforms_filename)
+
+    return PredictionServer(model, transforms, **kwargs)
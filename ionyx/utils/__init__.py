@@ -1,11 +1,49 @@
+from .artifact_store import ArtifactStore
+from .artifact_store import fingerprint
+from .artifact_store import params_key
 from .category_encoder import CategoryEncoder
 from .category_to_numeric import CategoryToNumeric
+from .checkpoint import Checkpoint
+from .checkpoint import open_checkpoint
+from .correlation import column_moments
+from .correlation import correlation_matrix
+from .correlation import top_correlations
+from .correlation import cluster_order
+from .data_profile import HyperLogLog
+from .data_profile import QuantileSketch
+from .data_profile import HeavyHitters
+from .data_profile import profile_data
+from .data_profile import suggest_dtypes
+from .fold_provider import FoldProvider
 from .logger import Logger
+from .logger import AsyncLogger
+from .metrics import Intermediates
+from .metrics import register_metric
+from .metrics import greater_is_better
+from .metrics import score_metrics
+from .metrics import average_scores
+from .metrics import MetricAccumulator
+from .metrics import create_accumulator
+from .profiler import Profiler
+from .profiler import profile_phase
+from .memory import MemoryTracker
 from .utils import print_status_message
 from .utils import load_csv_data
+from .utils import load_csv_data_chunked
+from .utils import optimize_dtypes
+from .utils import get_engine
+from .utils import load_sql_data
+from .utils import load_sql_data_chunked
 from .utils import load_model
 from .utils import save_model
 from .utils import fit_transforms
 from .utils import apply_transforms
 from .utils import score
 from .utils import predict_score
+from .utils import training_subset
+from .utils import score_training
+from .streaming import iter_array_chunks
+from .streaming import chunk_source
+from .streaming import split_chunks
+from .streaming import fit_transforms_incremental
+from .streaming import apply_transforms_chunked
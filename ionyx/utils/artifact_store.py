@@ -0,0 +1,328 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import tempfile
+import contextlib
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def fingerprint(*arrays):
+    """
+    Computes a content hash for one or more arrays (e.g. X and y).  Shape and dtype are included so that
+    arrays with identical bytes but different layouts hash differently.
+
+    Parameters
+    ----------
+    arrays : array-like
+        Arrays to hash.  None values are skipped.
+
+    Returns
+    ----------
+    digest : string
+        Hex-encoded SHA-256 hash.
+    """
+    digest = hashlib.sha256()
+    for a in arrays:
+        if a is None:
+            continue
+        a = np.ascontiguousarray(a)
+        digest.update(str((a.shape, a.dtype.str)).encode())
+        if a.dtype.hasobject:
+            digest.update(pickle.dumps(a.tolist(), pickle.HIGHEST_PROTOCOL))
+        else:
+            digest.update(memoryview(a).cast('B'))
+
+    return digest.hexdigest()
+
+
+def params_key(params):
+    """
+    Computes a stable hash for a dictionary of parameters.  Values that aren't JSON serializable are
+    hashed by their string representation.
+
+    Parameters
+    ----------
+    params : dict
+        Parameters to hash, e.g. the output of a model's get_params function.
+
+    Returns
+    ----------
+    digest : string
+        Hex-encoded SHA-256 hash.
+    """
+    return hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ArtifactStore(object):
+    """
+    Local content-addressed store for fitted models, transform chains, out-of-sample prediction matrices
+    and other experiment artifacts.  Each artifact is pickled and saved under the hash of its bytes, so
+    storing an identical artifact twice only keeps one copy.  A small metadata index maps each
+    (kind, data fingerprint, parameters) combination to the artifacts produced for it, which allows a
+    previously fitted pipeline to be found in constant time and reloaded instead of retrained.
+
+    Several processes can share a store.  Changes to the index are made while holding a lock file, starting
+    from the index on disk, so concurrent puts don't lose each other's records and records removed by gc in
+    another process aren't brought back.
+
+    Parameters
+    ----------
+    path : string
+        Directory that holds the store.  Created if it doesn't exist.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.objects_path = os.path.join(path, 'objects')
+        self.index_path = os.path.join(path, 'index.json')
+        self.lock_path = os.path.join(path, 'index.lock')
+        self.records_ = {}
+        self.lookup_ = {}
+        self.loaded_ = {}
+
+        if not os.path.exists(self.objects_path):
+            os.makedirs(self.objects_path)
+        self._read_index()
+
+    def put(self, obj, kind, data_fingerprint=None, params=None, score=None):
+        """
+        Adds an artifact to the store.
+
+        Parameters
+        ----------
+        obj : object
+            Artifact to store.
+
+        kind : string
+            Artifact type, e.g. 'model', 'transforms' or 'oof'.
+
+        data_fingerprint : string, optional, default None
+            Fingerprint of the data the artifact was produced from (see fingerprint).
+
+        params : dict, optional, default None
+            Parameters used to produce the artifact.
+
+        score : float, optional, default None
+            Score associated with the artifact.
+
+        Returns
+        ----------
+        key : string
+            Content hash that identifies the artifact.
+        """
+        data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+        key = hashlib.sha256(data).hexdigest()
+
+        record = {
+            'key': key,
+            'kind': kind,
+            'fingerprint': data_fingerprint,
+            'params': params_key(params) if params is not None else None,
+            'score': score,
+            'size': len(data),
+            'created': time.time()
+        }
+
+        # start from the index on disk so that changes made by other processes since it was last read are kept
+        with _file_lock(self.lock_path):
+            # written under the lock so that a concurrent gc can't delete an existing copy we're relying on
+            filename = self._object_file(key)
+            if not os.path.exists(filename):
+                _atomic_write(filename, data)
+            self._read_index()
+            self._add_record(record)
+            self._write_index()
+        self.loaded_[key] = obj
+
+        return key
+
+    def get(self, key):
+        """
+        Loads an artifact by its key.  Artifacts are cached in memory after the first load.
+
+        Parameters
+        ----------
+        key : string
+            Content hash that identifies the artifact.
+
+        Returns
+        ----------
+        obj : object
+            The stored artifact.
+        """
+        if key not in self.loaded_:
+            with open(self._object_file(key), 'rb') as f:
+                self.loaded_[key] = pickle.load(f)
+
+        return self.loaded_[key]
+
+    def find(self, kind, data_fingerprint=None, params=None):
+        """
+        Returns the key of the most recent artifact of the given kind produced from the given data and
+        parameters, or None if there isn't one.
+
+        Parameters
+        ----------
+        kind : string
+            Artifact type.
+
+        data_fingerprint : string, optional, default None
+            Fingerprint of the data the artifact was produced from.
+
+        params : dict, optional, default None
+            Parameters used to produce the artifact.
+
+        Returns
+        ----------
+        key : string
+            Content hash that identifies the artifact.
+        """
+        keys = self.lookup_.get(self._lookup_key(kind, data_fingerprint, params_key(params)
+                                                 if params is not None else None))
+        return keys[-1] if keys else None
+
+    def load(self, kind, data_fingerprint=None, params=None):
+        """
+        Convenience function that combines find and get.  Returns None if no matching artifact exists.
+        """
+        key = self.find(kind, data_fingerprint, params)
+        return self.get(key) if key is not None else None
+
+    def metadata(self, key):
+        """
+        Returns the most recent metadata record for an artifact.
+        """
+        records = [r for r in self.records_.values() if r['key'] == key]
+        return max(records, key=lambda r: r['created']) if records else None
+
+    def gc(self, keep=1, max_age=None):
+        """
+        Removes old versions of artifacts.  For each (kind, data fingerprint, parameters) combination only
+        the newest versions are kept, and object files that are no longer referenced are deleted.
+
+        Parameters
+        ----------
+        keep : int, optional, default 1
+            Number of versions to keep for each combination.
+
+        max_age : float, optional, default None
+            Also remove versions older than this many seconds (the newest version is always kept).
+
+        Returns
+        ----------
+        removed : array-like
+            List of keys that were removed.
+        """
+        with _file_lock(self.lock_path):
+            return self._gc(keep, max_age)
+
+    def _gc(self, keep, max_age):
+        self._read_index()
+        now = time.time()
+        kept = {}
+        for lookup, keys in self.lookup_.items():
+            for i, key in enumerate(reversed(keys)):
+                record = self.records_[lookup + ':' + key]
+                expired = max_age is not None and now - record['created'] > max_age
+                if i == 0 or (i < keep and not expired):
+                    kept[lookup + ':' + key] = record
+
+        live = set(r['key'] for r in kept.values())
+        removed = sorted(set(r['key'] for r in self.records_.values()) - live)
+        for key in removed:
+            self.loaded_.pop(key, None)
+            try:
+                os.remove(self._object_file(key))
+            except OSError:
+                pass
+
+        self.records_ = kept
+        self._rebuild_lookup()
+        self._write_index()
+
+        return removed
+
+    def _object_file(self, key):
+        return os.path.join(self.objects_path, key[:2], key)
+
+    @staticmethod
+    def _lookup_key(kind, data_fingerprint, params_hash):
+        return '%s:%s:%s' % (kind, data_fingerprint, params_hash)
+
+    def _add_record(self, record):
+        key = record['key']
+        lookup = self._lookup_key(record['kind'], record['fingerprint'], record['params'])
+        keys = self.lookup_.setdefault(lookup, [])
+        if key in keys:
+            keys.remove(key)
+        keys.append(key)
+        self.records_[lookup + ':' + key] = record
+
+    def _rebuild_lookup(self):
+        self.lookup_ = {}
+        for record in sorted(self.records_.values(), key=lambda r: r['created']):
+            self._add_record(record)
+
+    def _read_index(self):
+        # the index on disk is the source of truth, so it replaces the records held in memory
+        self.records_ = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                records = json.load(f)
+            for record in records:
+                record_id = self._lookup_key(record['kind'], record['fingerprint'], record['params'])
+                self.records_[record_id + ':' + record['key']] = record
+        self._rebuild_lookup()
+
+    def _write_index(self):
+        records = sorted(self.records_.values(), key=lambda r: r['created'])
+        _atomic_write(self.index_path, json.dumps(records, indent=1).encode())
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+@contextlib.contextmanager
+def _file_lock(filename):
+    """
+    Holds an exclusive lock on a lock file, created if it doesn't exist, so that processes sharing a
+    directory can take turns updating it.
+    """
+    fd = os.open(filename, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        yield
+    finally:
+        # closing the file releases the lock
+        os.close(fd)
+
+
+def _atomic_write(filename, data):
+    """
+    Writes bytes to a temporary file in the target directory and then renames it into place.
+    """
+    directory = os.path.dirname(filename)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, filename)
+    except BaseException:
+        os.remove(tmp)
+        raise
@@ -0,0 +1,207 @@
+import os
+import pickle
+import shutil
+import hashlib
+
+from .artifact_store import fingerprint, params_key, _atomic_write
+from .utils import print_status_message
+
+
+class _NullCheckpoint(object):
+    """
+    Stand-in used when checkpointing is disabled.  Nothing is ever complete and saves are ignored.
+    """
+    def exists(self, unit):
+        return False
+
+    def save(self, unit, values, model=None):
+        pass
+
+    def restore(self, slot, model):
+        return model
+
+
+_null_checkpoint = _NullCheckpoint()
+
+
+class Checkpoint(object):
+    """
+    Directory of checkpoints for the units of work (folds, models) of a long-running function, so that an
+    interrupted run can resume without redoing completed units.  Every file is written to a temporary name
+    and renamed into place, so a crash mid-write never leaves a partial checkpoint behind.
+
+    Each unit stores its results (e.g. out-of-sample predictions and scores) and, if it can be pickled, the
+    model fitted for it.  Models that are re-fitted across units without being reset (e.g. keras networks)
+    continue from their previous weights, so when a unit is skipped its fitted model is remembered and
+    restored before that model is fitted again.
+
+    Parameters
+    ----------
+    path : string
+        Directory to store the checkpoints in.  Created if it doesn't exist.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+    """
+    def __init__(self, path, verbose=False, logger=None):
+        self.path = path
+        self.verbose = verbose
+        self.logger = logger
+        self.pending_ = {}
+
+        if not os.path.exists(path):
+            os.makedirs(path)
+
+    def exists(self, unit):
+        """
+        Returns True if the unit has been completed.
+        """
+        return os.path.exists(self._file(unit))
+
+    def save(self, unit, values, model=None):
+        """
+        Marks a unit as completed and stores its results.
+
+        Parameters
+        ----------
+        unit : string
+            Name of the unit.
+
+        values : object
+            Results of the unit.
+
+        model : object, optional, default None
+            Model fitted for the unit.  Skipped with a message if it can't be pickled.
+        """
+        if model is not None:
+            try:
+                _atomic_write(self._file(unit, 'model'), pickle.dumps(model, pickle.HIGHEST_PROTOCOL))
+            except Exception as e:
+                print_status_message('Could not checkpoint model for {0}: {1}'.format(unit, e),
+                                     self.verbose, self.logger)
+
+        # the results file is written last since its presence marks the unit as complete
+        _atomic_write(self._file(unit), pickle.dumps(values, pickle.HIGHEST_PROTOCOL))
+
+    def load(self, unit, slot=None):
+        """
+        Loads the results of a completed unit.
+
+        Parameters
+        ----------
+        unit : string
+            Name of the unit.
+
+        slot : int or string, optional, default None
+            Identifies the model the unit fitted (e.g. its index in the ensemble).  If provided, the unit's
+            fitted model is restored the next time restore is called for the slot.
+
+        Returns
+        ----------
+        values : object
+            Results of the unit.
+        """
+        with open(self._file(unit), 'rb') as f:
+            values = pickle.load(f)
+
+        if slot is not None:
+            self.pending_[slot] = unit
+        print_status_message('Resumed {0} from checkpoint.'.format(unit), self.verbose, self.logger)
+
+        return values
+
+    def restore(self, slot, model):
+        """
+        Returns the model fitted by the last unit loaded for the slot, or the given model if no unit was
+        loaded since the last call (or the fitted model couldn't be stored).
+        """
+        unit = self.pending_.pop(slot, None)
+        if unit is None or not os.path.exists(self._file(unit, 'model')):
+            return model
+
+        with open(self._file(unit, 'model'), 'rb') as f:
+            return pickle.load(f)
+
+    def clear(self):
+        """
+        Deletes every checkpoint in the directory.
+        """
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path)
+        self.pending_ = {}
+
+    def _file(self, unit, kind='values'):
+        return os.path.join(self.path, '{0}.{1}.pkl'.format(unit, kind))
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+def _describe(obj):
+    """
+    Summarizes a model or transform by its class and parameters.
+    """
+    if obj is None:
+        return None
+    description = {'class': type(obj).__module__ + '.' + type(obj).__name__}
+    if hasattr(obj, 'get_params'):
+        description['params'] = obj.get_params(deep=False)
+    elif hasattr(obj, 'get_config'):
+        description['config'] = obj.get_config()
+
+    return description
+
+
+def open_checkpoint(checkpoint_dir, task, arrays, models, transforms, verbose=False, logger=None, **params):
+    """
+    Opens the checkpoint for a call to a long-running function.  The checkpoint lives in a sub-directory
+    named by a hash of the function, its data, models, transforms and other parameters, so a restarted call
+    with the same inputs finds the units completed before it stopped, while a call with different inputs
+    starts from scratch.
+
+    Parameters
+    ----------
+    checkpoint_dir : string
+        Directory that holds checkpoints.  If None, checkpointing is disabled and a stand-in that never
+        finds completed units is returned.
+
+    task : string
+        Name of the function being checkpointed.
+
+    arrays : array-like
+        List of the data arrays passed to the function (e.g. X, y and X_test).
+
+    models : array-like
+        List of model definitions.
+
+    transforms : array-like
+        List of transforms.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    params : dict
+        Other parameters that affect the results, e.g. the metric and number of folds.
+
+    Returns
+    ----------
+    checkpoint : object
+        Instance of Checkpoint.
+    """
+    if checkpoint_dir is None:
+        return _null_checkpoint
+
+    params = dict(params, task=task, models=[_describe(m) for m in models],
+                  transforms=[_describe(t) for t in transforms])
+    key = hashlib.sha256((fingerprint(*arrays) + params_key(params)).encode()).hexdigest()
+
+    return Checkpoint(os.path.join(checkpoint_dir, '{0}-{1}'.format(task, key[:16])), verbose, logger)
@@ -0,0 +1,223 @@
+import heapq
+import numpy as np
+
+
+def _iter_chunks(X, chunk_size):
+    """
+    Yields row chunks of X as float64 arrays.  X may be an array or a chunk source (a function that returns
+    an iterator, or a list) yielding either arrays or (X, y) tuples.
+    """
+    if callable(X) or isinstance(X, list):
+        for chunk in (X() if callable(X) else X):
+            if isinstance(chunk, tuple):
+                chunk = chunk[0]
+            yield np.asarray(chunk, dtype=np.float64)
+    else:
+        for start in range(0, X.shape[0], chunk_size):
+            yield np.asarray(X[start:start + chunk_size], dtype=np.float64)
+
+
+def column_moments(X, chunk_size=100000):
+    """
+    Computes the mean and standard deviation of every column in a single pass over row chunks, merging the
+    per-chunk moments so that precision doesn't degrade for columns with large means.  Missing values are
+    ignored.
+
+    Parameters
+    ----------
+    X : array-like or callable
+        Input samples, or a chunk source (see correlation_matrix).
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk when X is an array.
+
+    Returns
+    ----------
+    n : array-like
+        Number of non-missing values in each column.
+
+    mean : array-like
+        Mean of each column.
+
+    std : array-like
+        Population standard deviation of each column.
+    """
+    n = mean = m2 = None
+    for chunk in _iter_chunks(X, chunk_size):
+        valid = ~np.isnan(chunk)
+        n_chunk = valid.sum(axis=0).astype(np.float64)
+        filled = np.where(valid, chunk, 0.)
+        mean_chunk = filled.sum(axis=0) / np.maximum(n_chunk, 1)
+        m2_chunk = (np.where(valid, chunk - mean_chunk, 0.) ** 2).sum(axis=0)
+
+        if n is None:
+            n, mean, m2 = n_chunk, mean_chunk, m2_chunk
+        else:
+            total = n + n_chunk
+            delta = mean_chunk - mean
+            weight = np.where(total > 0, n_chunk / np.maximum(total, 1), 0.)
+            mean = mean + delta * weight
+            m2 = m2 + m2_chunk + delta ** 2 * n * weight
+            n = total
+
+    std = np.sqrt(m2 / np.maximum(n, 1))
+
+    return n, mean, std
+
+
+def _scale(n, std):
+    # dividing each standardized column by sqrt(n) turns the product of two columns into their correlation
+    return np.where(std > 0, 1. / (np.where(std > 0, std, 1.) * np.sqrt(np.maximum(n, 1))), 0.)
+
+
+def _standardize(chunk, mean, scale):
+    # missing values become 0 after standardizing, i.e. they don't contribute to any correlation
+    z = (chunk - mean) * scale
+    z[np.isnan(z)] = 0.
+
+    return z.astype(np.float32)
+
+
+def correlation_matrix(X, block_size=1024, chunk_size=100000):
+    """
+    Computes the Pearson correlation matrix of the columns of X.  Each row chunk is standardized and
+    converted to float32, then the upper triangle of the matrix is accumulated one column block pair at a
+    time with matrix products, so temporary memory is bounded by the chunk and block sizes and the result is
+    a float32 matrix (half the size of data.corr()).  Two passes are made over the data: one for the column
+    moments and one for the products.
+
+    Missing values are treated as equal to the column mean, so they don't contribute to any correlation.
+    Columns with zero variance have NaN correlations.
+
+    Parameters
+    ----------
+    X : array-like or callable
+        Input samples.  Can also be a chunk source, i.e. a function with no arguments that returns an iterator
+        of row chunks (or (X, y) chunks, e.g. from chunk_source), or a list of chunks.  A chunk source is
+        iterated once per pass.
+
+    block_size : int, optional, default 1024
+        Number of columns per block.
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk when X is an array.
+
+    Returns
+    ----------
+    corr : array-like
+        Correlation matrix.
+    """
+    n, mean, std = column_moments(X, chunk_size)
+    scale = _scale(n, std)
+    constant = std == 0
+    n_features = mean.shape[0]
+    blocks = [slice(start, min(start + block_size, n_features)) for start in range(0, n_features, block_size)]
+
+    corr = np.zeros((n_features, n_features), dtype=np.float32)
+    for chunk in _iter_chunks(X, chunk_size):
+        z = _standardize(chunk, mean, scale)
+        for i, a in enumerate(blocks):
+            for b in blocks[i:]:
+                corr[a, b] += np.dot(z[:, a].T, z[:, b])
+
+    upper = np.triu_indices(n_features, 1)
+    corr.T[upper] = corr[upper]
+    corr[:, constant] = np.nan
+    corr[constant, :] = np.nan
+    np.clip(corr, -1., 1., out=corr)
+
+    return corr
+
+
+def top_correlations(X, k=20, absolute=True, block_size=1024, chunk_size=100000):
+    """
+    Finds the k most correlated pairs of columns without holding the full correlation matrix in memory.
+    The matrix is computed one band of block_size rows at a time, keeping only the best pairs seen so far,
+    so memory is bounded by block_size times the number of columns.  Each band requires one pass over the
+    data, so for chunk sources that are expensive to read prefer a large block size.
+
+    Parameters
+    ----------
+    X : array-like or callable
+        Input samples or a chunk source (see correlation_matrix).
+
+    k : int, optional, default 20
+        Number of pairs to return.
+
+    absolute : boolean, optional, default True
+        Rank pairs by absolute correlation, so strong negative correlations are included.
+
+    block_size : int, optional, default 1024
+        Number of columns per band.
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk when X is an array.
+
+    Returns
+    ----------
+    pairs : array-like
+        List of (column index, column index, correlation) tuples, sorted from most to least correlated.
+    """
+    n, mean, std = column_moments(X, chunk_size)
+    scale = _scale(n, std)
+    n_features = mean.shape[0]
+    best = []
+
+    for start in range(0, n_features - 1, block_size):
+        end = min(start + block_size, n_features)
+        band = np.zeros((end - start, n_features - start), dtype=np.float32)
+        for chunk in _iter_chunks(X, chunk_size):
+            z = _standardize(chunk[:, start:], mean[start:], scale[start:])
+            band += np.dot(z[:, :end - start].T, z)
+        np.clip(band, -1., 1., out=band)
+
+        # only pairs above the diagonal are candidates
+        band[np.tril_indices(end - start, 0, n_features - start)] = np.nan
+        ranking = np.abs(band) if absolute else band.copy()
+        ranking[np.isnan(ranking)] = -np.inf
+        flat = ranking.ravel()
+        if flat.shape[0] > k:
+            candidates = np.argpartition(-flat, k)[:k]
+        else:
+            candidates = np.arange(flat.shape[0])
+
+        for index in candidates:
+            if not np.isfinite(flat[index]):
+                continue
+            i, j = np.unravel_index(index, band.shape)
+            item = (float(flat[index]), start + int(i), start + int(j), float(band[i, j]))
+            if len(best) < k:
+                heapq.heappush(best, item)
+            elif item[0] > best[0][0]:
+                heapq.heapreplace(best, item)
+
+    return [(i, j, c) for _, i, j, c in sorted(best, reverse=True)]
+
+
+def cluster_order(corr):
+    """
+    Orders the columns of a correlation matrix so that strongly correlated columns are adjacent, using
+    average-linkage hierarchical clustering on the distance 1 - |correlation|.
+
+    Parameters
+    ----------
+    corr : array-like
+        Correlation matrix.
+
+    Returns
+    ----------
+    order : array-like
+        Column indices in clustered order.
+    """
+    from scipy.cluster.hierarchy import linkage, leaves_list
+    from scipy.spatial.distance import squareform
+
+    corr = np.nan_to_num(np.asarray(corr, dtype=np.float64))
+    if corr.shape[0] < 3:
+        return np.arange(corr.shape[0])
+
+    distance = 1. - np.abs(corr)
+    np.fill_diagonal(distance, 0.)
+    distance = np.clip((distance + distance.T) / 2, 0., None)
+
+    return leaves_list(linkage(squareform(distance, checks=False), method='average'))
@@ -0,0 +1,512 @@
+import time
+import numpy as np
+import pandas as pd
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import print_status_message
+
+PROFILE_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+class HyperLogLog(object):
+    """
+    Mergeable sketch that estimates the number of distinct values in a stream using a fixed amount of memory
+    (2 ** precision bytes).  The relative error is about 1.04 / sqrt(2 ** precision), i.e. 1.6% for the
+    default precision.
+
+    Parameters
+    ----------
+    precision : int, optional, default 12
+        Number of bits of each hash used to select a register.
+    """
+    def __init__(self, precision=12):
+        self.precision = precision
+        self.registers_ = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        """
+        Adds 64-bit hashes of values (e.g. from pd.util.hash_array) to the sketch.
+        """
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes & np.uint64((1 << self.precision) - 1)).astype(np.intp)
+        # the rank is the position of the leftmost 1-bit in the remaining bits, which frexp gives exactly
+        # as long as they fit in a double's mantissa
+        remaining = (hashes >> np.uint64(self.precision)).astype(np.float64)
+        rank = (64 - self.precision) - np.frexp(remaining)[1] + 1
+        np.maximum.at(self.registers_, index, rank.astype(np.uint8))
+
+        return self
+
+    def merge(self, other):
+        """
+        Combines another sketch with the same precision into this one.
+        """
+        np.maximum(self.registers_, other.registers_, out=self.registers_)
+
+        return self
+
+    def estimate(self):
+        """
+        Returns the estimated number of distinct values.
+        """
+        m = float(self.registers_.shape[0])
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(2. ** -self.registers_.astype(np.float64))
+
+        # linear counting is more accurate while many registers are still empty
+        zeros = np.count_nonzero(self.registers_ == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)
+
+        return int(round(estimate))
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+class QuantileSketch(object):
+    """
+    Mergeable sketch that estimates quantiles of a stream of numbers (a KLL sketch).  Values are kept in a
+    hierarchy of compactors where an item at level h stands for 2 ** h original values; when a level fills
+    up it is sorted and every other item is promoted to the next level.  Memory is about 3 * k values and
+    the rank error is roughly 1 / k.
+
+    Parameters
+    ----------
+    k : int, optional, default 200
+        Capacity of the top level.  Higher values give more accurate quantiles.
+
+    random_state : int, optional, default 1337
+        Seed for the random number generator used to choose which items are promoted.
+    """
+    def __init__(self, k=200, random_state=1337):
+        self.k = k
+        self.random_state = random_state
+        self.levels_ = []
+        self.rng_ = np.random.RandomState(random_state)
+
+    def update(self, values):
+        """
+        Adds values to the sketch.  Missing values are ignored.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self._insert(0, values[~np.isnan(values)])
+        self._compress()
+
+        return self
+
+    def merge(self, other):
+        """
+        Combines another sketch into this one.
+        """
+        for level, items in enumerate(other.levels_):
+            self._insert(level, items)
+        self._compress()
+
+        return self
+
+    def quantile(self, q):
+        """
+        Returns the estimated value at each of the quantiles in q, or NaN if the sketch is empty.
+        """
+        q = np.atleast_1d(np.asarray(q, dtype=np.float64))
+        if sum(items.shape[0] for items in self.levels_) == 0:
+            return np.full(q.shape[0], np.nan)
+
+        values = np.concatenate(self.levels_)
+        weights = np.concatenate([np.full(items.shape[0], 2. ** level) for level, items in enumerate(self.levels_)])
+        order = np.argsort(values, kind='mergesort')
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+        index = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+
+        return values[np.minimum(index, values.shape[0] - 1)]
+
+    def _capacity(self, level):
+        depth = len(self.levels_) - level - 1
+        return max(int(np.ceil(self.k * (2. / 3) ** depth)), 2)
+
+    def _insert(self, level, values):
+        while len(self.levels_) <= level:
+            self.levels_.append(np.empty(0))
+        self.levels_[level] = np.concatenate([self.levels_[level], values])
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels_):
+            items = self.levels_[level]
+            if items.shape[0] > self._capacity(level):
+                items = np.sort(items)
+                # with an odd number of items one stays behind, so the total weight is preserved exactly
+                keep = items.shape[0] % 2
+                self.levels_[level] = items[:keep]
+                self._insert(level + 1, items[keep + self.rng_.randint(2)::2])
+            level += 1
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+class HeavyHitters(object):
+    """
+    Mergeable sketch that tracks the most frequent values in a stream (a Misra-Gries summary).  At most
+    capacity counters are kept; when there are more, the smallest counts are subtracted from all of them, so
+    reported counts are lower bounds that are off by at most n / (capacity + 1).
+
+    Parameters
+    ----------
+    k : int, optional, default 10
+        Number of values to report.
+
+    capacity : int, optional, default None
+        Number of counters to keep.  Defaults to max(1000, 100 * k).
+    """
+    def __init__(self, k=10, capacity=None):
+        self.k = k
+        self.capacity = capacity if capacity is not None else max(1000, 100 * k)
+        self.values_ = None
+        self.counts_ = None
+
+    def update(self, values):
+        """
+        Adds values to the sketch.  Missing values are ignored.
+        """
+        codes, uniques = pd.factorize(values)
+        self.update_counts(uniques, np.bincount(codes[codes >= 0], minlength=len(uniques)))
+
+        return self
+
+    def update_counts(self, values, counts):
+        """
+        Adds distinct values and the number of times each one occurred to the sketch.
+        """
+        values, counts = self._prune(np.asarray(values), np.asarray(counts, dtype=np.float64))
+        if self.values_ is not None:
+            if values.dtype != self.values_.dtype:
+                values = values.astype(object)
+                self.values_ = self.values_.astype(object)
+            codes, values = pd.factorize(np.concatenate([self.values_, values]))
+            counts = np.bincount(codes, weights=np.concatenate([self.counts_, counts]))
+            values, counts = self._prune(np.asarray(values), counts)
+        self.values_, self.counts_ = values, counts
+
+        return self
+
+    def merge(self, other):
+        """
+        Combines another sketch into this one.
+        """
+        if other.values_ is not None:
+            self.update_counts(other.values_, other.counts_)
+
+        return self
+
+    def top(self):
+        """
+        Returns a list of up to k (value, count) tuples, most frequent first.
+        """
+        if self.values_ is None:
+            return []
+        order = np.argsort(-self.counts_, kind='mergesort')[:self.k]
+
+        return [(self.values_[i], int(self.counts_[i])) for i in order]
+
+    def _prune(self, values, counts):
+        if counts.shape[0] <= self.capacity:
+            return values, counts
+        # subtract the (capacity + 1)-th largest count from every counter and drop the ones that reach zero
+        threshold = np.partition(counts, counts.shape[0] - self.capacity - 1)[counts.shape[0] - self.capacity - 1]
+        keep = counts > threshold
+
+        return values[keep], counts[keep] - threshold
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+class _ColumnSketch(object):
+    """
+    Summary of one column that can be computed from a chunk and merged with the summaries of other chunks.
+    """
+    def __init__(self, values, top_k, hll_precision, sketch_size, random_state):
+        self.dtype = str(values.dtype)
+        self.rows = len(values)
+        self.count = 0
+        self.min = self.max = None
+        self.mean = self.m2 = 0.
+        self.integral = True
+        self.float32_exact = True
+        self.hll = HyperLogLog(hll_precision)
+        self.quantiles = None
+        self.top = HeavyHitters(top_k)
+
+        if pd.api.types.is_bool_dtype(values):
+            self.kind = 'bool'
+        elif pd.api.types.is_numeric_dtype(values):
+            self.kind = 'numeric'
+        elif pd.api.types.is_datetime64_any_dtype(values):
+            self.kind = 'datetime'
+        else:
+            self.kind = 'other'
+
+        if self.kind == 'numeric':
+            v = values.to_numpy(dtype=np.float64, na_value=np.nan)
+            v = v[~np.isnan(v)]
+            self.count = v.shape[0]
+            if self.count > 0:
+                self.min, self.max = v.min(), v.max()
+                self.mean = v.mean()
+                self.m2 = ((v - self.mean) ** 2).sum()
+                self.integral = bool(np.all(v == np.round(v)))
+                if values.dtype == np.float64:
+                    self.float32_exact = np.array_equal(v.astype(np.float32).astype(np.float64), v)
+            self.quantiles = QuantileSketch(sketch_size, random_state).update(v)
+            values = v
+        elif self.kind == 'datetime':
+            self.count = int(values.count())
+            if self.count > 0:
+                self.min, self.max = values.min(), values.max()
+        else:
+            self.count = int(values.count())
+
+        # values are hashed once to find the distinct ones, which are then all the other sketches need
+        codes, uniques = pd.factorize(values)
+        if self.kind == 'datetime':
+            hashes = pd.util.hash_array(np.asarray(uniques, dtype='datetime64[ns]').view(np.int64))
+        else:
+            uniques = np.asarray(uniques, dtype=np.float64 if self.kind == 'numeric' else object)
+            hashes = pd.util.hash_array(uniques)
+        self.hll.update(hashes)
+        self.top.update_counts(uniques, np.bincount(codes[codes >= 0], minlength=len(uniques)))
+
+    def merge(self, other):
+        if self.kind != other.kind:
+            # e.g. a column parsed as numbers in one chunk and strings in another
+            self.kind = 'other'
+            self.quantiles = None
+            self.min = self.max = None
+
+        if self.kind in ('numeric', 'datetime') and other.count > 0:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+        if self.kind == 'numeric':
+            total = self.count + other.count
+            if total > 0:
+                delta = other.mean - self.mean
+                self.mean += delta * other.count / total
+                self.m2 += other.m2 + delta ** 2 * self.count * other.count / total
+            self.integral = self.integral and other.integral
+            self.float32_exact = self.float32_exact and other.float32_exact
+            self.quantiles.merge(other.quantiles)
+
+        self.rows += other.rows
+        self.count += other.count
+        self.hll.merge(other.hll)
+        self.top.merge(other.top)
+
+        return self
+
+
+def _iter_frames(data, chunk_size):
+    """
+    Yields data frame chunks from a data frame or a chunk source.
+    """
+    if isinstance(data, pd.DataFrame):
+        for start in range(0, data.shape[0], chunk_size):
+            yield data.iloc[start:start + chunk_size]
+    else:
+        for chunk in (data() if callable(data) else data):
+            if isinstance(chunk, tuple):
+                chunk = chunk[0]
+            yield chunk if isinstance(chunk, pd.DataFrame) else pd.DataFrame(chunk)
+
+
+def _map_ordered(func, items, n_jobs):
+    """
+    Applies a function to each item on a pool of threads and yields the results in order, keeping only a
+    few items in flight so that a large chunk source isn't read into memory all at once.
+    """
+    if n_jobs == 1:
+        for item in items:
+            yield func(item)
+        return
+
+    with ThreadPoolExecutor(max_workers=n_jobs) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= 2 * n_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def profile_data(data, chunk_size=100000, quantiles=PROFILE_QUANTILES, top_k=10, n_jobs=1, category_threshold=0.5,
+                 one_hot_threshold=10, hll_precision=12, sketch_size=200, verbose=False, logger=None):
+    """
+    Computes summary statistics for every column of a data set in a single pass over row chunks: missing
+    value counts, min/max/mean/std, approximate quantiles, approximate distinct counts and the most frequent
+    values.  Each chunk is summarized with mergeable sketches (KLL quantiles, HyperLogLog distinct counts and
+    Misra-Gries frequent values), so chunks can be processed in parallel and memory doesn't grow with the
+    number of rows.  The report also suggests a compact dtype and an encoding for each column, and
+    suggest_dtypes turns it into a dtype argument for the csv loaders.
+
+    Parameters
+    ----------
+    data : array-like or callable
+        Pandas data frame, or a chunk source, i.e. a function with no arguments that returns an iterator of
+        data frames or (X, y) tuples (e.g. a lambda that calls load_csv_data_chunked with optimize=False), or
+        a list of chunks.
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk when data is a data frame.
+
+    quantiles : array-like, optional, default [0.05, 0.25, 0.5, 0.75, 0.95]
+        Quantiles to report for numeric columns.
+
+    top_k : int, optional, default 10
+        Number of most frequent values to report for each column.
+
+    n_jobs : int, optional, default 1
+        Number of threads used to summarize chunks.
+
+    category_threshold : float, optional, default 0.5
+        Maximum ratio of distinct values to rows for a string column to be suggested as a categorical.
+
+    one_hot_threshold : int, optional, default 10
+        Maximum number of distinct values for a string column to be suggested for one-hot encoding.
+
+    hll_precision : int, optional, default 12
+        Precision of the distinct count sketches (see HyperLogLog).
+
+    sketch_size : int, optional, default 200
+        Size of the quantile sketches (see QuantileSketch).
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    report : array-like
+        Pandas data frame with one row per column.  Distinct counts, quantiles and top value counts are
+        approximate once a column has more values than the sketches hold exactly.  The suggested_encoding
+        column is 'none' for numeric, boolean and date columns, and for other columns one of 'one_hot',
+        'label' (CategoryEncoder), 'target' (CategoryToNumeric) or 'drop' (identifier-like columns).
+    """
+    print_status_message('Profiling data...', verbose, logger)
+    t0 = time.time()
+
+    def summarize(item):
+        # each chunk's quantile sketches get their own seed so that their compaction errors don't line up
+        i, frame = item
+        return [(column, _ColumnSketch(frame[column], top_k, hll_precision, sketch_size, [1337, i]))
+                for column in frame.columns]
+
+    sketches = None
+    for summary in _map_ordered(summarize, enumerate(_iter_frames(data, chunk_size)), n_jobs):
+        if sketches is None:
+            sketches = summary
+        else:
+            for (_, sketch), (_, other) in zip(sketches, summary):
+                sketch.merge(other)
+
+    if sketches is None:
+        raise Exception('No data to profile.')
+
+    rows = []
+    for column, sketch in sketches:
+        distinct = min(sketch.hll.estimate(), sketch.count)
+        row = {'dtype': sketch.dtype, 'kind': sketch.kind, 'count': sketch.count,
+               'nulls': sketch.rows - sketch.count, 'null_fraction': (sketch.rows - sketch.count) / float(sketch.rows)
+               if sketch.rows > 0 else 0., 'distinct': distinct, 'min': sketch.min, 'max': sketch.max,
+               'mean': sketch.mean if sketch.kind == 'numeric' and sketch.count > 0 else np.nan,
+               'std': np.sqrt(sketch.m2 / sketch.count) if sketch.kind == 'numeric' and sketch.count > 0 else np.nan}
+
+        values = sketch.quantiles.quantile(quantiles) if sketch.quantiles is not None \
+            else np.full(len(quantiles), np.nan)
+        for q, value in zip(quantiles, values):
+            row['q{0:g}'.format(100 * q)] = value
+
+        row['top_values'] = sketch.top.top()
+        row['suggested_dtype'] = _suggest_dtype(sketch, distinct, category_threshold)
+        row['suggested_encoding'] = _suggest_encoding(sketch, distinct, category_threshold, one_hot_threshold)
+        rows.append(row)
+
+    report = pd.DataFrame(rows, index=[column for column, _ in sketches])
+
+    t1 = time.time()
+    print_status_message('Profiled {0} rows and {1} columns in {2:3f} s.'
+                         .format(sketches[0][1].rows, len(sketches), t1 - t0), verbose, logger)
+
+    return report
+
+
+def _suggest_dtype(sketch, distinct, category_threshold):
+    if sketch.kind == 'bool':
+        return 'bool'
+    elif sketch.kind == 'datetime':
+        return 'datetime64[ns]'
+    elif sketch.kind == 'numeric':
+        if sketch.count == 0:
+            return 'float32'
+        if sketch.integral and sketch.count == sketch.rows:
+            for dtype in [np.int8, np.int16, np.int32, np.int64]:
+                info = np.iinfo(dtype)
+                if info.min <= sketch.min and sketch.max <= info.max:
+                    return np.dtype(dtype).name
+        if sketch.integral:
+            # integers with missing values need a float type, which holds them exactly up to 2 ** 24 in float32
+            return 'float32' if max(abs(sketch.min), abs(sketch.max)) <= 2 ** 24 else 'float64'
+        return 'float32' if sketch.float32_exact else 'float64'
+    else:
+        return 'category' if distinct <= category_threshold * sketch.count else 'object'
+
+
+def _suggest_encoding(sketch, distinct, category_threshold, one_hot_threshold):
+    if sketch.kind != 'other':
+        return 'none'
+    elif sketch.count > 0 and distinct >= 0.95 * sketch.count:
+        # (nearly) every value is unique, e.g. an identifier, so there's nothing to learn from it
+        return 'drop'
+    elif distinct <= one_hot_threshold:
+        return 'one_hot'
+    elif distinct <= category_threshold * sketch.count:
+        return 'label'
+    else:
+        return 'target'
+
+
+def suggest_dtypes(report, exclude=None):
+    """
+    Converts the suggested dtypes in a profiling report into a dtype argument for load_csv_data or
+    load_csv_data_chunked.  Date columns are left out since they're parsed separately.
+
+    Parameters
+    ----------
+    report : array-like
+        Report returned by profile_data.
+
+    exclude : array-like, optional, default None
+        List of column names to leave out.
+
+    Returns
+    ----------
+    dtype : dict
+        Dictionary mapping column names to dtype names.
+    """
+    return {column: dtype for column, dtype in report['suggested_dtype'].items()
+            if dtype != 'datetime64[ns]' and (exclude is None or column not in exclude)}
@@ -0,0 +1,132 @@
+import numpy as np
+
+
+class FoldProvider(object):
+    """
+    Materializes cross-validation folds without allocating a new training set on every iteration.  Training
+    sets are gathered from the input samples into a single scratch buffer that is re-used across folds, and
+    evaluation sets are gathered into their own (small) arrays.  No permuted copy of the input is kept, so
+    peak memory is the input plus one training and one evaluation set, i.e. about twice the size of the
+    input regardless of the number of folds.  That is the same peak as indexing each fold directly; the
+    saving is in allocations, since the largest array is only allocated once.
+
+    Evaluation sets are copies rather than views.  Views would need the input permuted into fold order,
+    which means holding a second full copy of it next to the scratch buffer and a peak near three times the
+    size of the input.
+
+    Note that the arrays returned by train_fold share the scratch buffer, so they are only valid until the
+    next call to train_fold.  Anything that needs to outlive the fold (e.g. a model that keeps a reference to
+    its training data) must copy it first.
+
+    Parameters
+    ----------
+    X : array-like
+        Training input samples.
+
+    y : array-like
+        Target values.
+
+    folds : array-like
+        List of (train_index, eval_index) tuples, such as the output of KFold.  The evaluation indices
+        must partition the data set.
+    """
+    def __init__(self, X, y, folds):
+        self.folds = folds
+        self.n_folds = len(folds)
+        self.n_records = y.shape[0]
+
+        self.index_ = np.concatenate([eval_index for _, eval_index in folds])
+        if not np.array_equal(np.sort(self.index_), np.arange(self.n_records)):
+            raise Exception('Evaluation folds must partition the data set.')
+
+        sizes = np.array([eval_index.shape[0] for _, eval_index in folds])
+        self.bounds_ = np.concatenate([[0], np.cumsum(sizes)])
+        self.X_ = np.asarray(X)
+        # targets are small, so a copy in fold order is kept for aligning out-of-sample predictions
+        self.y_ = np.take(y, self.index_, axis=0)
+
+        # size the scratch buffer for the largest training set (i.e. the one missing the smallest fold)
+        max_train = self.n_records - sizes.min()
+        self.X_buffer_ = np.empty((max_train,) + self.X_.shape[1:], dtype=self.X_.dtype)
+        self.y_buffer_ = np.empty((max_train,) + self.y_.shape[1:], dtype=self.y_.dtype)
+
+    def eval_index(self, i):
+        """
+        Returns the original row indices of the evaluation set for the given fold.
+
+        Parameters
+        ----------
+        i : int
+            Fold number.
+        """
+        return self.index_[self.bounds_[i]:self.bounds_[i + 1]]
+
+    def train_index(self, i):
+        """
+        Returns the original row indices of the training set for the given fold, ordered the same way as
+        the rows returned by train_fold.
+
+        Parameters
+        ----------
+        i : int
+            Fold number.
+        """
+        start, end = self.bounds_[i], self.bounds_[i + 1]
+        return np.concatenate([self.index_[:start], self.index_[end:]])
+
+    def eval_fold(self, i):
+        """
+        Returns the evaluation samples and targets for the given fold.  The samples are copied from the
+        input, and the targets are a view of the targets in fold order.
+
+        Parameters
+        ----------
+        i : int
+            Fold number.
+
+        Returns
+        ----------
+        X_eval : array-like
+            Evaluation input samples.
+
+        y_eval : array-like
+            Evaluation target values.
+        """
+        start, end = self.bounds_[i], self.bounds_[i + 1]
+        return np.take(self.X_, self.index_[start:end], axis=0), self.y_[start:end]
+
+    def train_fold(self, i):
+        """
+        Assembles the training samples and targets for the given fold into the scratch buffer.  The returned
+        arrays are overwritten by the next call to this method.
+
+        Parameters
+        ----------
+        i : int
+            Fold number.
+
+        Returns
+        ----------
+        X_train : array-like
+            Training input samples.
+
+        y_train : array-like
+            Training target values.
+        """
+        start, end = self.bounds_[i], self.bounds_[i + 1]
+        n_train = self.n_records - (end - start)
+
+        # the indices were validated up front, and with mode='raise' numpy gathers into a temporary array the
+        # size of the training set before copying it into the buffer
+        np.take(self.X_, self.index_[:start], axis=0, out=self.X_buffer_[:start], mode='clip')
+        np.take(self.X_, self.index_[end:], axis=0, out=self.X_buffer_[start:n_train], mode='clip')
+        self.y_buffer_[:start] = self.y_[:start]
+        self.y_buffer_[start:n_train] = self.y_[end:]
+
+        return self.X_buffer_[:n_train], self.y_buffer_[:n_train]
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
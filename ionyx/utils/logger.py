@@ -1,3 +1,11 @@
+import os
+import json
+import time
+import queue
+import atexit
+import threading
+
+
 class Logger(object):
     """
     Wrapper class that permits writing to a log file as well as printing to the console at the same time using
@@ -40,3 +48,182 @@ class Logger(object):
         Overrides the method that prints a string representation of the object.
         """
         return '%s' % self.__class__.__name__
+
+
+class AsyncLogger(object):
+    """
+    Logger that writes structured JSON-lines records from a background thread.  Records are placed on a
+    bounded queue and written in batches with a single system call per batch, so logging from tight loops
+    costs little more than a queue insertion.  When the queue is full, callers block until the writer catches
+    up rather than dropping records (or raise an exception if the writer thread has died).
+
+    The file is opened in append mode and each batch is written with one os.write call, so several processes
+    can log to the same file without interleaving partial lines.  A logger inherited by a forked child process
+    writes each record synchronously instead, since the writer thread doesn't survive the fork and workers
+    often exit with os._exit, which skips the flush at exit and would lose anything still queued.  Records are
+    flushed when the logger is closed, and close is registered to run at interpreter exit.
+
+    Each record contains the time, process id, level and message, plus the optional phase, fold and duration
+    fields and any additional keyword fields passed to log.
+
+    Parameters
+    ----------
+    path : string
+        The location of the log file to open or create.
+
+    mode : {'append', 'replace'}, optional, default 'append'
+        Specifies whether to append or replace if file already exists.
+
+    max_queue_size : int, optional, default 10000
+        Maximum number of records waiting to be written.
+
+    batch_size : int, optional, default 1000
+        Maximum number of records written per batch.
+
+    flush_interval : float, optional, default 0.5
+        Maximum time in seconds the writer waits for more records before writing a partial batch.
+    """
+    def __init__(self, path, mode='append', max_queue_size=10000, batch_size=1000, flush_interval=0.5):
+        if mode == 'append':
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        elif mode == 'replace':
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+        else:
+            raise Exception('File write mode not valid.')
+
+        self.path = path
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fd_ = os.open(path, flags, 0o644)
+        self.closed_ = False
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        self.pid_ = os.getpid()
+        self.queue_ = queue.Queue(self.max_queue_size)
+        self.thread_ = threading.Thread(target=self._run, name='ionyx-logger')
+        self.thread_.daemon = True
+        self.thread_.start()
+
+    def _run(self):
+        while True:
+            try:
+                records = [self.queue_.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                continue
+
+            while len(records) < self.batch_size:
+                try:
+                    records.append(self.queue_.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = records[-1] is None
+            try:
+                self._write([r for r in records if r is not None])
+            finally:
+                # mark the batch done even if the write failed so that flush doesn't wait forever
+                for _ in records:
+                    self.queue_.task_done()
+
+            if stop:
+                break
+
+    def _write(self, records):
+        if len(records) == 0:
+            return
+
+        data = ''.join(json.dumps(r, default=str) + '\n' for r in records).encode('utf-8')
+        while data:
+            # os.write may write fewer bytes than requested, e.g. when interrupted by a signal
+            n = os.write(self.fd_, data)
+            data = data[n:]
+
+    def log(self, message, level='INFO', phase=None, fold=None, duration=None, **fields):
+        """
+        Queues a structured record for writing.
+
+        Parameters
+        ----------
+        message : string
+            Text message to record.
+
+        level : string, optional, default 'INFO'
+            Severity level of the record.
+
+        phase : string, optional, default None
+            Name of the experiment phase the record belongs to (e.g. 'fit', 'predict').
+
+        fold : int, optional, default None
+            Cross-validation fold the record belongs to.
+
+        duration : float, optional, default None
+            Elapsed time in seconds associated with the record.
+
+        fields : dict
+            Additional fields to include in the record.
+        """
+        if self.closed_:
+            raise Exception('Logger is closed.')
+
+        pid = os.getpid()
+        record = {'time': time.time(), 'pid': pid, 'level': level, 'message': message}
+        if phase is not None:
+            record['phase'] = phase
+        if fold is not None:
+            record['fold'] = fold
+        if duration is not None:
+            record['duration'] = duration
+        record.update(fields)
+
+        if pid != self.pid_:
+            self._write([record])
+            return
+
+        while True:
+            if not self.thread_.is_alive():
+                raise Exception('Logger writer thread has stopped.')
+            try:
+                self.queue_.put(record, timeout=self.flush_interval)
+                return
+            except queue.Full:
+                pass
+
+    def write(self, message):
+        """
+        Queues a plain text message.  Provided for compatibility with Logger.
+
+        Parameters
+        ----------
+        message : string
+            Text message to record.
+        """
+        self.log(message.rstrip('\n'))
+
+    def flush(self):
+        """
+        Blocks until every queued record has been written.
+        """
+        if not self.closed_ and os.getpid() == self.pid_:
+            self.queue_.join()
+
+    def close(self):
+        """
+        Flushes any queued records, stops the writer thread and closes the underlying file.
+        """
+        if self.closed_:
+            return
+
+        self.closed_ = True
+        if os.getpid() == self.pid_ and self.thread_.is_alive():
+            self.queue_.put(None)
+            self.thread_.join()
+        os.close(self.fd_)
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
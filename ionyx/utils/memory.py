@@ -0,0 +1,212 @@
+import os
+import sys
+import warnings
+import tracemalloc
+import pandas as pd
+
+from .utils import print_status_message
+
+# phases that mark the start of a fold, where the memory budget is checked
+FOLD_PHASES = ('fold_materialize', 'oos_fold_materialize')
+
+
+def current_rss():
+    """
+    Returns the resident set size of the current process in bytes.  Uses /proc where available and falls back
+    to the peak resident set size reported by the resource module.  Returns None if neither is available.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (IOError, OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # reported in bytes on macOS and kilobytes elsewhere
+        return rss if sys.platform == 'darwin' else rss * 1024
+    except ImportError:
+        return None
+
+
+class MemoryTracker(object):
+    """
+    Profiler hook that records memory use for every instrumented phase.  For each phase it records the change
+    in resident set size and, if allocation tracing is enabled, the peak memory allocated through tracemalloc
+    while the phase was running (numpy array buffers are included).  Nested phases are handled, so the peak of
+    an outer phase includes the peaks of the phases inside it.
+
+    If a memory budget is set, the tracker projects the memory needed by the next fold from the current
+    resident set size plus the largest growth observed in any previous fold, and issues a warning before the
+    fold starts if the projection exceeds the budget.
+
+    Attach an instance to a Profiler:
+
+        tracker = MemoryTracker(budget=8e9)
+        profiler = Profiler(hooks=[tracker])
+        train_stacked_ensemble(..., profiler=profiler)
+        tracker.report()
+
+    Parameters
+    ----------
+    trace_allocations : boolean, optional, default True
+        Track allocation peaks with tracemalloc.  Tracing slows down allocation-heavy code, so disable it to
+        only record resident set size.
+
+    budget : float, optional, default None
+        Memory budget in bytes.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+    """
+    def __init__(self, trace_allocations=True, budget=None, verbose=False, logger=None):
+        self.trace_allocations = trace_allocations
+        self.budget = budget
+        self.verbose = verbose
+        self.logger = logger
+        self.records_ = []
+        self.stack_ = []
+        self.fold_start_rss_ = {}
+        self.fold_growth_ = {}
+        self.started_tracing_ = False
+
+    def start(self):
+        """
+        Starts allocation tracing.  Called automatically at the start of the first phase.
+        """
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing_ = True
+
+    def stop(self):
+        """
+        Stops allocation tracing if it was started by this tracker.
+        """
+        if self.started_tracing_:
+            tracemalloc.stop()
+            self.started_tracing_ = False
+        self.stack_ = []
+
+    def phase_start(self, event):
+        self.start()
+        rss = current_rss()
+
+        if event['phase'] in FOLD_PHASES and event['fold'] is not None:
+            self._check_budget(event['fold'], rss)
+            self.fold_start_rss_[event['fold']] = rss
+
+        frame = {'rss': rss, 'allocated': 0, 'peak': 0}
+        if tracemalloc.is_tracing():
+            allocated, peak = tracemalloc.get_traced_memory()
+            # resetting the peak would lose the enclosing phase's peak so far, so carry it on its frame
+            if len(self.stack_) > 0:
+                self.stack_[-1]['peak'] = max(self.stack_[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['allocated'] = allocated
+        self.stack_.append(frame)
+
+    def phase_end(self, event):
+        if len(self.stack_) == 0:
+            return
+
+        frame = self.stack_.pop()
+        rss = current_rss()
+        if rss is not None and frame['rss'] is not None:
+            event['rss'] = rss
+            event['rss_delta'] = rss - frame['rss']
+
+        if tracemalloc.is_tracing():
+            allocated, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame['peak'])
+            event['alloc_delta'] = allocated - frame['allocated']
+            event['alloc_peak'] = peak - frame['allocated']
+            if len(self.stack_) > 0:
+                self.stack_[-1]['peak'] = max(self.stack_[-1]['peak'], peak)
+
+        fold = event['fold']
+        if fold is not None and self.fold_start_rss_.get(fold) is not None:
+            growth = max(event.get('rss', 0) - self.fold_start_rss_[fold], event.get('alloc_peak', 0))
+            self.fold_growth_[fold] = max(self.fold_growth_.get(fold, 0), growth)
+
+        self.records_.append({
+            'phase': event['phase'],
+            'fold': fold,
+            'model': event['model'],
+            'rss_delta': event.get('rss_delta'),
+            'alloc_delta': event.get('alloc_delta'),
+            'alloc_peak': event.get('alloc_peak')
+        })
+
+    def _check_budget(self, fold, rss):
+        if self.budget is None or rss is None:
+            return
+
+        projected = rss + max(self.fold_growth_.values()) if len(self.fold_growth_) > 0 else rss
+        if projected > self.budget:
+            message = ('Fold {0} is projected to use {1:.1f} MB, which exceeds the memory budget of {2:.1f} MB.'
+                       .format(fold, projected / 1e6, self.budget / 1e6))
+            warnings.warn(message, RuntimeWarning)
+            print_status_message(message, self.verbose, self.logger)
+
+    def summary(self, top=10):
+        """
+        Aggregates the recorded phases by name.
+
+        Parameters
+        ----------
+        top : int, optional, default 10
+            Number of phases to return.
+
+        Returns
+        ----------
+        summary : DataFrame
+            Call count, largest allocation peak, total allocation and total resident set size change in bytes
+            for each phase, sorted by the largest allocation peak (or resident set size change if allocations
+            weren't traced).
+        """
+        columns = ['count', 'alloc_peak_max', 'alloc_delta_total', 'rss_delta_total']
+        if len(self.records_) == 0:
+            return pd.DataFrame(columns=columns)
+
+        records = pd.DataFrame(self.records_, columns=['phase', 'alloc_peak', 'alloc_delta', 'rss_delta'])
+        grouped = records.groupby('phase')
+        summary = pd.DataFrame({
+            'count': grouped.size(),
+            'alloc_peak_max': grouped['alloc_peak'].max(),
+            'alloc_delta_total': grouped['alloc_delta'].sum(),
+            'rss_delta_total': grouped['rss_delta'].sum()
+        }, columns=columns)
+        sort_by = 'alloc_peak_max' if records['alloc_peak'].notnull().any() else 'rss_delta_total'
+
+        return summary.sort_values(sort_by, ascending=False).head(top)
+
+    def report(self, top=10, verbose=True, logger=None):
+        """
+        Prints the top allocating phases in megabytes.
+
+        Parameters
+        ----------
+        top : int, optional, default 10
+            Number of phases to print.
+
+        verbose : boolean, optional, default True
+            Prints status messages to the console if enabled.
+
+        logger : object, optional, default None
+            Instance of a class that can log messages to an output file.
+        """
+        summary = self.summary(top)
+        megabytes = summary[['alloc_peak_max', 'alloc_delta_total', 'rss_delta_total']].astype(float) / 1e6
+        megabytes.insert(0, 'count', summary['count'])
+        print_status_message('Memory profile (MB):\n{0}'.format(megabytes.to_string(float_format='{0:.1f}'.format)),
+                             verbose, logger)
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
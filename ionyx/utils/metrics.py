@@ -0,0 +1,578 @@
+import numpy as np
+from scipy.stats import rankdata
+from sklearn.metrics import f1_score, log_loss, roc_auc_score
+
+_metrics = {}
+
+
+class Intermediates(object):
+    """
+    Lazily computed quantities shared between metrics, such as residuals, thresholded labels, confusion
+    counts and score ranks.  Each quantity is computed at most once no matter how many metrics use it,
+    which is what allows several metrics to be evaluated in a single pass over the predictions.
+
+    Predictions may be labels or probabilities.  Label-based metrics (accuracy, f1) threshold probabilities
+    at 0.5, and ranking-based metrics (roc_auc, log_loss) use the raw values.
+
+    Parameters
+    ----------
+    y : array-like
+        Target values.
+
+    y_pred : array-like
+        Predicted target values or probabilities of the positive class.
+    """
+    def __init__(self, y, y_pred):
+        self.y = y
+        self.y_pred = y_pred
+        self.cache_ = {}
+
+    def get(self, name, func):
+        """
+        Returns a cached intermediate, computing it with func on first use.
+        """
+        if name not in self.cache_:
+            self.cache_[name] = func()
+        return self.cache_[name]
+
+    @property
+    def residuals(self):
+        return self.get('residuals', lambda: self.y - self.y_pred)
+
+    @property
+    def squared_error_sum(self):
+        return self.get('squared_error_sum', lambda: float(np.dot(self.residuals, self.residuals)))
+
+    @property
+    def labels(self):
+        def threshold():
+            y_pred = self.y_pred
+            if y_pred.dtype.kind == 'f' and not np.all(np.mod(y_pred, 1) == 0):
+                return (y_pred >= 0.5).astype(self.y.dtype)
+            return y_pred
+        return self.get('labels', threshold)
+
+    @property
+    def binary_counts(self):
+        def counts():
+            actual = self.y == 1
+            predicted = self.labels == 1
+            tp = np.count_nonzero(actual & predicted)
+            fp = np.count_nonzero(predicted) - tp
+            fn = np.count_nonzero(actual) - tp
+            return tp, fp, fn
+        return self.get('binary_counts', counts)
+
+    @property
+    def is_binary(self):
+        return self.get('is_binary', lambda: np.all(np.isin(np.unique(self.y), [0, 1])))
+
+    @property
+    def ranks(self):
+        return self.get('ranks', lambda: rankdata(self.y_pred))
+
+
+def register_metric(name, func, greater_is_better=True, shared=False):
+    """
+    Adds a metric to the registry so that it can be used anywhere a scoring metric is accepted.
+
+    Parameters
+    ----------
+    name : string
+        Name used to refer to the metric.
+
+    func : callable
+        Function that computes the metric.  Called with (y, y_pred) unless shared is True, in which case
+        it is called with an Intermediates object that exposes y, y_pred and the shared quantities.
+
+    greater_is_better : boolean, optional, default True
+        Whether higher values of the metric indicate a better model.
+
+    shared : boolean, optional, default False
+        Whether func accepts an Intermediates object.
+    """
+    _metrics[name] = (func, greater_is_better, shared)
+
+
+def greater_is_better(metric):
+    """
+    Returns True if higher values of the metric indicate a better model.
+
+    Parameters
+    ----------
+    metric : string
+        Name of a registered metric.
+    """
+    if metric not in _metrics:
+        raise Exception('Invalid metric was provided: ' + str(metric))
+    return _metrics[metric][1]
+
+
+def score_metrics(y, y_pred, metrics):
+    """
+    Computes several metrics at once.  Quantities that more than one metric needs (residuals, confusion
+    counts, ranks) are computed only once.
+
+    Parameters
+    ----------
+    y : array-like
+        Target values.
+
+    y_pred : array-like
+        Predicted target values or probabilities of the positive class.
+
+    metrics : array-like
+        List of registered metric names.
+
+    Returns
+    ----------
+    scores : dict
+        Dictionary mapping each metric name to its score, in the order the metrics were given.
+    """
+    y = np.asarray(y).ravel()
+    y_pred = np.asarray(y_pred).ravel()
+    assert y.shape == y_pred.shape, 'Shape of y and y_pred do not match.'
+
+    shared = Intermediates(y, y_pred)
+    scores = {}
+    for metric in metrics:
+        if metric not in _metrics:
+            raise Exception('Invalid metric was provided: ' + str(metric))
+
+        func, _, uses_shared = _metrics[metric]
+        scores[metric] = func(shared) if uses_shared else func(y, y_pred)
+
+    return scores
+
+
+def average_scores(scores):
+    """
+    Averages a list of scores, where each score is either a float or a dictionary of metric scores as
+    returned by score_metrics.
+
+    Parameters
+    ----------
+    scores : array-like
+        List of scores.
+
+    Returns
+    ----------
+    average : float or dict
+        Average score, or a dictionary of average scores per metric.
+    """
+    if len(scores) > 0 and isinstance(scores[0], dict):
+        return dict((m, sum(s[m] for s in scores) / len(scores)) for m in scores[0])
+    return sum(scores) / len(scores)
+
+
+def _accuracy(shared):
+    return float(np.mean(shared.y == shared.labels))
+
+
+def _f1(shared):
+    if not shared.is_binary:
+        # defer to scikit-learn for its multi-class error handling
+        return float(f1_score(shared.y, shared.labels))
+
+    tp, fp, fn = shared.binary_counts
+    return float(2.0 * tp / (2 * tp + fp + fn)) if tp + fp + fn > 0 else 0.0
+
+
+def _log_loss(shared):
+    if not shared.is_binary:
+        return float(log_loss(shared.y, shared.y_pred))
+
+    p = np.clip(shared.y_pred.astype(np.float64), 1e-15, 1 - 1e-15)
+    return float(-np.mean(np.where(shared.y == 1, np.log(p), np.log(1 - p))))
+
+
+def _mean_absolute_error(shared):
+    return float(np.mean(np.abs(shared.residuals)))
+
+
+def _mean_squared_error(shared):
+    return shared.squared_error_sum / shared.y.shape[0]
+
+
+def _r2(shared):
+    deviation = shared.y - shared.y.mean()
+    total = float(np.dot(deviation, deviation))
+    if total == 0:
+        return 1.0 if shared.squared_error_sum == 0 else 0.0
+    return 1.0 - shared.squared_error_sum / total
+
+
+def _roc_auc(shared):
+    if not shared.is_binary:
+        # defer to scikit-learn, which handles other binary labels and rejects multi-class targets
+        return float(roc_auc_score(shared.y, shared.y_pred))
+
+    positive = shared.y == 1
+    n_pos = np.count_nonzero(positive)
+    n_neg = shared.y.shape[0] - n_pos
+    if n_pos == 0 or n_neg == 0:
+        raise ValueError('Only one class present in y_true. ROC AUC score is not defined in that case.')
+
+    # Mann-Whitney U statistic computed from tie-averaged ranks of the scores
+    return float((shared.ranks[positive].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+register_metric('accuracy', _accuracy, True, shared=True)
+register_metric('f1', _f1, True, shared=True)
+register_metric('log_loss', _log_loss, False, shared=True)
+register_metric('mean_absolute_error', _mean_absolute_error, False, shared=True)
+register_metric('mean_squared_error', _mean_squared_error, False, shared=True)
+register_metric('r2', _r2, True, shared=True)
+register_metric('roc_auc', _roc_auc, True, shared=True)
+
+
+class MetricAccumulator(object):
+    """
+    Base class for streaming metric accumulators.  An accumulator is updated with chunks of targets and
+    predictions and can be merged with accumulators that were updated elsewhere (e.g. in worker processes),
+    so a metric can be computed over data that never fits in memory at once.  Accumulators hold only a few
+    counters and pickle cheaply.
+    """
+    def update(self, y, y_pred):
+        """
+        Adds a chunk of targets and predictions.
+
+        Parameters
+        ----------
+        y : array-like
+            Target values.
+
+        y_pred : array-like
+            Predicted target values or probabilities of the positive class.
+        """
+        y = np.asarray(y).ravel()
+        y_pred = np.asarray(y_pred).ravel()
+        assert y.shape == y_pred.shape, 'Shape of y and y_pred do not match.'
+        if y.shape[0] > 0:
+            self._update(Intermediates(y, y_pred))
+
+        return self
+
+    def merge(self, other):
+        """
+        Combines the state of another accumulator of the same type into this one.
+
+        Parameters
+        ----------
+        other : object
+            Accumulator to merge.
+        """
+        if type(other) is not type(self):
+            raise Exception('Cannot merge {0} into {1}.'.format(other, self))
+        self._merge(other)
+
+        return self
+
+    def result(self):
+        """
+        Returns the metric value for all of the data seen so far.
+        """
+        raise NotImplementedError()
+
+    def _update(self, shared):
+        raise NotImplementedError()
+
+    def _merge(self, other):
+        raise NotImplementedError()
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+class AccuracyAccumulator(MetricAccumulator):
+    """
+    Streaming accuracy.  Exact.
+    """
+    def __init__(self):
+        self.n = 0
+        self.correct = 0
+
+    def _update(self, shared):
+        self.n += shared.y.shape[0]
+        self.correct += int(np.count_nonzero(shared.y == shared.labels))
+
+    def _merge(self, other):
+        self.n += other.n
+        self.correct += other.correct
+
+    def result(self):
+        return float(self.correct) / self.n
+
+
+class F1Accumulator(MetricAccumulator):
+    """
+    Streaming binary F1 score computed from true positive, false positive and false negative counts.  Exact.
+    """
+    def __init__(self):
+        self.tp = 0
+        self.fp = 0
+        self.fn = 0
+
+    def _update(self, shared):
+        if not shared.is_binary:
+            raise Exception('Streaming f1 only supports binary targets.')
+        tp, fp, fn = shared.binary_counts
+        self.tp += int(tp)
+        self.fp += int(fp)
+        self.fn += int(fn)
+
+    def _merge(self, other):
+        self.tp += other.tp
+        self.fp += other.fp
+        self.fn += other.fn
+
+    def result(self):
+        denominator = 2 * self.tp + self.fp + self.fn
+        return 2.0 * self.tp / denominator if denominator > 0 else 0.0
+
+
+class LogLossAccumulator(MetricAccumulator):
+    """
+    Streaming binary log loss.  Exact (with the same probability clipping as the log_loss metric).
+    """
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+
+    def _update(self, shared):
+        if not shared.is_binary:
+            raise Exception('Streaming log_loss only supports binary targets.')
+        self.n += shared.y.shape[0]
+        self.total += _log_loss(shared) * shared.y.shape[0]
+
+    def _merge(self, other):
+        self.n += other.n
+        self.total += other.total
+
+    def result(self):
+        return self.total / self.n
+
+
+class MeanAbsoluteErrorAccumulator(MetricAccumulator):
+    """
+    Streaming mean absolute error.  Exact.
+    """
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+
+    def _update(self, shared):
+        self.n += shared.y.shape[0]
+        self.total += float(np.abs(shared.residuals).sum())
+
+    def _merge(self, other):
+        self.n += other.n
+        self.total += other.total
+
+    def result(self):
+        return self.total / self.n
+
+
+class MeanSquaredErrorAccumulator(MetricAccumulator):
+    """
+    Streaming mean squared error.  Exact.
+    """
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+
+    def _update(self, shared):
+        self.n += shared.y.shape[0]
+        self.total += shared.squared_error_sum
+
+    def _merge(self, other):
+        self.n += other.n
+        self.total += other.total
+
+    def result(self):
+        return self.total / self.n
+
+
+class R2Accumulator(MetricAccumulator):
+    """
+    Streaming coefficient of determination.  The target variance is accumulated with the pairwise update
+    of Chan et al., which stays numerically stable when chunks have very different means.  Exact.
+    """
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sse = 0.0
+
+    def _update(self, shared):
+        y = shared.y.astype(np.float64)
+        deviation = y - y.mean()
+        self._combine(y.shape[0], float(y.mean()), float(np.dot(deviation, deviation)))
+        self.sse += shared.squared_error_sum
+
+    def _merge(self, other):
+        self._combine(other.n, other.mean, other.m2)
+        self.sse += other.sse
+
+    def _combine(self, n, mean, m2):
+        if n == 0:
+            return
+
+        total = self.n + n
+        delta = mean - self.mean
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+
+    def result(self):
+        if self.m2 == 0:
+            return 1.0 if self.sse == 0 else 0.0
+        return 1.0 - self.sse / self.m2
+
+
+class RocAucAccumulator(MetricAccumulator):
+    """
+    Streaming area under the ROC curve for binary targets, computed from per-score counts of positive and
+    negative examples.
+
+    By default the counts are kept for every distinct score and the result is exact, but memory grows with
+    the number of distinct scores.  If n_bins is set, scores are bucketed into a fixed histogram over
+    score_range instead.  Positive/negative pairs that fall into the same bucket are counted as ties, so the
+    result can differ from the exact AUC by at most the fraction of such pairs (roughly 1 / n_bins for
+    well-spread scores).
+
+    Parameters
+    ----------
+    n_bins : int, optional, default None
+        Number of histogram buckets.  If None, the exact algorithm is used.
+
+    score_range : tuple, optional, default (0.0, 1.0)
+        Range of the histogram buckets.  Scores outside the range are clipped into the end buckets.
+    """
+    def __init__(self, n_bins=None, score_range=(0.0, 1.0)):
+        self.n_bins = n_bins
+        self.score_range = score_range
+        if n_bins is None:
+            self.scores = np.zeros(0)
+            self.positives = np.zeros(0, dtype=np.int64)
+            self.negatives = np.zeros(0, dtype=np.int64)
+        else:
+            self.positives = np.zeros(n_bins, dtype=np.int64)
+            self.negatives = np.zeros(n_bins, dtype=np.int64)
+
+    def _update(self, shared):
+        if not shared.is_binary:
+            raise Exception('Streaming roc_auc only supports binary targets.')
+
+        positive = shared.y == 1
+        if self.n_bins is None:
+            self._add_exact(shared.y_pred.astype(np.float64), positive.astype(np.int64),
+                            (~positive).astype(np.int64))
+        else:
+            low, high = self.score_range
+            bins = ((shared.y_pred - low) * (self.n_bins / float(high - low))).astype(np.int64)
+            bins = np.clip(bins, 0, self.n_bins - 1)
+            self.positives += np.bincount(bins[positive], minlength=self.n_bins)
+            self.negatives += np.bincount(bins[~positive], minlength=self.n_bins)
+
+    def _merge(self, other):
+        if self.n_bins != other.n_bins or (self.n_bins is not None and self.score_range != other.score_range):
+            raise Exception('Cannot merge ROC AUC accumulators with different bins.')
+
+        if self.n_bins is None:
+            self._add_exact(other.scores, other.positives, other.negatives)
+        else:
+            self.positives += other.positives
+            self.negatives += other.negatives
+
+    def _add_exact(self, scores, positives, negatives):
+        scores, inverse = np.unique(np.concatenate([self.scores, scores]), return_inverse=True)
+        self.positives = np.bincount(inverse, np.concatenate([self.positives, positives]),
+                                     minlength=scores.shape[0]).astype(np.int64)
+        self.negatives = np.bincount(inverse, np.concatenate([self.negatives, negatives]),
+                                     minlength=scores.shape[0]).astype(np.int64)
+        self.scores = scores
+
+    def result(self):
+        n_pos = self.positives.sum()
+        n_neg = self.negatives.sum()
+        if n_pos == 0 or n_neg == 0:
+            raise ValueError('Only one class present in y_true. ROC AUC score is not defined in that case.')
+
+        # each positive beats every negative with a lower score and ties with negatives at the same score
+        negatives_below = np.cumsum(self.negatives) - self.negatives
+        wins = np.dot(self.positives, negatives_below) + 0.5 * np.dot(self.positives, self.negatives)
+
+        return float(wins / (n_pos * n_neg))
+
+
+class MultiMetricAccumulator(MetricAccumulator):
+    """
+    Accumulates several metrics at once, sharing intermediate results within each chunk.
+
+    Parameters
+    ----------
+    metrics : array-like
+        List of metric names.
+
+    n_bins : int, optional, default None
+        Number of histogram buckets for roc_auc.  If None, the exact algorithm is used.
+
+    score_range : tuple, optional, default (0.0, 1.0)
+        Range of the roc_auc histogram buckets.
+    """
+    def __init__(self, metrics, n_bins=None, score_range=(0.0, 1.0)):
+        self.accumulators = dict((m, create_accumulator(m, n_bins=n_bins, score_range=score_range)
+                                  if m == 'roc_auc' else create_accumulator(m)) for m in metrics)
+        self.metrics = list(metrics)
+
+    def _update(self, shared):
+        for m in self.metrics:
+            self.accumulators[m]._update(shared)
+
+    def _merge(self, other):
+        for m in self.metrics:
+            self.accumulators[m].merge(other.accumulators[m])
+
+    def result(self):
+        return dict((m, self.accumulators[m].result()) for m in self.metrics)
+
+
+_accumulators = {
+    'accuracy': AccuracyAccumulator,
+    'f1': F1Accumulator,
+    'log_loss': LogLossAccumulator,
+    'mean_absolute_error': MeanAbsoluteErrorAccumulator,
+    'mean_squared_error': MeanSquaredErrorAccumulator,
+    'r2': R2Accumulator,
+    'roc_auc': RocAucAccumulator
+}
+
+
+def create_accumulator(metric, **kwargs):
+    """
+    Creates a streaming accumulator for a metric or list of metrics.
+
+    Parameters
+    ----------
+    metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'} or list
+        Scoring metric, or a list of scoring metrics.
+
+    kwargs : dict
+        Additional arguments for the accumulator (e.g. n_bins for roc_auc, which also applies to roc_auc in
+        a list of metrics).
+
+    Returns
+    ----------
+    accumulator : object
+        A MetricAccumulator whose result is a float, or a dictionary of floats for a list of metrics.
+    """
+    if isinstance(metric, (list, tuple)):
+        return MultiMetricAccumulator(metric, **kwargs)
+    if metric not in _accumulators:
+        raise Exception('No streaming accumulator available for metric: ' + str(metric))
+
+    return _accumulators[metric](**kwargs)
@@ -0,0 +1,131 @@
+import os
+import shutil
+import pickle
+import tempfile
+import numpy as np
+
+MODEL_FILE = 'model.pkl'
+
+
+class _ArrayPickler(pickle.Pickler):
+    """
+    Pickler that writes large numpy arrays to their own files instead of into the pickle stream.
+    """
+    def __init__(self, file, path, compress, min_array_size):
+        pickle.Pickler.__init__(self, file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.path = path
+        self.compress = compress
+        self.min_array_size = min_array_size
+        self.saved_ = {}
+        self.refs_ = []
+
+    def persistent_id(self, obj):
+        if type(obj) not in (np.ndarray, np.memmap) or obj.dtype.hasobject or obj.nbytes < self.min_array_size:
+            return None
+
+        # arrays referenced from several places in the object graph are only written once
+        if id(obj) in self.saved_:
+            return self.saved_[id(obj)]
+
+        compressed = self.compress(obj) if callable(self.compress) else bool(self.compress)
+        key = 'array_%d' % len(self.saved_)
+        if compressed:
+            np.savez_compressed(os.path.join(self.path, key + '.npz'), obj)
+        else:
+            np.save(os.path.join(self.path, key + '.npy'), obj)
+
+        pid = (key, compressed)
+        self.saved_[id(obj)] = pid
+        self.refs_.append(obj)
+
+        return pid
+
+
+class _ArrayUnpickler(pickle.Unpickler):
+    """
+    Unpickler that resolves arrays written by _ArrayPickler, memory-mapping the uncompressed ones.
+    """
+    def __init__(self, file, path, mmap_mode):
+        pickle.Unpickler.__init__(self, file)
+        self.path = path
+        self.mmap_mode = mmap_mode
+
+    def persistent_load(self, pid):
+        key, compressed = pid
+        if compressed:
+            with np.load(os.path.join(self.path, key + '.npz')) as archive:
+                return archive['arr_0']
+        else:
+            return np.load(os.path.join(self.path, key + '.npy'), mmap_mode=self.mmap_mode)
+
+
+def dump_out_of_band(obj, path, compress=False, min_array_size=4096):
+    """
+    Persists an object to a directory, storing every large numpy array inside it (tree node arrays,
+    coefficient matrices, PCA components, etc.) as a separate .npy file next to a pickle of everything
+    else.  The .npy format pads its header so that array data starts on a 64-byte boundary, which allows
+    the files to be memory-mapped directly.  The directory is written under a temporary name and moved
+    into place, so a crash can't leave a half-written model behind.
+
+    Parameters
+    ----------
+    obj : object
+        Object to persist, typically a fitted model or a list of fitted transforms.
+
+    path : string
+        Location of the directory to write.  Replaced if it already exists.
+
+    compress : boolean or callable, optional, default False
+        Whether to compress arrays.  If callable, it is called with each array and returns True for arrays
+        that should be compressed.  Compressed arrays are smaller on disk but can't be memory-mapped.
+
+    min_array_size : int, optional, default 4096
+        Arrays smaller than this many bytes are left in the pickle stream.
+    """
+    path = os.path.abspath(path)
+    parent = os.path.dirname(path)
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+    try:
+        # mkdtemp creates the directory readable only by its owner, but the model is meant to be shared
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp, 0o777 & ~umask)
+
+        with open(os.path.join(tmp, MODEL_FILE), 'wb') as f:
+            _ArrayPickler(f, tmp, compress, min_array_size).dump(obj)
+
+        if os.path.exists(path):
+            stale = tempfile.mkdtemp(dir=parent, prefix='.stale-')
+            os.rename(path, os.path.join(stale, 'old'))
+            shutil.rmtree(stale, ignore_errors=True)
+        os.rename(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+def load_out_of_band(path, mmap_mode='r'):
+    """
+    Loads an object written by dump_out_of_band.  Uncompressed arrays are memory-mapped, so processes that
+    load the same model share a single physical copy of its arrays through the page cache.
+
+    Note that some estimators copy their arrays while unpickling (e.g. scikit-learn's tree structures copy
+    node arrays into their own buffers), in which case those arrays end up in private memory.
+
+    Parameters
+    ----------
+    path : string
+        Location of the directory to read.
+
+    mmap_mode : {'r', 'c', 'r+', None}, optional, default 'r'
+        Memory-map mode for uncompressed arrays.  Use 'c' for arrays that are modified in place after
+        loading, or None to read them fully into memory.
+
+    Returns
+    ----------
+    obj : object
+        The persisted object.
+    """
+    with open(os.path.join(path, MODEL_FILE), 'rb') as f:
+        return _ArrayUnpickler(f, path, mmap_mode).load()
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import threading
+import pandas as pd
+
+
+class _NullPhase(object):
+    """
+    Context manager that does nothing.  A single shared instance is returned for every phase when profiling
+    is disabled, so instrumented code pays only for a function call and a None check.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_null_phase = _NullPhase()
+
+
+class _Phase(object):
+    """
+    Context manager that records a single timed phase on a Profiler.
+    """
+    def __init__(self, profiler, name, fold, model):
+        self.profiler = profiler
+        self.event = {'phase': name, 'fold': fold, 'model': model}
+
+    def __enter__(self):
+        for hook in self.profiler.hooks_:
+            hook.phase_start(self.event)
+        self.event['start'] = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.event['duration'] = time.perf_counter() - self.event['start']
+        for hook in reversed(self.profiler.hooks_):
+            hook.phase_end(self.event)
+        self.profiler._record(self.event)
+        return False
+
+
+class Profiler(object):
+    """
+    Collects timings for the phases of an experiment (transform fitting, model fitting, prediction, scoring,
+    etc.) so that it's possible to see where the time in each fold goes.  Pass an instance as the profiler
+    argument of an experiment or ensemble function, then use summary or report to get an aggregated table
+    and export_chrome_trace to view the run in a trace viewer (chrome://tracing or Perfetto).
+
+    Hooks can be attached to run custom code at the start and end of every phase.  A hook is an object with
+    phase_start(event) and phase_end(event) functions, where event is a dictionary describing the phase.
+    Fields that phase_end adds to the event are kept with it and included in the trace.
+
+    Parameters
+    ----------
+    hooks : array-like, optional, default None
+        List of hooks to call around each phase.
+    """
+    def __init__(self, hooks=None):
+        self.hooks_ = list(hooks) if hooks is not None else []
+        self.events_ = []
+        self.origin_ = time.perf_counter()
+        self.lock_ = threading.Lock()
+
+    def phase(self, name, fold=None, model=None):
+        """
+        Returns a context manager that times the enclosed block.
+
+        Parameters
+        ----------
+        name : string
+            Name of the phase, e.g. 'model_fit'.
+
+        fold : int, optional, default None
+            Cross-validation fold the phase belongs to.
+
+        model : int or string, optional, default None
+            Model the phase belongs to.
+        """
+        return _Phase(self, name, fold, model)
+
+    def add_hook(self, hook):
+        """
+        Attaches a hook that is called at the start and end of every phase.
+        """
+        self.hooks_.append(hook)
+
+    def _record(self, event):
+        event['pid'] = os.getpid()
+        event['tid'] = threading.current_thread().ident
+        with self.lock_:
+            self.events_.append(event)
+
+    def reset(self):
+        """
+        Discards all recorded phases.
+        """
+        with self.lock_:
+            self.events_ = []
+        self.origin_ = time.perf_counter()
+
+    def summary(self, by='phase'):
+        """
+        Aggregates the recorded phases into a timing table.
+
+        Parameters
+        ----------
+        by : string or array-like, optional, default 'phase'
+            Field or list of fields to group by, from 'phase', 'fold' and 'model'.
+
+        Returns
+        ----------
+        summary : DataFrame
+            Call count, total, mean and maximum duration and share of the total time for each group,
+            sorted by total duration.
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        columns = ['count', 'total', 'mean', 'max', 'percent']
+        if len(self.events_) == 0:
+            return pd.DataFrame(columns=by + columns).set_index(by)
+
+        # folds are ints and models can be ints or names, so build the columns by hand to keep them as objects
+        events = pd.DataFrame({
+            'phase': [e['phase'] for e in self.events_],
+            'fold': pd.Series([e['fold'] if e['fold'] is not None else '-' for e in self.events_], dtype=object),
+            'model': pd.Series([e['model'] if e['model'] is not None else '-' for e in self.events_], dtype=object),
+            'duration': [e['duration'] for e in self.events_]
+        })
+        summary = events.groupby(by, sort=False)['duration'].agg(['count', 'sum', 'mean', 'max'])
+        summary.columns = ['count', 'total', 'mean', 'max']
+        summary['percent'] = 100. * summary['total'] / events['duration'].sum()
+
+        return summary.sort_values('total', ascending=False)
+
+    def report(self, by='phase', verbose=True, logger=None):
+        """
+        Prints the timing table produced by summary.
+
+        Parameters
+        ----------
+        by : string or array-like, optional, default 'phase'
+            Field or list of fields to group by, from 'phase', 'fold' and 'model'.
+
+        verbose : boolean, optional, default True
+            Prints status messages to the console if enabled.
+
+        logger : object, optional, default None
+            Instance of a class that can log messages to an output file.
+        """
+        from .utils import print_status_message
+        print_status_message('Profile:\n{0}'.format(self.summary(by).to_string(float_format='{0:.4f}'.format)),
+                             verbose, logger)
+
+    def export_chrome_trace(self, filename):
+        """
+        Writes the recorded phases in the Chrome trace event format.
+
+        Parameters
+        ----------
+        filename : string
+            Location of the JSON file to write.
+        """
+        trace = []
+        for event in self.events_:
+            args = dict((k, v) for k, v in event.items()
+                        if k not in ('phase', 'start', 'duration', 'pid', 'tid') and v is not None)
+            trace.append({
+                'name': event['phase'],
+                'cat': 'ionyx',
+                'ph': 'X',
+                'ts': (event['start'] - self.origin_) * 1e6,
+                'dur': event['duration'] * 1e6,
+                'pid': event['pid'],
+                'tid': event['tid'],
+                'args': args
+            })
+
+        with open(filename, 'w') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, default=str)
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+def profile_phase(profiler, name, fold=None, model=None):
+    """
+    Returns a context manager that times a phase on the given profiler, or a shared no-op context manager
+    if profiler is None.
+
+    Parameters
+    ----------
+    profiler : object
+        Instance of Profiler, or None if profiling is disabled.
+
+    name : string
+        Name of the phase.
+
+    fold : int, optional, default None
+        Cross-validation fold the phase belongs to.
+
+    model : int or string, optional, default None
+        Model the phase belongs to.
+    """
+    if profiler is None:
+        return _null_phase
+
+    return profiler.phase(name, fold, model)
@@ -0,0 +1,161 @@
+from .utils import print_status_message
+
+
+def iter_array_chunks(X, y=None, chunk_size=10000):
+    """
+    Generates (X, y) chunks from an in-memory or memory-mapped array.  Chunks are slices of the input, so
+    nothing is copied until a chunk is actually used.  Use np.load with mmap_mode='r' to stream an array
+    that does not fit in memory.
+
+    Parameters
+    ----------
+    X : array-like
+        Input samples.
+
+    y : array-like, optional, default None
+        Target values.
+
+    chunk_size : int, optional, default 10000
+        Number of rows per chunk.
+
+    Returns
+    ----------
+    chunks : generator
+        Generator of (X_chunk, y_chunk) tuples.  y_chunk is None if y was not provided.
+    """
+    for start in range(0, X.shape[0], chunk_size):
+        end = start + chunk_size
+        yield X[start:end], (y[start:end] if y is not None else None)
+
+
+def chunk_source(chunks):
+    """
+    Normalizes a chunk source into a function that returns a fresh iterator of (X, y) chunks.  Multi-pass
+    algorithms (transform fitting, multiple training epochs) need to re-read the data, so a one-shot
+    generator is not accepted.
+
+    Parameters
+    ----------
+    chunks : callable or array-like
+        Either a function with no arguments that returns an iterator of (X, y) chunks (e.g. a lambda that
+        opens a chunked CSV reader), or a list of (X, y) chunks.
+
+    Returns
+    ----------
+    source : callable
+        Function that returns a new iterator over the chunks each time it is called.
+    """
+    if callable(chunks):
+        return chunks
+    elif isinstance(chunks, (list, tuple)):
+        return lambda: iter(chunks)
+    else:
+        raise Exception('Chunk source must be a callable or a list of chunks.')
+
+
+def split_chunks(chunks, holdout_every=None):
+    """
+    Splits a chunk source into training and hold-out sources.  Entire chunks are held out rather than
+    individual rows so that both sources can be streamed independently.
+
+    Parameters
+    ----------
+    chunks : callable or array-like
+        Chunk source (see chunk_source).
+
+    holdout_every : int, optional, default None
+        Every n-th chunk is assigned to the hold-out set.  If None, nothing is held out.
+
+    Returns
+    ----------
+    train_source : callable
+        Function that returns an iterator over the training chunks.
+
+    holdout_source : callable
+        Function that returns an iterator over the hold-out chunks, or None if nothing is held out.
+    """
+    source = chunk_source(chunks)
+    if holdout_every is None:
+        return source, None
+
+    def train_source():
+        for i, chunk in enumerate(source()):
+            if i % holdout_every != holdout_every - 1:
+                yield chunk
+
+    def holdout_source():
+        for i, chunk in enumerate(source()):
+            if i % holdout_every == holdout_every - 1:
+                yield chunk
+
+    return train_source, holdout_source
+
+
+def fit_transforms_incremental(chunks, transforms, verbose=False, logger=None):
+    """
+    Fits transformations from a stream of chunks using each transform's partial_fit function.  Each
+    transform needs the output of the fully fitted transforms before it, so the data is read once per
+    transform in the list (a single pass for a typical one-transform pipeline).
+
+    Parameters
+    ----------
+    chunks : callable or array-like
+        Chunk source (see chunk_source).
+
+    transforms : array-like
+        List of objects with a partial_fit function and a transform function.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    transforms : array-like
+        List of transform objects after calling partial_fit on every chunk.
+    """
+    print_status_message('Fitting transforms incrementally...', verbose, logger)
+    source = chunk_source(chunks)
+
+    for i, trans in enumerate(transforms):
+        if trans is None:
+            continue
+        if not hasattr(trans, 'partial_fit'):
+            raise Exception('Transform does not support incremental fitting: ' + str(trans))
+
+        for X, y in source():
+            for prev in transforms[:i]:
+                if prev is not None:
+                    X = prev.transform(X)
+            trans.partial_fit(X, y)
+
+    print_status_message('Transform fitting complete.', verbose, logger)
+
+    return transforms
+
+
+def apply_transforms_chunked(chunks, transforms):
+    """
+    Lazily applies pre-computed transformations to a stream of chunks.
+
+    Parameters
+    ----------
+    chunks : callable or array-like
+        Chunk source (see chunk_source), or a one-shot iterator of (X, y) chunks.
+
+    transforms : array-like
+        List of objects with a transform function that accepts one parameter.
+
+    Returns
+    ----------
+    chunks : generator
+        Generator of transformed (X, y) chunks.
+    """
+    iterator = chunk_source(chunks)() if callable(chunks) or isinstance(chunks, (list, tuple)) else chunks
+    for X, y in iterator:
+        for trans in transforms:
+            if trans is not None:
+                X = trans.transform(X)
+        yield X, y
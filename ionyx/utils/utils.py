@@ -1,7 +1,18 @@
-import datetime
+import os
+import time
 import pickle
+import numpy as np
 import pandas as pd
-from sklearn.metrics import *
+
+from .logger import AsyncLogger
+from .metrics import score_metrics
+from .persistence import dump_out_of_band, load_out_of_band
+
+# shared SQLAlchemy engines (and their connection pools) keyed by database URL
+_engines = {}
+
+# (second, formatted string) for the most recent status message timestamp
+_last_timestamp = (None, None)
 
 
 def create_class(import_path, module_name, class_name, *params):
@@ -51,14 +62,32 @@ def print_status_message(message, verbose=False, logger=None):
         Instance of a class that can log messages to an output file.
     """
     if verbose:
-        now = datetime.datetime.now().replace(microsecond=0).isoformat(' ')
+        now = _timestamp()
         print('(' + now + ') ' + message)
 
         if logger is not None:
-            logger.write('(' + now + ') ' + message + '\n')
+            if isinstance(logger, AsyncLogger):
+                # structured loggers record their own timestamp
+                logger.log(message)
+            else:
+                logger.write('(' + now + ') ' + message + '\n')
 
 
-def load_csv_data(filename, dtype=None, index=None, convert_to_date=False, verbose=False, logger=None):
+def _timestamp():
+    """
+    Returns the current time formatted to the second, re-using the formatted string while the second
+    hasn't changed.
+    """
+    global _last_timestamp
+    second = int(time.time())
+    if _last_timestamp[0] != second:
+        _last_timestamp = (second, time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(second)))
+
+    return _last_timestamp[1]
+
+
+def load_csv_data(filename, dtype=None, index=None, convert_to_date=False, columns=None, optimize=False,
+                  verbose=False, logger=None):
     """
     Load a csv data file into a data frame.  This function wraps the Pandas read_csv function with logic
     to set the index for the data frame and convert fields to date types if necessary.
@@ -77,6 +106,12 @@ def load_csv_data(filename, dtype=None, index=None, convert_to_date=False, verbo
     convert_to_date : boolean, optional, default False
         Boolean indicating if the index consists of date fields.
 
+    columns : array-like, optional, default None
+        List of column names to read.  Other columns in the file are skipped entirely.
+
+    optimize : boolean, optional, default False
+        Downcast numeric columns and convert low-cardinality strings to categoricals (see optimize_dtypes).
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -88,33 +123,227 @@ def load_csv_data(filename, dtype=None, index=None, convert_to_date=False, verbo
     data : array-like
         Data frame containing data from the input file.
     """
-    data = pd.read_csv(filename, sep=',', dtype=dtype)
+    data = pd.read_csv(filename, sep=',', dtype=dtype, usecols=_with_index(columns, index))
 
     if index is not None:
         if convert_to_date:
-            if type(index) is str:
-                data[index] = data[index].convert_objects(convert_dates='coerce')
-            else:
-                for key in index:
-                    data[key] = data[key].convert_objects(convert_dates='coerce')
-
+            data = _convert_dates(data, index)
         data = data.set_index(index)
 
+    if optimize:
+        data = optimize_dtypes(data, verbose=verbose, logger=logger)
+
     print_status_message('Data file {0} loaded successfully.'.format(str(filename)), verbose, logger)
 
     return data
 
 
-def load_sql_data(engine, table=None, query=None, index=None, params=None,
-                  date_columns=None, verbose=False, logger=None):
+def load_csv_data_chunked(filename, chunk_size=100000, dtype=None, columns=None, date_columns=None, label=None,
+                          optimize=True, category_threshold=0.5, as_array=False, verbose=False, logger=None):
+    """
+    Streams a csv data file in chunks so that files larger than memory can be processed.  Only the requested
+    columns are parsed, dates are converted with a single vectorized call per chunk, and each chunk's dtypes
+    are optimized before it is returned.  Since dtype optimization is done per chunk, different chunks may
+    end up with different numeric widths or category sets; pass dtype explicitly if they need to match.
+
+    Parameters
+    ----------
+    filename : string
+        Location of the file to read.
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk.
+
+    dtype : dict, optional, default None
+        Column types to use when parsing.  Columns listed here are not optimized further.
+
+    columns : array-like, optional, default None
+        List of column names to read.  Other columns in the file are skipped entirely.
+
+    date_columns : array-like, optional, default None
+        List of column names to convert to dates.  Values that can't be parsed become NaT.
+
+    label : string, optional, default None
+        Name of the target column.  If provided, each chunk is returned as an (X, y) tuple, which is the
+        format expected by the streaming training functions.
+
+    optimize : boolean, optional, default True
+        Downcast numeric columns and convert low-cardinality strings to categoricals (see optimize_dtypes).
+
+    category_threshold : float, optional, default 0.5
+        Maximum ratio of distinct values to rows for a string column to be converted to a categorical.
+
+    as_array : boolean, optional, default False
+        Return chunks as numpy arrays instead of data frames.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    chunks : generator
+        Generator of data frames, arrays or (X, y) tuples, one per chunk.
+    """
+    n_rows = 0
+    n_chunks = 0
+    bytes_before = 0
+    bytes_after = 0
+
+    reader = pd.read_csv(filename, sep=',', dtype=dtype, usecols=columns, chunksize=chunk_size)
+    for data in reader:
+        if date_columns is not None:
+            data = _convert_dates(data, date_columns)
+
+        if optimize:
+            bytes_before += data.memory_usage(deep=True).sum()
+            exclude = list(dtype.keys()) if isinstance(dtype, dict) else None
+            data = optimize_dtypes(data, category_threshold, exclude=exclude)
+            bytes_after += data.memory_usage(deep=True).sum()
+
+        n_rows += data.shape[0]
+        n_chunks += 1
+
+        if label is not None:
+            y = data[label].values
+            X = data.drop(label, axis=1)
+            yield (X.values if as_array else X), y
+        else:
+            yield data.values if as_array else data
+
+    print_status_message('Data file {0} streamed successfully ({1} rows in {2} chunks).'
+                         .format(str(filename), str(n_rows), str(n_chunks)), verbose, logger)
+    if optimize:
+        _print_memory_saved(bytes_before, bytes_after, verbose, logger)
+
+
+def optimize_dtypes(data, category_threshold=0.5, exclude=None, verbose=False, logger=None):
+    """
+    Reduces the memory footprint of a data frame.  Integer columns are downcast to the smallest type that
+    holds their range, float columns are downcast to float32 only when no precision is lost, and string
+    columns with few distinct values are converted to categoricals.
+
+    Parameters
+    ----------
+    data : array-like
+        Pandas data frame to optimize.
+
+    category_threshold : float, optional, default 0.5
+        Maximum ratio of distinct values to rows for a string column to be converted to a categorical.
+
+    exclude : array-like, optional, default None
+        List of column names to leave unchanged.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    data : array-like
+        Data frame with optimized column types.
+    """
+    bytes_before = data.memory_usage(deep=True).sum() if verbose else 0
+    data = data.copy(deep=False)
+
+    for col in data.columns:
+        if exclude is not None and col in exclude:
+            continue
+
+        values = data[col]
+        if pd.api.types.is_bool_dtype(values):
+            continue
+        elif pd.api.types.is_integer_dtype(values):
+            data[col] = pd.to_numeric(values, downcast='integer')
+        elif pd.api.types.is_float_dtype(values):
+            downcast = values.astype(np.float32)
+            if np.array_equal(downcast.values.astype(values.dtype), values.values, equal_nan=True):
+                data[col] = downcast
+        elif pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values):
+            if len(values) > 0 and values.nunique() <= category_threshold * len(values):
+                data[col] = values.astype('category')
+
+    if verbose:
+        _print_memory_saved(bytes_before, data.memory_usage(deep=True).sum(), verbose, logger)
+
+    return data
+
+
+def _with_index(columns, index):
+    """
+    Adds the index column(s) to a column projection so they are parsed as well.
+    """
+    if columns is None or index is None:
+        return columns
+
+    columns = list(columns)
+    for key in ([index] if isinstance(index, str) else index):
+        if key not in columns:
+            columns.append(key)
+
+    return columns
+
+
+def _convert_dates(data, date_columns):
+    """
+    Converts one or more columns to dates using a vectorized parse.  Invalid values become NaT.
+    """
+    for key in ([date_columns] if isinstance(date_columns, str) else date_columns):
+        data[key] = pd.to_datetime(data[key], errors='coerce')
+
+    return data
+
+
+def _print_memory_saved(bytes_before, bytes_after, verbose, logger):
+    """
+    Reports the memory saved by dtype optimization.
+    """
+    print_status_message('Memory usage reduced from {0:.1f} MB to {1:.1f} MB ({2:.1f}% saved).'
+                         .format(bytes_before / 1e6, bytes_after / 1e6,
+                                 100.0 * (1 - float(bytes_after) / max(bytes_before, 1))), verbose, logger)
+
+
+def get_engine(url, **kwargs):
+    """
+    Returns a SQLAlchemy engine for the given database URL.  Engines are created once per URL and shared
+    across calls, so every load draws its connections from the same connection pool instead of opening a
+    new connection each time.
+
+    Parameters
+    ----------
+    url : string
+        SQLAlchemy database URL, e.g. 'sqlite:///data.db' or 'postgresql://user@host/db'.
+
+    kwargs : dict
+        Additional arguments passed to create_engine (e.g. pool_size) when the engine is first created.
+
+    Returns
+    ----------
+    engine : object
+        A SQLAlchemy engine with a connection pool for the database.
+    """
+    if url not in _engines:
+        from sqlalchemy import create_engine
+        _engines[url] = create_engine(url, **kwargs)
+
+    return _engines[url]
+
+
+def load_sql_data(engine, table=None, query=None, index=None, params=None, date_columns=None,
+                  columns=None, dtype=None, verbose=False, logger=None):
     """
     Reads SQL data using the specified table or query and returns a data frame with the results.  This function
     wraps Pandas' read_sql function with logic to allow for a table name to be specified instead of a query.
 
     Parameters
     ----------
-    engine : object
-        A SQLAlchemy engine with a connection to the database to read from.
+    engine : object or string
+        A SQLAlchemy engine with a connection to the database to read from, or a database URL to look up
+        a shared engine with get_engine.
 
     table : string, optional, default None
         Name of the table to read from if reading entire table contents.  Specify either table or query parameter.
@@ -131,6 +360,12 @@ def load_sql_data(engine, table=None, query=None, index=None, params=None,
     date_columns : array-like, optional, default None
         List of column names to parse as dates in the data frame.
 
+    columns : array-like, optional, default None
+        List of column names to select when reading from a table.
+
+    dtype : dict, optional, default None
+        Column types to apply to the results.
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
@@ -142,25 +377,130 @@ def load_sql_data(engine, table=None, query=None, index=None, params=None,
     data : array-like
         Data frame containing the results of the query.
     """
-    if query is not None:
-        data = pd.read_sql(query, engine, index_col=index, params=params, parse_dates=date_columns)
-    else:
-        data = pd.read_sql('SELECT * FROM ' + table, engine, index_col=index,
-                           params=params, parse_dates=date_columns)
+    engine = get_engine(engine) if isinstance(engine, str) else engine
+    sql = query if query is not None else _table_query(engine, table, columns, index)
+
+    with engine.connect() as connection:
+        data = pd.read_sql(sql, connection, index_col=index, params=params, parse_dates=date_columns)
+    if dtype is not None:
+        data = data.astype(dtype)
 
     print_status_message('SQL query completed successfully.', verbose, logger)
 
     return data
 
 
-def load_model(filename, verbose=False, logger=None):
+def load_sql_data_chunked(engine, table=None, query=None, index=None, params=None, date_columns=None,
+                          columns=None, dtype=None, chunk_size=10000, label=None, as_array=False,
+                          verbose=False, logger=None):
+    """
+    Streams the results of a table read or SQL query in chunks.  Rows are fetched through a server-side
+    cursor on drivers that support one (e.g. PostgreSQL, MySQL), so only one chunk is held in memory at a
+    time.  Other drivers, such as SQLite, fall back to fetching rows from a regular cursor.
+
+    Parameters
+    ----------
+    engine : object or string
+        A SQLAlchemy engine with a connection to the database to read from, or a database URL to look up
+        a shared engine with get_engine.
+
+    table : string, optional, default None
+        Name of the table to read from if reading entire table contents.  Specify either table or query parameter.
+
+    query : string, optional, default None
+        SQL query to run against the database.  Specify either table or query parameter.
+
+    index : string or array-like, optional, default None
+        Specify either the column or list of columns to set as the index of the data frame.
+
+    params: array-like, optional, default None
+        List of input parameters for the database to evaluate with the SQL query.
+
+    date_columns : array-like, optional, default None
+        List of column names to parse as dates in the data frame.
+
+    columns : array-like, optional, default None
+        List of column names to select when reading from a table.
+
+    dtype : dict, optional, default None
+        Column types to apply to each chunk.
+
+    chunk_size : int, optional, default 10000
+        Number of rows per chunk.
+
+    label : string, optional, default None
+        Name of the target column.  If provided, each chunk is returned as an (X, y) tuple, which is the
+        format expected by the streaming training functions.
+
+    as_array : boolean, optional, default False
+        Return chunks as numpy arrays instead of data frames.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    chunks : generator
+        Generator of data frames, arrays or (X, y) tuples, one per chunk.
+    """
+    engine = get_engine(engine) if isinstance(engine, str) else engine
+    sql = query if query is not None else _table_query(engine, table, columns, index)
+    n_rows = 0
+
+    with engine.connect() as connection:
+        connection = connection.execution_options(stream_results=True)
+        for data in pd.read_sql(sql, connection, index_col=index, params=params,
+                                parse_dates=date_columns, chunksize=chunk_size):
+            if dtype is not None:
+                data = data.astype(dtype)
+            n_rows += data.shape[0]
+
+            if label is not None:
+                y = data[label].values
+                X = data.drop(label, axis=1)
+                yield (X.values if as_array else X), y
+            else:
+                yield data.values if as_array else data
+
+    print_status_message('SQL query streamed successfully ({0} rows).'.format(str(n_rows)), verbose, logger)
+
+
+def _table_query(engine, table, columns=None, index=None):
+    """
+    Builds a SELECT statement for a table with properly quoted identifiers.
+    """
+    if table is None:
+        raise Exception('Either a table or a query must be specified.')
+
+    quote = engine.dialect.identifier_preparer.quote
+    if columns is None:
+        select = '*'
+    else:
+        columns = list(columns)
+        if index is not None:
+            for key in ([index] if isinstance(index, str) else index):
+                if key not in columns:
+                    columns.append(key)
+        select = ', '.join(quote(c) for c in columns)
+
+    return 'SELECT ' + select + ' FROM ' + '.'.join(quote(t) for t in table.split('.'))
+
+
+def load_model(filename, mmap_mode='r', verbose=False, logger=None):
     """
     Load a previously trained model from disk.
 
     Parameters
     ----------
     filename : string
-        Location of the file to read.
+        Location of the file to read.  If this is a directory written by save_model with out_of_band
+        enabled, the model's arrays are memory-mapped instead of being read into memory.
+
+    mmap_mode : {'r', 'c', 'r+', None}, optional, default 'r'
+        Memory-map mode for arrays stored out-of-band.  Ignored for regular pickle files.
 
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
@@ -173,16 +513,19 @@ def load_model(filename, verbose=False, logger=None):
     model : object
         An object in memory that represents a fitted model.
     """
-    model_file = open(filename, 'rb')
-    model = pickle.load(model_file)
-    model_file.close()
+    if os.path.isdir(filename):
+        model = load_out_of_band(filename, mmap_mode)
+    else:
+        model_file = open(filename, 'rb')
+        model = pickle.load(model_file)
+        model_file.close()
 
     print_status_message('Loaded model from {0} into memory.'.format(str(filename)), verbose, logger)
 
     return model
 
 
-def save_model(model, filename, verbose=False, logger=None):
+def save_model(model, filename, out_of_band=False, compress=False, verbose=False, logger=None):
     """
     Persist a trained model to disk.
 
@@ -194,15 +537,30 @@ def save_model(model, filename, verbose=False, logger=None):
     filename : string
         Location of the file to write.
 
+    out_of_band : boolean, optional, default False
+        Write the model as a directory in which each large numpy array is stored in its own aligned .npy
+        file, so that load_model can memory-map them and processes on the same host share one copy.  This
+        doesn't help tree-based models (decision trees, random forests, gradient boosting): scikit-learn
+        copies the node arrays of each tree into private memory when it is unpickled, so every process still
+        holds its own copy.  Linear models, PCA and other estimators whose arrays are kept as loaded do
+        share them.
+
+    compress : boolean or callable, optional, default False
+        Compress arrays stored out-of-band.  If callable, it is called with each array and returns True for
+        arrays that should be compressed.  Compressed arrays can't be memory-mapped.
+
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
 
     logger : object, optional, default None
         Instance of a class that can log messages to an output file.
     """
-    model_file = open(filename, 'wb')
-    pickle.dump(model, model_file)
-    model_file.close()
+    if out_of_band:
+        dump_out_of_band(model, filename, compress)
+    else:
+        model_file = open(filename, 'wb')
+        pickle.dump(model, model_file)
+        model_file.close()
 
     print_status_message('Saved model to disk at {0}.'.format(str(filename)), verbose, logger)
 
@@ -279,7 +637,9 @@ def apply_transforms(X, transforms, verbose=False, logger=None):
 
 def score(y, y_pred, metric, verbose=False, logger=None):
     """
-    Calculates a score for the given predictions using the provided metric.
+    Calculates a score for the given predictions using the provided metric.  If a list of metrics is
+    provided, all of them are calculated in a single pass that shares intermediate results (residuals,
+    confusion counts, ranks) between metrics.
 
     Parameters
     ----------
@@ -287,10 +647,10 @@ def score(y, y_pred, metric, verbose=False, logger=None):
         Target values.
 
     y_pred : array-like
-        Predicted target values.
+        Predicted target values or probabilities of the positive class.
 
-    metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'}
-        Scoring metric.
+    metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc'} or list
+        Scoring metric, a list of scoring metrics, or any other metric added with register_metric.
 
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
@@ -300,34 +660,18 @@ def score(y, y_pred, metric, verbose=False, logger=None):
 
     Returns
     ----------
-    s : float
-        Calculated score between the target and predicted target values.
+    s : float or dict
+        Calculated score between the target and predicted target values, or a dictionary of scores
+        if a list of metrics was provided.
     """
-    s = None
-    y = y.ravel()
-    y_pred = y_pred.ravel()
-    assert y.shape == y_pred.shape, 'Shape of y and y_pred do not match.'
-
-    if metric == 'accuracy':
-        s = accuracy_score(y, y_pred)
-    elif metric == 'f1':
-        s = f1_score(y, y_pred)
-    elif metric == 'log_loss':
-        s = log_loss(y, y_pred)
-    elif metric == 'mean_absolute_error':
-        s = mean_absolute_error(y, y_pred)
-    elif metric == 'mean_squared_error':
-        s = mean_squared_error(y, y_pred)
-    elif metric == 'r2':
-        s = r2_score(y, y_pred)
-    elif metric == 'roc_auc':
-        s = roc_auc_score(y, y_pred)
-
-    if s is not None:
-        print_status_message('Score = {0}'.format(str(round(s, 6))), verbose, logger)
-        return s
+    if isinstance(metric, (list, tuple)):
+        s = score_metrics(y, y_pred, metric)
+        print_status_message('Scores = {0}'.format(str(s)), verbose, logger)
     else:
-        raise Exception('Invalid metric was provided: ' + str(metric))
+        s = score_metrics(y, y_pred, [metric])[metric]
+        print_status_message('Score = {0}'.format(str(round(s, 6))), verbose, logger)
+
+    return s
 
 
 def predict_score(X, y, model, metric, verbose=False, logger=None):
@@ -346,7 +690,7 @@ def predict_score(X, y, model, metric, verbose=False, logger=None):
         An object in memory that represents a fitted model.
 
     metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc', None}
-        Scoring metric.
+        Scoring metric, or a list of scoring metrics.  If None, the model's own score function is used.
 
     verbose : boolean, optional, default False
         Prints status messages to the console if enabled.
@@ -366,3 +710,78 @@ def predict_score(X, y, model, metric, verbose=False, logger=None):
         s = model.score(X, y)
         print_status_message('Score = {0}'.format(str(round(s, 6))), verbose, logger)
         return s
+
+
+def training_subset(n_records, train_score='full', random_state=1337):
+    """
+    Determines which training rows to use when calculating a training score.
+
+    Parameters
+    ----------
+    n_records : int
+        Number of rows in the training set.
+
+    train_score : {'full', 'sample:N', 'off'}, optional, default 'full'
+        Score every training row, a fixed random subsample of N rows, or skip training scores entirely.
+
+    random_state : int, optional, default 1337
+        Seed for the subsample so that repeated runs score the same rows.
+
+    Returns
+    ----------
+    subset : slice, array-like or None
+        Slice or sorted array of row indices to score, or None if training scores are disabled.
+    """
+    if train_score == 'full':
+        return slice(None)
+    elif train_score == 'off':
+        return None
+    elif isinstance(train_score, str) and train_score.startswith('sample:'):
+        n_samples = int(train_score.split(':', 1)[1])
+        if n_samples >= n_records:
+            return slice(None)
+        rng = np.random.RandomState(random_state)
+        return np.sort(rng.choice(n_records, n_samples, replace=False))
+    else:
+        raise Exception('Invalid train_score option: ' + str(train_score))
+
+
+def score_training(X, y, model, metric, train_score='full', verbose=False, logger=None):
+    """
+    Calculates a training score according to the train_score option.  Predicting on the full training set
+    can cost as much as fitting (e.g. for nearest-neighbor or kernel models), so the score can be estimated
+    from a subsample or skipped.
+
+    Parameters
+    ----------
+    X : array-like
+        Training input samples.
+
+    y : array-like
+        Target values.
+
+    model : object
+        An object in memory that represents a fitted model.
+
+    metric : {'accuracy', 'f1', 'log_loss', 'mean_absolute_error', 'mean_squared_error', 'r2', 'roc_auc', None}
+        Scoring metric, or a list of scoring metrics.  If None, the model's own score function is used.
+
+    train_score : {'full', 'sample:N', 'off'}, optional, default 'full'
+        Score every training row, a fixed random subsample of N rows, or skip training scores entirely.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    s : float, dict or None
+        Calculated training score, or None if training scores are disabled.
+    """
+    subset = training_subset(y.shape[0], train_score)
+    if subset is None:
+        return None
+    else:
+        return predict_score(X[subset], y[subset], model, metric, verbose, logger)
@@ -4,3 +4,10 @@ from .visualization import visualize_sequential_relationships
 from .visualization import visualize_correlations
 from .visualization import visualize_transforms
 from .visualization import visualize_feature_importance
+from .aggregation import histogram_summary
+from .aggregation import density_grid
+from .aggregation import quantile_summary
+from .aggregation import stratified_sample
+from .aggregation import downsample_series
+from .export import FigureExporter
+from .export import export_figures
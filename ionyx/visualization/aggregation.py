@@ -0,0 +1,247 @@
+import numpy as np
+import pandas as pd
+
+# quantiles used for box summaries: whisker, lower quartile, median, upper quartile, whisker
+SUMMARY_QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+
+
+def histogram_summary(data, bins=50):
+    """
+    Computes a histogram for every column of a data frame.  Numeric columns are binned over their finite
+    range with a single vectorized pass, and other columns (including booleans) are summarized by the count of each distinct
+    value.  Plotting the result costs the same regardless of the number of rows.
+
+    Parameters
+    ----------
+    data : array-like
+        Pandas data frame containing the entire data set.
+
+    bins : int, optional, default 50
+        Number of bins for numeric columns.
+
+    Returns
+    ----------
+    histograms : dict
+        Dictionary keyed by column name.  Numeric columns map to a tuple of (counts, bin edges) and other
+        columns map to a series of counts indexed by value.
+    """
+    histograms = {}
+    for column in data.columns:
+        values = data[column].values
+        # booleans can't be binned arithmetically and are better shown as two bars anyway
+        if values.dtype.kind not in 'iuf':
+            histograms[column] = data[column].value_counts(sort=False)
+            continue
+
+        values = values[np.isfinite(values)] if values.dtype.kind == 'f' else values
+        if values.shape[0] == 0:
+            histograms[column] = (np.zeros(bins, dtype=np.int64), np.linspace(0, 1, bins + 1))
+            continue
+
+        low, high = values.min(), values.max()
+        if low == high:
+            low, high = low - 0.5, high + 0.5
+        edges = np.linspace(low, high, bins + 1)
+        index = ((values - low) * (bins / float(high - low))).astype(np.intp)
+        # the maximum value belongs in the last bin rather than one past it
+        np.minimum(index, bins - 1, out=index)
+        histograms[column] = (np.bincount(index, minlength=bins), edges)
+
+    return histograms
+
+
+def density_grid(x, y, grid_size=100):
+    """
+    Counts the points that fall in each cell of a regular 2-D grid, which can be rendered as a heat map in
+    place of a scatter plot.
+
+    Parameters
+    ----------
+    x : array-like
+        Values for the horizontal axis.
+
+    y : array-like
+        Values for the vertical axis.
+
+    grid_size : int, optional, default 100
+        Number of cells along each axis.
+
+    Returns
+    ----------
+    counts : array-like
+        Number of points in each cell, with shape (grid_size, grid_size) and x along the first axis.
+
+    x_edges : array-like
+        Cell boundaries along the horizontal axis.
+
+    y_edges : array-like
+        Cell boundaries along the vertical axis.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    finite = np.isfinite(x) & np.isfinite(y)
+
+    return np.histogram2d(x[finite], y[finite], bins=grid_size)
+
+
+def quantile_summary(data, columns, by=None):
+    """
+    Computes box plot statistics (5th, 25th, 50th, 75th and 95th percentiles and the mean) for several
+    columns, optionally within each category of another column.  The output can be passed directly to
+    matplotlib's Axes.bxp function.
+
+    Parameters
+    ----------
+    data : array-like
+        Pandas data frame containing the entire data set.
+
+    columns : array-like
+        List of numeric column names to summarize.
+
+    by : string, optional, default None
+        Name of a categorical column.  If provided, the columns are summarized within each category.
+
+    Returns
+    ----------
+    stats : array-like
+        List of dictionaries with the keys expected by Axes.bxp, one per column, or one per column and
+        category if by was provided (grouped by column).
+    """
+    stats = []
+    if by is None:
+        quantiles = data[columns].quantile(SUMMARY_QUANTILES)
+        means = data[columns].mean()
+        for column in columns:
+            stats.append(_box_stats(column, quantiles[column].values, means[column]))
+    else:
+        grouped = data.groupby(by)[columns]
+        quantiles = grouped.quantile(SUMMARY_QUANTILES)
+        means = grouped.mean()
+        for column in columns:
+            for category in means.index:
+                stats.append(_box_stats(category, quantiles.loc[category, column].values, means.loc[category, column]))
+
+    return stats
+
+
+def _box_stats(label, q, mean):
+    return {'label': label, 'whislo': q[0], 'q1': q[1], 'med': q[2], 'q3': q[3], 'whishi': q[4], 'mean': mean,
+            'fliers': []}
+
+
+def stratified_sample(data, n_samples, stratify=None, random_state=1337):
+    """
+    Selects a random subset of rows for scatter-style plots.  If a stratification column is given, every
+    category keeps its share of the rows (and at least one row), so rare categories still appear.
+
+    Parameters
+    ----------
+    data : array-like
+        Pandas data frame containing the entire data set.
+
+    n_samples : int
+        Approximate number of rows to select.
+
+    stratify : string, optional, default None
+        Name of a categorical column to stratify by.
+
+    random_state : int, optional, default 1337
+        Seed for the random number generator.
+
+    Returns
+    ----------
+    sample : array-like
+        Pandas data frame containing the selected rows, in their original order.
+    """
+    n_records = data.shape[0]
+    if n_samples is None or n_samples >= n_records:
+        return data
+
+    rng = np.random.RandomState(random_state)
+    if stratify is None:
+        index = rng.choice(n_records, n_samples, replace=False)
+    else:
+        codes, _ = pd.factorize(data[stratify].values)
+        order = np.argsort(codes, kind='mergesort')
+        counts = np.bincount(codes[codes >= 0])
+        quotas = np.maximum(np.round(counts * (float(n_samples) / n_records)).astype(np.intp), 1)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        # rows with a missing category (code -1) sort first, so skip past them
+        offset = np.count_nonzero(codes < 0)
+        index = np.concatenate([order[offset + start + rng.choice(count, quota, replace=False)]
+                                for start, count, quota in zip(starts, counts, quotas)])
+
+    return data.iloc[np.sort(index)]
+
+
+def downsample_series(values, n_points, x=None, method='minmax'):
+    """
+    Selects a subset of points from a long series that preserves its visual shape, so that a line plot
+    costs the same regardless of the series length.  Missing and infinite values are never selected.
+
+    Parameters
+    ----------
+    values : array-like
+        Values of the series.
+
+    n_points : int
+        Maximum number of points to select.  Roughly twice the pixel width of the plot is a good choice.
+
+    x : array-like, optional, default None
+        Positions of the values along the horizontal axis (numeric or datetime), used by 'lttb'.  Defaults
+        to evenly spaced positions.
+
+    method : {'minmax', 'lttb'}, optional, default 'minmax'
+        Downsampling algorithm.  'minmax' splits the series into n_points / 2 buckets and keeps the minimum
+        and maximum of each, so every spike survives.  'lttb' (largest triangle three buckets) keeps the one
+        point per bucket that forms the largest triangle with its neighbors, which looks smoother.
+
+    Returns
+    ----------
+    index : array-like
+        Sorted positions of the selected points.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    positions = np.flatnonzero(np.isfinite(values))
+    n_values = positions.shape[0]
+    if n_values <= n_points or n_points < 3:
+        return positions
+
+    y = values[positions]
+    if method == 'minmax':
+        n_buckets = max(n_points // 2, 1)
+        starts = np.linspace(0, n_values, n_buckets + 1).astype(np.intp)[:-1]
+        bucket = np.repeat(np.arange(n_buckets), np.diff(np.append(starts, n_values)))
+        selected = []
+        for reduce in (np.minimum, np.maximum):
+            extreme = reduce.reduceat(y, starts)
+            hits = np.flatnonzero(y == extreme[bucket])
+            # keep the first occurrence of the extreme value in each bucket
+            _, first = np.unique(bucket[hits], return_index=True)
+            selected.append(hits[first])
+        index = np.unique(np.concatenate(selected))
+    elif method == 'lttb':
+        if x is None:
+            t = positions.astype(np.float64)
+        else:
+            x = np.asarray(x)
+            t = (x.astype('datetime64[ns]').astype(np.int64) if x.dtype.kind == 'M' else x)[positions]
+            t = t.astype(np.float64)
+
+        # the first and last points are always kept, and the rest are split into n_points - 2 buckets
+        edges = np.linspace(1, n_values - 1, n_points - 1).astype(np.intp)
+        index = np.zeros(n_points, dtype=np.intp)
+        index[-1] = n_values - 1
+        a = 0
+        for i in range(n_points - 2):
+            start, end = edges[i], edges[i + 1]
+            next_end = edges[i + 2] if i + 2 < len(edges) else n_values
+            t_next = t[end:next_end].mean()
+            y_next = y[end:next_end].mean()
+            area = np.abs((t[a] - t_next) * (y[start:end] - y[a]) - (t[a] - t[start:end]) * (y_next - y[a]))
+            a = start + int(np.argmax(area))
+            index[i + 1] = a
+    else:
+        raise Exception('Downsampling method not recognized.')
+
+    return positions[index]
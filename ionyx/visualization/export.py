@@ -0,0 +1,249 @@
+import os
+import json
+import time
+import importlib
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from ..utils import print_status_message
+from ..utils.artifact_store import _file_lock, _atomic_write
+
+INDEX_FILE = 'index.json'
+LOCK_FILE = '.index.lock'
+
+
+def _init_worker():
+    # worker processes never display anything, so render with the non-interactive backend
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _render(name, func, args, kwargs, output_dir, formats, dpi):
+    """
+    Calls a plotting function and writes every figure it creates to the output directory, closing each one
+    as soon as it's written.  Runs in a worker process.
+    """
+    import matplotlib.pyplot as plt
+
+    if not callable(func):
+        func = getattr(importlib.import_module('ionyx.visualization'), func)
+
+    t0 = time.time()
+    existing = set(plt.get_fignums())
+    files = []
+    try:
+        func(*args, **kwargs)
+        figures = [n for n in plt.get_fignums() if n not in existing]
+        for k, number in enumerate(figures):
+            fig = plt.figure(number)
+            for fmt in formats:
+                filename = '{0}.{1}'.format(name, fmt) if len(figures) == 1 else '{0}_{1}.{2}'.format(name, k, fmt)
+                fig.savefig(os.path.join(output_dir, filename), format=fmt, dpi=dpi)
+                files.append(filename)
+            plt.close(fig)
+    finally:
+        for number in plt.get_fignums():
+            if number not in existing:
+                plt.close(number)
+
+    return {'name': name, 'files': files, 'duration': time.time() - t0}
+
+
+class FigureExporter(object):
+    """
+    Renders figures in a pool of worker processes using the non-interactive Agg backend and writes them to
+    a directory, so that plotting doesn't block the calling thread or leave figures open in its process.
+    Any function that creates matplotlib figures can be submitted, including every function in
+    ionyx.visualization (which can be referred to by name).  Arguments are pickled to the worker, so large
+    data sets should be aggregated or sampled first.
+
+    An index file (index.json) in the output directory lists the files written for each submitted plot,
+    along with how long it took or the error it raised.  The index is rewritten as each plot completes.
+    Records written by earlier runs or by other exporters using the same directory at the same time are
+    kept, except for plots that are exported again, whose records are replaced.
+
+    Parameters
+    ----------
+    output_dir : string
+        Directory to write figures to.  Created if it doesn't exist.
+
+    formats : array-like, optional, default ('png',)
+        File formats to write each figure in, e.g. ('png', 'svg').
+
+    n_jobs : int, optional, default 1
+        Number of worker processes.
+
+    dpi : int, optional, default 100
+        Resolution of raster formats.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+    """
+    def __init__(self, output_dir, formats=('png',), n_jobs=1, dpi=100, verbose=False, logger=None):
+        self.output_dir = output_dir
+        self.formats = list(formats)
+        self.n_jobs = n_jobs
+        self.dpi = dpi
+        self.verbose = verbose
+        self.logger = logger
+        self.records_ = []
+        self.futures_ = []
+        self.lock_ = threading.Lock()
+
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir)
+        self.executor_ = ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker)
+
+    def submit(self, name, func, *args, **kwargs):
+        """
+        Queues a plotting function to be rendered and written to the output directory.
+
+        Parameters
+        ----------
+        name : string
+            Base name of the output files.  If the function creates several figures, they are numbered.
+
+        func : string or callable
+            Name of a function in ionyx.visualization, or a function that can be pickled (i.e. defined at
+            the top level of a module).
+
+        args : array-like
+            Positional arguments for the function.
+
+        kwargs : dict
+            Keyword arguments for the function.
+
+        Returns
+        ----------
+        future : object
+            Future that resolves to the index record for the plot.
+        """
+        future = self.executor_.submit(_render, name, func, args, kwargs, self.output_dir, self.formats, self.dpi)
+        future.add_done_callback(lambda f: self._complete(name, f))
+        self.futures_.append(future)
+
+        return future
+
+    def _complete(self, name, future):
+        try:
+            record = future.result()
+            print_status_message('Exported {0} in {1:3f} s.'.format(name, record['duration']),
+                                 self.verbose, self.logger)
+        except Exception as e:
+            record = {'name': name, 'files': [], 'error': '{0}: {1}'.format(type(e).__name__, e)}
+            print_status_message('Failed to export {0}: {1}'.format(name, record['error']), self.verbose, self.logger)
+
+        with self.lock_:
+            self.records_.append(record)
+            self._write_index()
+
+    def _write_index(self):
+        # merge with the index on disk under a lock, since other exporters may be writing to the same directory
+        names = set(r['name'] for r in self.records_)
+        with _file_lock(os.path.join(self.output_dir, LOCK_FILE)):
+            records = [r for r in _read_index(self.output_dir) if r.get('name') not in names] + self.records_
+            _atomic_write(os.path.join(self.output_dir, INDEX_FILE), json.dumps(records, indent=2).encode())
+
+    def wait(self):
+        """
+        Blocks until every submitted plot has been written.
+
+        Returns
+        ----------
+        index : array-like
+            List of index records, one per submitted plot.
+        """
+        for future in self.futures_:
+            try:
+                future.result()
+            except Exception:
+                pass
+
+        # done callbacks can run just after result() returns, so wait for all of them to be recorded
+        while True:
+            with self.lock_:
+                if len(self.records_) >= len(self.futures_):
+                    return list(self.records_)
+            time.sleep(0.001)
+
+    def close(self, wait=True):
+        """
+        Shuts down the worker processes.  If wait is False, this returns immediately and plots that were
+        already submitted are still written in the background.
+        """
+        if wait:
+            self.wait()
+        self.executor_.shutdown(wait=wait)
+
+    def __repr__(self):
+        """
+        Overrides the method that prints a string representation of the object.
+        """
+        return '%s' % self.__class__.__name__
+
+
+def _read_index(output_dir):
+    """
+    Returns the records of an existing index file in the directory, or an empty list if there isn't one.
+    """
+    try:
+        with open(os.path.join(output_dir, INDEX_FILE)) as f:
+            records = json.load(f)
+    except (IOError, OSError, ValueError):
+        return []
+
+    return records if isinstance(records, list) else []
+
+
+def export_figures(plots, output_dir, formats=('png',), n_jobs=None, dpi=100, verbose=False, logger=None):
+    """
+    Renders a batch of plots in parallel worker processes and writes them to a directory along with an
+    index file.  See FigureExporter.
+
+    Parameters
+    ----------
+    plots : array-like
+        List of (name, func, args, kwargs) tuples.  The kwargs entry may be omitted.
+
+    output_dir : string
+        Directory to write figures to.
+
+    formats : array-like, optional, default ('png',)
+        File formats to write each figure in, e.g. ('png', 'svg').
+
+    n_jobs : int, optional, default None
+        Number of worker processes.  Defaults to the number of CPUs, up to the number of plots.
+
+    dpi : int, optional, default 100
+        Resolution of raster formats.
+
+    verbose : boolean, optional, default False
+        Prints status messages to the console if enabled.
+
+    logger : object, optional, default None
+        Instance of a class that can log messages to an output file.
+
+    Returns
+    ----------
+    index : array-like
+        List of index records, one per plot.
+    """
+    if n_jobs is None:
+        n_jobs = max(1, min(os.cpu_count() or 1, len(plots)))
+
+    t0 = time.time()
+    exporter = FigureExporter(output_dir, formats, n_jobs, dpi, verbose, logger)
+    for plot in plots:
+        name, func, args = plot[:3]
+        kwargs = plot[3] if len(plot) > 3 else {}
+        exporter.submit(name, func, *args, **kwargs)
+    index = exporter.wait()
+    exporter.close()
+
+    t1 = time.time()
+    print_status_message('Exported {0} plots in {1:3f} s.'.format(len(plots), t1 - t0), verbose, logger)
+
+    return index
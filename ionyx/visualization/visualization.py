@@ -1,19 +1,24 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sb
 
-from ..utils import fit_transforms, apply_transforms
+from ..utils import fit_transforms, correlation_matrix, top_correlations, cluster_order
+from ..utils import iter_array_chunks, fit_transforms_incremental, apply_transforms_chunked
+from .aggregation import histogram_summary, density_grid, quantile_summary, stratified_sample, downsample_series
 
 
 def visualize_variable_relationships(data, quantitative_vars, category_vars=None, joint_viz_type='scatter',
                                      pair_viz_type='scatter', factor_viz_type='strip', pair_diag_type='kde',
-                                     fig_size=16):
+                                     fig_size=16, aggregate=False, sample_size=None, bins=50):
     """
     Generates plots showing the relationship between several variables.  The combination of plots generated
     depends on the number of quantitative and discrete (categorical or ordinal) variables to be analyzed.
     Plots are rendered using the seaborn statistical visualization package.
 
+    For large data sets, enable aggregate to render precomputed summaries instead of raw rows: box plots
+    built from quantiles replace the violin plots, and 2-D density grids with histograms on the diagonal
+    replace the joint and pair plots.  Alternatively, set sample_size to draw the scatter-style plots from a
+    random sample stratified by the first categorical variable.
+
     Parameters
     ----------
     data : array-like
@@ -39,10 +44,26 @@ def visualize_variable_relationships(data, quantitative_vars, category_vars=None
 
     fig_size : int, optional, default 16
         Size of the plot.
+
+    aggregate : boolean, optional, default False
+        Render quantile, histogram and density grid summaries instead of the raw data.
+
+    sample_size : int, optional, default None
+        Number of rows to sample for the joint, pair, factor and regression plots.
+
+    bins : int, optional, default 50
+        Number of bins along each axis for histograms and density grids.  Only used if aggregate is enabled.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sb
+
     if quantitative_vars is None or len(quantitative_vars) == 0:
         raise Exception('Must provide at least one quantitative variable.')
 
+    if aggregate:
+        _visualize_aggregated_relationships(data, quantitative_vars, category_vars, bins, fig_size)
+        return
+
     # compare the continuous variable distributions using a violin plot
     sub_data = data[quantitative_vars]
     fig, ax = plt.subplots(1, 1, figsize=(fig_size, fig_size * 3 / 4))
@@ -68,6 +89,9 @@ def visualize_variable_relationships(data, quantitative_vars, category_vars=None
         fig.tight_layout()
 
     # generate plots to directly compare the variables
+    if sample_size is not None:
+        data = stratified_sample(data, sample_size, category_vars[0] if category_vars is not None else None)
+
     if category_vars is None:
         if len(quantitative_vars) == 2:
             sb.jointplot(x=quantitative_vars[0], y=quantitative_vars[1], data=data, kind=joint_viz_type, size=fig_size)
@@ -94,9 +118,84 @@ def visualize_variable_relationships(data, quantitative_vars, category_vars=None
                         diag_kind=pair_diag_type, size=fig_size / len(quantitative_vars))
 
 
-def visualize_feature_distributions(data, viz_type='hist', bins=None, grid_size=4, fig_size=20):
+def _visualize_aggregated_relationships(data, quantitative_vars, category_vars, bins, fig_size):
+    """
+    Renders the plots for visualize_variable_relationships from quantile, histogram and density grid
+    summaries, so the rendering cost doesn't depend on the number of rows.
+    """
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(1, 1, figsize=(fig_size, fig_size * 3 / 4))
+    ax.bxp(quantile_summary(data, quantitative_vars), showmeans=True, showfliers=False)
+    fig.tight_layout()
+
+    if category_vars is not None:
+        fig, ax = plt.subplots(len(quantitative_vars), len(category_vars), squeeze=False,
+                               figsize=(fig_size, fig_size * 3 / 4))
+        for i, var in enumerate(quantitative_vars):
+            for j, cat in enumerate(category_vars):
+                ax[i, j].bxp(quantile_summary(data, [var], by=cat), vert=False, showmeans=True, showfliers=False)
+                ax[i, j].set_xlabel(var)
+                ax[i, j].set_ylabel(cat)
+        fig.tight_layout()
+
+    # pair grid with densities below the diagonal and histograms (per category if provided) on the diagonal
+    n_vars = len(quantitative_vars)
+    fig, ax = plt.subplots(n_vars, n_vars, squeeze=False, figsize=(fig_size, fig_size))
+    for i, y_var in enumerate(quantitative_vars):
+        for j, x_var in enumerate(quantitative_vars):
+            if i == j:
+                if category_vars is None:
+                    _plot_histogram(ax[i, j], histogram_summary(data[[x_var]], bins)[x_var], True, False, x_var)
+                else:
+                    edges = histogram_summary(data[[x_var]], bins)[x_var][1]
+                    for category, group in data.groupby(category_vars[0])[x_var]:
+                        counts, _ = np.histogram(group.values, edges)
+                        ax[i, j].step(edges[:-1], counts, where='post', label=category)
+                    ax[i, j].legend()
+            elif i > j:
+                counts, x_edges, y_edges = density_grid(data[x_var].values, data[y_var].values, bins)
+                ax[i, j].pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts.T, 0), cmap='Blues')
+            else:
+                ax[i, j].axis('off')
+
+            if i == n_vars - 1:
+                ax[i, j].set_xlabel(x_var)
+            if j == 0:
+                ax[i, j].set_ylabel(y_var)
+    fig.tight_layout()
+
+
+def _plot_histogram(ax, histogram, hist, kde, label):
+    """
+    Draws a histogram computed by histogram_summary.  The kde option draws a gaussian-smoothed version of
+    the binned density.
+    """
+    if isinstance(histogram, pd.Series):
+        ax.bar(np.arange(histogram.shape[0]), histogram.values)
+        ax.set_xticks(np.arange(histogram.shape[0]))
+        ax.set_xticklabels([str(v) for v in histogram.index], rotation=90)
+    else:
+        counts, edges = histogram
+        widths = np.diff(edges)
+        density = counts / (max(counts.sum(), 1) * widths)
+        if hist:
+            ax.bar(edges[:-1], density, widths, align='edge', alpha=0.5 if kde else 1.0)
+        if kde:
+            kernel = np.exp(-0.5 * (np.arange(-6, 7) / 2.) ** 2)
+            smoothed = np.convolve(density, kernel / kernel.sum(), mode='same')
+            centers = (edges[:-1] + edges[1:]) / 2
+            ax.plot(centers, smoothed)
+            ax.fill_between(centers, smoothed, alpha=0.3)
+
+    ax.set_title(label)
+
+
+def visualize_feature_distributions(data, viz_type='hist', bins=None, grid_size=4, fig_size=20, aggregate=False):
     """
-    Generates feature distribution plots (histogram or kde) for each feature.
+    Generates feature distribution plots (histogram or kde) for each feature.  For large data sets, enable
+    aggregate to compute every histogram in a single vectorized pass per column and render only the bin
+    counts (the kde is then a smoothed version of the histogram).
 
     Parameters
     ----------
@@ -114,7 +213,13 @@ def visualize_feature_distributions(data, viz_type='hist', bins=None, grid_size=
 
     fig_size : int, optional, default 20
         Size of the plot.
+
+    aggregate : boolean, optional, default False
+        Render precomputed histograms instead of passing the raw data to seaborn.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sb
+
     if viz_type == 'hist':
         hist = True
         kde = False
@@ -127,29 +232,39 @@ def visualize_feature_distributions(data, viz_type='hist', bins=None, grid_size=
     else:
         raise Exception('Visualization type not supported.')
 
-    # replace NaN values with 0 to prevent exceptions in the lower level API calls
-    data = data.fillna(0)
+    if aggregate:
+        histograms = histogram_summary(data, bins if bins is not None else 50)
+    else:
+        # replace NaN values with 0 to prevent exceptions in the lower level API calls
+        data = data.fillna(0)
 
     n_features = len(data.columns)
     plot_size = grid_size ** 2
-    n_plots = n_features / plot_size if n_features % plot_size == 0 else n_features / plot_size + 1
+    n_plots = n_features // plot_size if n_features % plot_size == 0 else n_features // plot_size + 1
 
     for i in range(n_plots):
         fig, ax = plt.subplots(grid_size, grid_size, figsize=(fig_size, fig_size / 2))
         for j in range(plot_size):
             index = (i * plot_size) + j
             if index < n_features:
-                if type(data.iloc[0, index]) is str:
-                    sb.countplot(x=data.columns[index], data=data, ax=ax[j / grid_size, j % grid_size])
+                if aggregate:
+                    _plot_histogram(ax[j // grid_size, j % grid_size], histograms[data.columns[index]],
+                                    hist, kde, data.columns[index])
+                elif type(data.iloc[0, index]) is str:
+                    sb.countplot(x=data.columns[index], data=data, ax=ax[j // grid_size, j % grid_size])
                 else:
                     sb.distplot(a=data.iloc[:, index], bins=bins, hist=hist, kde=kde, label=data.columns[index],
-                                ax=ax[j / grid_size, j % grid_size], kde_kws={"shade": True})
+                                ax=ax[j // grid_size, j % grid_size], kde_kws={"shade": True})
         fig.tight_layout()
 
 
-def visualize_correlations(data, annotate=False, fig_size=16):
+def visualize_correlations(data, annotate=False, fig_size=16, plot=True, max_features=None, order=None, top_k=None,
+                           block_size=1024, chunk_size=100000):
     """
-    Generates a correlation matrix heat map.
+    Computes the correlations between the numeric columns of a data frame and generates a correlation matrix
+    heat map.  The matrix is computed in float32 one column block at a time over row chunks (see
+    correlation_matrix), so wide data sets don't need a full float64 copy.  For data sets with many columns,
+    either limit the plot to the most correlated columns in clustered order or request only the top pairs.
 
     Parameters
     ----------
@@ -161,25 +276,106 @@ def visualize_correlations(data, annotate=False, fig_size=16):
 
     fig_size : int, optional, default 20
         Size of the plot.
+
+    plot : boolean, optional, default True
+        Generate the plot.  If disabled, the correlations are only computed and returned.
+
+    max_features : int, optional, default None
+        Keep only the columns with the highest mean absolute correlation to the other columns.
+
+    order : {'cluster', None}, optional, default None
+        Order the columns so that strongly correlated columns are adjacent.
+
+    top_k : int, optional, default None
+        Return (and plot) only the top_k most correlated pairs of columns, without holding the full matrix in
+        memory.
+
+    block_size : int, optional, default 1024
+        Number of columns per block.
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk.
+
+    Returns
+    ----------
+    corr : array-like
+        Pandas data frame containing the correlation matrix, or the column names and correlation of each
+        pair if top_k was provided.
     """
-    corr = data.corr()
+    numeric = data.select_dtypes(include=[np.number])
+    names = np.asarray(numeric.columns)
+
+    def chunks():
+        for start in range(0, numeric.shape[0], chunk_size):
+            yield numeric.iloc[start:start + chunk_size].values
+
+    if top_k is not None:
+        pairs = top_correlations(chunks, top_k, block_size=block_size)
+        corr = pd.DataFrame([(names[i], names[j], c) for i, j, c in pairs],
+                            columns=['feature_1', 'feature_2', 'correlation'])
+        if plot:
+            _plot_correlation_pairs(corr, fig_size)
+
+        return corr
+
+    matrix = correlation_matrix(chunks, block_size)
+    index = np.arange(len(names))
+    if max_features is not None and max_features < len(names):
+        strength = np.abs(np.nan_to_num(matrix)).sum(axis=0) - 1
+        index = np.sort(np.argsort(-strength, kind='mergesort')[:max_features])
+    if order == 'cluster':
+        index = index[cluster_order(matrix[np.ix_(index, index)])]
+
+    corr = pd.DataFrame(matrix[np.ix_(index, index)], index=names[index], columns=names[index])
+    if plot:
+        _plot_correlation_matrix(corr, annotate, fig_size)
+
+    return corr
+
+
+def _plot_correlation_matrix(corr, annotate, fig_size):
+    """
+    Draws a correlation matrix as a heat map of its lower triangle.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sb
 
     if annotate:
         corr = np.round(corr, 2)
 
     # generate a mask for the upper triangle
-    mask = np.zeros_like(corr, dtype=np.bool)
+    mask = np.zeros(corr.shape, dtype=bool)
     mask[np.triu_indices_from(mask)] = True
 
     fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
     colormap = sb.blend_palette(sb.color_palette('coolwarm'), as_cmap=True)
-    sb.heatmap(corr, mask=mask, cmap=colormap, annot=annotate)
+    sb.heatmap(corr, mask=mask, cmap=colormap, annot=annotate, ax=ax)
+    fig.tight_layout()
+
+
+def _plot_correlation_pairs(pairs, fig_size):
+    """
+    Draws the most correlated pairs of columns as a bar chart.
+    """
+    import matplotlib.pyplot as plt
+
+    pos = np.arange(pairs.shape[0])[::-1]
+    fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
+    ax.set_title('Top Correlations')
+    ax.barh(pos, pairs['correlation'].values, align='center',
+            color=np.where(pairs['correlation'].values < 0, 'C3', 'C0'))
+    ax.set_yticks(pos)
+    ax.set_yticklabels(['{0} / {1}'.format(a, b) for a, b in zip(pairs['feature_1'], pairs['feature_2'])])
+    ax.set_xlabel('Correlation')
     fig.tight_layout()
 
 
-def visualize_sequential_relationships(data, time='index', smooth_method=None, window=1, grid_size=4, fig_size=20):
+def visualize_sequential_relationships(data, time='index', smooth_method=None, window=1, grid_size=4, fig_size=20,
+                                       n_points=None, downsample='minmax'):
     """
-    Generates line plots to visualize sequential data.  Assumes the data frame index is time series.
+    Generates line plots to visualize sequential data.  Assumes the data frame index is time series.  The
+    smoothing function is applied to every numeric column at once, and each series is then downsampled to
+    roughly the pixel width of its plot, so rendering time doesn't grow with the length of the series.
 
     Parameters
     ----------
@@ -200,42 +396,59 @@ def visualize_sequential_relationships(data, time='index', smooth_method=None, w
 
     fig_size : int, optional, default 20
         Size of the plot.
+
+    n_points : int, optional, default None
+        Maximum number of points to draw per series.  Defaults to twice the pixel width of each plot.
+
+    downsample : {'minmax', 'lttb', None}, optional, default 'minmax'
+        Algorithm used to reduce each series to n_points (see downsample_series).  If None, every point is
+        drawn.
     """
+    import matplotlib.pyplot as plt
+
     # replace NaN values with 0 to prevent exceptions in the lower level API calls
     data = data.fillna(0)
 
-    if time is not 'index':
+    if time != 'index':
         data = data.reset_index()
         data = data.set_index(time)
 
-    data.index.name = None
+    data = data.select_dtypes(include=[np.number])
+    if smooth_method is not None:
+        if smooth_method not in ['mean', 'var', 'skew', 'kurt']:
+            raise Exception('Smoothing method not recognized.')
+        data = getattr(data.rolling(window), smooth_method)()
+
+    if n_points is None:
+        n_points = 2 * int(fig_size * plt.rcParams['figure.dpi'] / grid_size)
+
+    x = data.index.values
     n_features = len(data.columns)
     plot_size = grid_size ** 2
-    n_plots = n_features / plot_size if n_features % plot_size == 0 else n_features / plot_size + 1
+    n_plots = n_features // plot_size if n_features % plot_size == 0 else n_features // plot_size + 1
 
     for i in range(n_plots):
-        fig, ax = plt.subplots(grid_size, grid_size, sharex=True, figsize=(fig_size, fig_size / 2))
+        fig, ax = plt.subplots(grid_size, grid_size, sharex=True, squeeze=False, figsize=(fig_size, fig_size / 2))
         for j in range(plot_size):
             index = (i * plot_size) + j
             if index < n_features:
-                if type(data.iloc[0, index]) is not str:
-                    if smooth_method == 'mean':
-                        data.iloc[:, index] = pd.rolling_mean(data.iloc[:, index], window)
-                    elif smooth_method == 'var':
-                        data.iloc[:, index] = pd.rolling_var(data.iloc[:, index], window)
-                    elif smooth_method == 'skew':
-                        data.iloc[:, index] = pd.rolling_skew(data.iloc[:, index], window)
-                    elif smooth_method == 'kurt':
-                        data.iloc[:, index] = pd.rolling_kurt(data.iloc[:, index], window)
-
-                    data.iloc[:, index].plot(ax=ax[j / grid_size, j % grid_size], kind='line',
-                                             legend=False, title=data.columns[index])
+                values = data.iloc[:, index].values
+                if downsample is not None:
+                    selected = downsample_series(values, n_points, x, downsample)
+                else:
+                    selected = slice(None)
+                ax[j // grid_size, j % grid_size].plot(x[selected], values[selected])
+                ax[j // grid_size, j % grid_size].set_title(data.columns[index])
         fig.tight_layout()
 
 
-def visualize_transforms(X, transforms, y=None, model_type=None, n_components=2, scatter_size=50, fig_size=16):
+def visualize_transforms(X, transforms, y=None, model_type=None, n_components=2, scatter_size=50, fig_size=16,
+                         fit='full', chunk_size=100000, max_points=None, density=False, grid_size=200):
     """
-    Generates plots to visualize the data transformed by a linear or manifold algorithm.
+    Generates plots to visualize the data transformed by a linear or manifold algorithm.  For large data sets
+    the transforms can be fit on a sample or incrementally, the data is projected in chunks (keeping only
+    the components being plotted), and the plot can show a subsample or the density of the points instead of
+    every point.
 
     Parameters
     ----------
@@ -260,43 +473,93 @@ def visualize_transforms(X, transforms, y=None, model_type=None, n_components=2,
 
     fig_size : int, optional, default 20
         Size of the plot.
+
+    fit : {'full', 'sample:N', 'incremental'}, optional, default 'full'
+        How to fit the transforms: on every row, on a random sample of N rows (stratified by class for
+        classification), or chunk by chunk with each transform's partial_fit function (e.g. StandardScaler
+        and IncrementalPCA).  A PCA with svd_solver='randomized' is also much faster than the default
+        solver when only a few components are needed.
+
+    chunk_size : int, optional, default 100000
+        Number of rows per chunk when fitting incrementally and applying the transforms.
+
+    max_points : int, optional, default None
+        Draw a random subsample of this many points, stratified by class for classification so that every
+        class remains visible.  Defaults to every point.
+
+    density : boolean, optional, default False
+        Draw a heat map of the number of points in each cell of a grid instead of a scatter plot.
+
+    grid_size : int, optional, default 200
+        Number of cells along each axis of the density plot.
     """
-    transforms = fit_transforms(X, y, transforms)
-    X = apply_transforms(X, transforms)
-
-    if model_type == 'classification':
-        class_count = np.count_nonzero(np.unique(y))
-        colors = sb.color_palette('hls', class_count)
-
-        for i in range(n_components - 1):
-            fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
-            for j in range(class_count):
-                ax.scatter(X[y == j, i], X[y == j, i + 1], s=scatter_size, c=colors[j], label=j)
-            ax.set_title('Components ' + str(i + 1) + ' and ' + str(i + 2))
+    import matplotlib.pyplot as plt
+    import seaborn as sb
+
+    classification = model_type == 'classification' and y is not None
+    if fit == 'full':
+        transforms = fit_transforms(X, y, transforms)
+    elif fit == 'incremental':
+        transforms = fit_transforms_incremental(lambda: iter_array_chunks(X, y, chunk_size), transforms)
+    elif isinstance(fit, str) and fit.startswith('sample:'):
+        sample = _sample_rows(y, X.shape[0], int(fit.split(':', 1)[1]), classification)
+        transforms = fit_transforms(_take_rows(X, sample), _take_rows(y, sample), transforms)
+    else:
+        raise Exception('Invalid fit option: ' + str(fit))
+
+    # only the components being plotted are kept from each transformed chunk
+    X = np.concatenate([np.asarray(X_chunk)[:, :n_components] for X_chunk, _ in
+                        apply_transforms_chunked(iter_array_chunks(X, None, chunk_size), transforms)])
+
+    if max_points is not None and not density:
+        sample = _sample_rows(y, X.shape[0], max_points, classification)
+        X = X[sample]
+        y = _take_rows(y, sample)
+    y = np.asarray(y) if y is not None else None
+
+    for i in range(n_components - 1):
+        fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
+        if density:
+            counts, x_edges, y_edges = density_grid(X[:, i], X[:, i + 1], grid_size)
+            mesh = ax.pcolormesh(x_edges, y_edges, np.log1p(counts.T), cmap='Blues')
+            fig.colorbar(mesh, label='log(1 + count)')
+        elif classification:
+            classes = np.unique(y)
+            colors = sb.color_palette('hls', len(classes))
+            for j, label in enumerate(classes):
+                ax.scatter(X[y == label, i], X[y == label, i + 1], s=scatter_size, color=colors[j], label=label)
             ax.legend()
-            fig.tight_layout()
-    elif model_type == 'regression':
-        for i in range(n_components - 1):
-            fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
+        elif model_type == 'regression':
             sc = ax.scatter(X[:, i], X[:, i + 1], s=scatter_size, c=y, cmap='Blues')
-            ax.set_title('Components ' + str(i + 1) + ' and ' + str(i + 2))
-            ax.legend()
             fig.colorbar(sc)
-            fig.tight_layout()
-    else:
-        for i in range(n_components - 1):
-            fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
+        else:
             ax.scatter(X[:, i], X[:, i + 1], s=scatter_size)
-            ax.set_title('Components ' + str(i + 1) + ' and ' + str(i + 2))
-            ax.legend()
-            fig.tight_layout()
+        ax.set_title('Components ' + str(i + 1) + ' and ' + str(i + 2))
+        fig.tight_layout()
 
 
-def visualize_feature_importance(feature_importance, feature_names, n_features=30, fig_size=16):
+def _sample_rows(y, n_records, n_samples, stratify):
+    # row positions of a random sample, keeping each class's share of the rows when stratifying
+    if stratify:
+        labels = pd.DataFrame({'y': np.asarray(y)})
+        return stratified_sample(labels, n_samples, 'y').index.values
+    else:
+        return stratified_sample(pd.DataFrame(index=np.arange(n_records)), n_samples).index.values
+
+
+def _take_rows(X, rows):
+    if X is None:
+        return None
+    return X.iloc[rows] if hasattr(X, 'iloc') else X[rows]
+
+
+def visualize_feature_importance(feature_importance, feature_names, n_features=30, fig_size=16,
+                                 feature_importance_std=None):
     """
     Generates a feature importance plot.  Feature importance usually comes from information-theoretic
-    algorithms such as decision trees or gradient boosting.  This function will take the output from
-    those algorithms and generate a plot that visually displays the relative impact of each feature.
+    algorithms such as decision trees or gradient boosting, or from permutation_importance for any other
+    model.  This function will take the output from those algorithms and generate a plot that visually
+    displays the relative impact of each feature.
 
     Parameters
     ----------
@@ -307,19 +570,30 @@ def visualize_feature_importance(feature_importance, feature_names, n_features=3
         List of feature names.  Must be ordered identically to feature_importance.
 
     n_features : int, optional, default 30
-        Number of features to display on the plot.
+        Number of features to display on the plot.  The most important features are displayed.
 
     fig_size : int, optional, default 20
         Size of the plot.
+
+    feature_importance_std : array-like, optional, default None
+        Standard deviation of each feature weight, displayed as error bars.
     """
-    feature_importance = 100.0 * (feature_importance / feature_importance.max())
-    importance = feature_importance[0:n_features] if len(feature_names) > n_features else feature_importance
-    sorted_idx = np.argsort(feature_importance)
+    import matplotlib.pyplot as plt
+
+    feature_importance = np.asarray(feature_importance, dtype=np.float64)
+    feature_names = np.asarray(feature_names)
+    max_importance = np.abs(feature_importance).max()
+    # if every importance is zero there is nothing to scale, and the bars are all drawn at zero
+    scale = 100.0 / max_importance if max_importance > 0 else 1.0
+    sorted_idx = np.argsort(feature_importance)[-n_features:]
     pos = np.arange(sorted_idx.shape[0])
+    xerr = None
+    if feature_importance_std is not None:
+        xerr = scale * np.asarray(feature_importance_std, dtype=np.float64)[sorted_idx]
 
     fig, ax = plt.subplots(figsize=(fig_size, fig_size * 3 / 4))
     ax.set_title('Variable Importance')
-    ax.barh(pos, importance[sorted_idx], align='center')
+    ax.barh(pos, scale * feature_importance[sorted_idx], xerr=xerr, align='center')
     ax.set_yticks(pos)
     ax.set_yticklabels(feature_names[sorted_idx])
     ax.set_xlabel('Relative Importance')
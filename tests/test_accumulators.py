@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from sklearn import metrics
+
+from ionyx.utils import score, create_accumulator
+from ionyx.utils.metrics import R2Accumulator
+
+
+@pytest.fixture
+def binary():
+    rng = np.random.RandomState(1337)
+    y = rng.randint(0, 2, 1000)
+    # coarse probabilities so that there are plenty of ties
+    y_prob = np.round(np.clip(0.3 * y + 0.7 * rng.rand(1000), 0, 1), 2)
+    return y, y_prob
+
+
+@pytest.fixture
+def regression():
+    rng = np.random.RandomState(1337)
+    y = rng.normal(10, 3, 1000)
+    return y, y + rng.normal(0, 1, 1000)
+
+
+@pytest.mark.parametrize('metric', ['accuracy', 'f1', 'log_loss', 'roc_auc'])
+def test_binary_accumulators_match_batch(binary, metric):
+    y, y_prob = binary
+    accumulator = create_accumulator(metric)
+    for start in range(0, y.shape[0], 128):
+        accumulator.update(y[start:start + 128], y_prob[start:start + 128])
+
+    assert accumulator.result() == pytest.approx(score(y, y_prob, metric))
+
+
+@pytest.mark.parametrize('metric', ['mean_absolute_error', 'mean_squared_error', 'r2'])
+def test_regression_accumulators_merge(regression, metric):
+    y, y_pred = regression
+    parts = []
+    for start in range(0, y.shape[0], 300):
+        part = create_accumulator(metric)
+        part.update(y[start:start + 300], y_pred[start:start + 300])
+        parts.append(part)
+
+    accumulator = create_accumulator(metric)
+    for part in parts:
+        accumulator.merge(part)
+
+    assert accumulator.result() == pytest.approx(score(y, y_pred, metric))
+
+
+def test_r2_accumulator_merges_empty(regression):
+    y, y_pred = regression
+    empty = R2Accumulator()
+    empty.merge(R2Accumulator())
+    assert empty.n == 0
+
+    accumulator = R2Accumulator()
+    accumulator.merge(R2Accumulator())
+    accumulator.update(y, y_pred)
+    accumulator.merge(R2Accumulator())
+    assert accumulator.result() == pytest.approx(metrics.r2_score(y, y_pred))
+
+
+def test_binned_roc_auc_is_close(binary):
+    y, y_prob = binary
+    accumulator = create_accumulator(['accuracy', 'roc_auc'], n_bins=1000)
+    accumulator.update(y, y_prob)
+
+    assert accumulator.accumulators['roc_auc'].n_bins == 1000
+    assert accumulator.result()['roc_auc'] == pytest.approx(metrics.roc_auc_score(y, y_prob), abs=1e-3)
@@ -0,0 +1,42 @@
+import multiprocessing
+
+from ionyx.utils import ArtifactStore
+
+
+def _put_many(path, worker):
+    store = ArtifactStore(path)
+    for i in range(20):
+        store.put((worker, i), 'result', str(worker), {'i': i})
+
+
+def test_find_and_load(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    key = store.put([1, 2, 3], 'model', 'abc', {'alpha': 1.0})
+
+    assert store.find('model', 'abc', {'alpha': 1.0}) == key
+    assert store.find('model', 'abc', {'alpha': 2.0}) is None
+    assert ArtifactStore(str(tmp_path)).load('model', 'abc', {'alpha': 1.0}) == [1, 2, 3]
+
+
+def test_concurrent_puts_keep_every_record(tmp_path):
+    processes = [multiprocessing.Process(target=_put_many, args=(str(tmp_path), w)) for w in range(4)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+
+    assert len(ArtifactStore(str(tmp_path)).records_) == 80
+
+
+def test_gc_records_not_resurrected(tmp_path):
+    first = ArtifactStore(str(tmp_path))
+    first.put('old', 'model')
+    first.put('new', 'model')
+    second = ArtifactStore(str(tmp_path))
+
+    assert len(first.gc()) == 1
+    second.put('other', 'transforms')
+
+    store = ArtifactStore(str(tmp_path))
+    assert len(store.records_) == 2
+    assert store.load('model') == 'new'
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+
+from ionyx.experiment import cross_validate
+from ionyx.ensemble import train_averaged_ensemble, train_stacked_ensemble
+
+_fits = {'count': 0, 'limit': None}
+
+
+class InterruptedRidge(Ridge):
+    """
+    Ridge model that counts calls to fit and raises once the limit is reached, to simulate a crash.
+    """
+    def fit(self, X, y, sample_weight=None):
+        if _fits['limit'] is not None and _fits['count'] >= _fits['limit']:
+            raise KeyboardInterrupt()
+        _fits['count'] += 1
+        return Ridge.fit(self, X, y, sample_weight)
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(1337)
+    X = rng.rand(200, 5)
+    y = X.dot(np.arange(5)) + rng.normal(0, 0.1, 200)
+    return X, y, X[:20]
+
+
+@pytest.fixture(autouse=True)
+def reset_fits():
+    _fits['count'] = 0
+    _fits['limit'] = None
+
+
+def _resume(func, tmp_path, limit):
+    """
+    Runs func without a checkpoint, then again with one but interrupted after the given number of fits,
+    then resumed.  Checks that resuming fits fewer models than a complete run, and returns the
+    uninterrupted and resumed results.
+    """
+    expected = func(None)
+    complete = _fits['count']
+
+    _fits['count'] = 0
+    _fits['limit'] = limit
+    with pytest.raises(KeyboardInterrupt):
+        func(str(tmp_path))
+
+    _fits['count'] = 0
+    _fits['limit'] = None
+    resumed = func(str(tmp_path))
+    assert _fits['count'] < complete
+
+    return expected, resumed
+
+
+def test_cross_validate_resume(data, tmp_path):
+    X, y, _ = data
+
+    def run(checkpoint_dir):
+        return cross_validate(X, y, InterruptedRidge(), 'r2', [], 5, checkpoint_dir=checkpoint_dir)
+
+    expected, resumed = _resume(run, tmp_path, 3)
+    assert resumed == pytest.approx(expected)
+
+
+def test_averaged_ensemble_resume(data, tmp_path):
+    X, y, X_test = data
+
+    def run(checkpoint_dir):
+        models = [InterruptedRidge(alpha=1.0), InterruptedRidge(alpha=10.0)]
+        return train_averaged_ensemble(X, y, X_test, models, 'r2', [], 3, checkpoint_dir=checkpoint_dir)
+
+    expected, resumed = _resume(run, tmp_path, 4)
+    np.testing.assert_allclose(resumed, expected)
+
+
+def test_stacked_ensemble_resume(data, tmp_path):
+    X, y, X_test = data
+
+    def run(checkpoint_dir):
+        models = [InterruptedRidge(alpha=1.0), InterruptedRidge(alpha=10.0)]
+        return train_stacked_ensemble(X, y, X_test, models, 'r2', [], 3, checkpoint_dir=checkpoint_dir)
+
+    expected, resumed = _resume(run, tmp_path, 9)
+    for a, b in zip(resumed, expected):
+        np.testing.assert_allclose(a, b)
+
+
+def test_completed_run_is_not_refit(data, tmp_path):
+    X, y, _ = data
+    expected = cross_validate(X, y, InterruptedRidge(), 'r2', [], 5, checkpoint_dir=str(tmp_path))
+
+    _fits['count'] = 0
+    assert cross_validate(X, y, InterruptedRidge(), 'r2', [], 5, checkpoint_dir=str(tmp_path)) == expected
+    assert _fits['count'] == 0
+
+
+def test_changed_inputs_start_over(data, tmp_path):
+    X, y, _ = data
+    cross_validate(X, y, InterruptedRidge(), 'r2', [], 5, checkpoint_dir=str(tmp_path))
+
+    _fits['count'] = 0
+    cross_validate(X, y, InterruptedRidge(alpha=2.0), 'r2', [], 5, checkpoint_dir=str(tmp_path))
+    assert _fits['count'] == 5
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ionyx.utils import HyperLogLog, QuantileSketch, HeavyHitters, profile_data, suggest_dtypes
+
+
+def _hashes(values):
+    return pd.util.hash_array(np.asarray(values))
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.RandomState(1337)
+    n = 5000
+    amount = rng.normal(100, 15, n)
+    amount[::10] = np.nan
+    return pd.DataFrame({'id': np.arange(n).astype(str),
+                         'count': rng.randint(0, 100, n),
+                         'amount': amount,
+                         'flag': rng.rand(n) > 0.5,
+                         'color': rng.choice(['red', 'green', 'blue'], n, p=[0.6, 0.3, 0.1]),
+                         'city': rng.choice(['city{0}'.format(i) for i in range(200)], n),
+                         'day': pd.date_range('2020-01-01', periods=n, freq='h')})
+
+
+def test_hyperloglog_estimate():
+    for n in [100, 10000, 200000]:
+        hll = HyperLogLog().update(_hashes(np.arange(n)))
+        assert abs(hll.estimate() - n) <= 0.05 * n
+
+
+def test_hyperloglog_merge_matches_single_pass():
+    hll = HyperLogLog().update(_hashes(np.arange(50000)))
+    left = HyperLogLog().update(_hashes(np.arange(30000)))
+    right = HyperLogLog().update(_hashes(np.arange(20000, 50000)))
+
+    assert left.merge(right).estimate() == hll.estimate()
+
+
+def test_quantile_sketch_accuracy():
+    values = np.random.RandomState(1337).rand(100000)
+    sketch = QuantileSketch()
+    for chunk in np.array_split(values, 10):
+        sketch.update(chunk)
+    q = np.array([0.05, 0.25, 0.5, 0.75, 0.95])
+
+    # the values are uniform on [0, 1], so the value at a quantile is its rank
+    np.testing.assert_allclose(sketch.quantile(q), q, atol=0.02)
+    assert sum(items.shape[0] for items in sketch.levels_) < 3 * sketch.k
+
+
+def test_quantile_sketch_merge_and_empty():
+    values = np.random.RandomState(1337).normal(0, 1, 50000)
+    left = QuantileSketch(random_state=1).update(values[:25000])
+    right = QuantileSketch(random_state=2).update(np.append(values[25000:], np.nan))
+    merged = left.merge(right)
+
+    weight = sum(items.shape[0] * 2 ** level for level, items in enumerate(merged.levels_))
+    assert weight == values.shape[0]
+    np.testing.assert_allclose(merged.quantile([0.25, 0.5, 0.75]), np.percentile(values, [25, 50, 75]), atol=0.05)
+    assert np.isnan(QuantileSketch().quantile(0.5)).all()
+
+
+def test_heavy_hitters_exact_under_capacity():
+    values = np.array(['a'] * 50 + ['b'] * 30 + ['c'] * 20 + [None] * 5, dtype=object)
+    hh = HeavyHitters(k=2).update(values)
+
+    assert hh.top() == [('a', 50), ('b', 30)]
+
+
+def test_heavy_hitters_bounded_error():
+    rng = np.random.RandomState(1337)
+    values = np.concatenate([np.repeat([1, 2, 3], [3000, 2000, 1000]), rng.randint(100, 10000, 20000)])
+    rng.shuffle(values)
+    capacity = 50
+    hh = HeavyHitters(k=3, capacity=capacity)
+    for chunk in np.array_split(values, 20):
+        hh.merge(HeavyHitters(k=3, capacity=capacity).update(chunk))
+
+    top = hh.top()
+    assert [value for value, _ in top] == [1, 2, 3]
+    for (_, count), actual in zip(top, [3000, 2000, 1000]):
+        assert actual - values.shape[0] / (capacity + 1.) <= count <= actual
+
+
+def test_profile_data(frame):
+    report = profile_data(frame, chunk_size=1000)
+
+    assert list(report.index) == list(frame.columns)
+    assert report.loc['amount', 'nulls'] == 500
+    assert report.loc['amount', 'mean'] == pytest.approx(frame['amount'].mean())
+    assert report.loc['amount', 'std'] == pytest.approx(frame['amount'].std(ddof=0))
+    assert report.loc['count', 'min'] == frame['count'].min() and report.loc['count', 'max'] == frame['count'].max()
+    assert abs(report.loc['count', 'q50'] - frame['count'].median()) <= 2
+    assert report.loc['color', 'top_values'][0] == ('red', (frame['color'] == 'red').sum())
+
+    assert report.loc['count', 'suggested_dtype'] == 'int8'
+    assert report.loc['flag', 'suggested_dtype'] == 'bool'
+    assert report.loc['day', 'suggested_dtype'] == 'datetime64[ns]'
+    assert report.loc['color', 'suggested_dtype'] == 'category'
+    assert report.loc['id', 'suggested_encoding'] == 'drop'
+    assert report.loc['color', 'suggested_encoding'] == 'one_hot'
+    assert report.loc['city', 'suggested_encoding'] == 'label'
+    assert report.loc['amount', 'suggested_encoding'] == 'none'
+
+
+def test_profile_data_chunking_and_threads(frame):
+    report = profile_data(frame, chunk_size=frame.shape[0])
+    chunks = [frame.iloc[start:start + 700] for start in range(0, frame.shape[0], 700)]
+    chunked = profile_data(lambda: iter(chunks), n_jobs=4)
+
+    for column in ['count', 'nulls', 'distinct', 'min', 'max']:
+        assert list(chunked[column]) == list(report[column])
+    np.testing.assert_allclose(chunked['mean'].astype(float), report['mean'].astype(float))
+    assert list(chunked['suggested_dtype']) == list(report['suggested_dtype'])
+
+
+def test_profile_data_empty():
+    with pytest.raises(Exception):
+        profile_data(lambda: iter([]))
+
+
+def test_suggest_dtypes(frame):
+    dtype = suggest_dtypes(profile_data(frame), exclude=['id'])
+
+    assert 'day' not in dtype and 'id' not in dtype
+    assert dtype['count'] == 'int8' and dtype['color'] == 'category'
@@ -0,0 +1,145 @@
+import os
+import sys
+import subprocess
+import numpy as np
+import pytest
+from sklearn.linear_model import Ridge
+
+from ionyx.experiment import Experiment
+
+_calls = []
+
+# prints the keys of an experiment whose steps use nested code objects (lambdas, comprehensions, set
+# constants), whose reprs would otherwise contain memory addresses or depend on hash randomization
+_KEYS_SCRIPT = """
+import numpy as np
+from ionyx.experiment import Experiment
+
+def load(n):
+    scale = lambda v: v * 2.0
+    return np.array([scale(v) for v in range(n) if v not in {3, 'a', 'b'}])
+
+def total(values, power):
+    return sum(v ** power for v in values)
+
+experiment = Experiment()
+experiment.add_step('data', load, params={'n': 10})
+experiment.add_step('total', total, inputs=['data'], params={'power': 2})
+keys = {}
+for name in experiment.steps_:
+    keys[name] = experiment._key(name, keys)
+print(keys['data'], keys['total'])
+"""
+
+
+def _load(n):
+    _calls.append('load')
+    return np.arange(n, dtype=np.float64), np.arange(n, dtype=np.float64) * 2
+
+
+def _fit(X, y, model):
+    _calls.append('fit')
+    return model.fit(X.reshape(-1, 1), y).coef_[0]
+
+
+@pytest.fixture(autouse=True)
+def reset_calls():
+    del _calls[:]
+
+
+def _experiment(cache_dir=None):
+    experiment = Experiment(cache_dir=cache_dir)
+    experiment.add_step('data', _load, params={'n': 20})
+    experiment.add_step('fit', _fit, inputs={'X': ('data', 0), 'y': ('data', 1)}, params={'model': Ridge()})
+    return experiment
+
+
+def test_keys_stable_across_processes():
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    keys = set()
+    for seed in ('1', '2', '3'):
+        env['PYTHONHASHSEED'] = seed
+        keys.add(subprocess.check_output([sys.executable, '-c', _KEYS_SCRIPT], env=env).strip())
+
+    assert len(keys) == 1
+
+
+def test_memory_cache():
+    experiment = _experiment()
+    first = experiment.run()['fit']
+    assert _calls == ['load', 'fit']
+
+    assert experiment.run()['fit'] == first
+    assert _calls == ['load', 'fit']
+    assert set(experiment.summary()['status']) == {'memory'}
+
+
+def test_changed_params_only_rerun_downstream():
+    experiment = _experiment()
+    experiment.run()
+
+    experiment.set_params('fit', model=Ridge(alpha=10.0))
+    experiment.run()
+    assert _calls == ['load', 'fit', 'fit']
+
+    experiment.set_params('data', n=30)
+    experiment.run()
+    assert _calls == ['load', 'fit', 'fit', 'load', 'fit']
+
+
+def test_disk_cache(tmp_path):
+    first = _experiment(str(tmp_path)).run()['fit']
+
+    experiment = _experiment(str(tmp_path))
+    assert experiment.run()['fit'] == first
+    assert _calls == ['load', 'fit']
+    # the cached output of the target means its inputs don't need to be loaded at all
+    assert list(experiment.summary()['status']) == ['disk']
+
+
+def test_declared_model_not_fitted():
+    model = Ridge()
+    experiment = Experiment()
+    experiment.add_step('data', _load, params={'n': 20})
+    experiment.add_step('fit', _fit, inputs={'X': ('data', 0), 'y': ('data', 1)}, params={'model': model})
+    experiment.run()
+
+    assert not hasattr(model, 'coef_')
+
+
+def _compile_step(body):
+    """
+    Defines a function named step with the given body, so that only the code differs between versions.
+    """
+    namespace = {'np': np}
+    exec('def step(x):\n    return ' + body, namespace)
+    return namespace['step']
+
+
+def test_key_changes_with_function_body():
+    keys = set()
+    for body in ('x.min()', 'x.max()', 'np.mean(x)', 'np.median(x)'):
+        experiment = Experiment()
+        experiment.add_step('step', _compile_step(body))
+        keys.add(experiment._key('step', {}))
+
+    assert len(keys) == 4
+
+
+def test_key_changes_with_defaults_and_closure():
+    def scaled(factor):
+        def step(x, offset=0):
+            return x * factor + offset
+        return step
+
+    def key(func):
+        experiment = Experiment()
+        experiment.add_step('step', func)
+        return experiment._key('step', {})
+
+    changed_default = scaled(2)
+    changed_default.__defaults__ = (1,)
+
+    assert key(scaled(2)) == key(scaled(2))
+    assert key(scaled(2)) != key(scaled(3))
+    assert key(scaled(2)) != key(changed_default)
@@ -0,0 +1,54 @@
+import os
+import json
+
+from ionyx.visualization import FigureExporter, export_figures
+
+
+def _line_plot(n, n_figures=1):
+    import matplotlib.pyplot as plt
+    for _ in range(n_figures):
+        fig, ax = plt.subplots()
+        ax.plot(range(n))
+
+
+def _failing_plot():
+    raise ValueError('bad data')
+
+
+def _index(path):
+    with open(os.path.join(path, 'index.json')) as f:
+        return dict((r['name'], r) for r in json.load(f))
+
+
+def test_export_writes_files_and_index(tmp_path):
+    index = export_figures([('line', _line_plot, (5,)), ('pair', _line_plot, (5,), {'n_figures': 2}),
+                            ('broken', _failing_plot, ())], str(tmp_path), formats=('png', 'svg'), n_jobs=2)
+
+    records = dict((r['name'], r) for r in index)
+    assert sorted(records['line']['files']) == ['line.png', 'line.svg']
+    assert sorted(records['pair']['files']) == ['pair_0.png', 'pair_0.svg', 'pair_1.png', 'pair_1.svg']
+    assert 'bad data' in records['broken']['error']
+    for filename in records['line']['files'] + records['pair']['files']:
+        assert os.path.exists(os.path.join(str(tmp_path), filename))
+    assert set(_index(str(tmp_path))) == {'line', 'pair', 'broken'}
+
+
+def test_repeated_runs_merge_index(tmp_path):
+    export_figures([('a', _line_plot, (3,)), ('b', _line_plot, (3,))], str(tmp_path))
+    export_figures([('b', _failing_plot, ()), ('c', _line_plot, (3,))], str(tmp_path))
+
+    index = _index(str(tmp_path))
+    assert set(index) == {'a', 'b', 'c'}
+    assert 'error' in index['b']
+
+
+def test_overlapping_exporters_keep_each_others_records(tmp_path):
+    one = FigureExporter(str(tmp_path))
+    two = FigureExporter(str(tmp_path))
+    for i in range(4):
+        one.submit('one_%d' % i, _line_plot, 3)
+        two.submit('two_%d' % i, _line_plot, 3)
+    one.close()
+    two.close()
+
+    assert set(_index(str(tmp_path))) == set(['one_%d' % i for i in range(4)] + ['two_%d' % i for i in range(4)])
@@ -0,0 +1,81 @@
+import tracemalloc
+import numpy as np
+import pytest
+from sklearn.model_selection import KFold
+
+from ionyx.utils import FoldProvider
+
+
+@pytest.fixture
+def data():
+    rng = np.random.RandomState(1337)
+    X = rng.rand(103, 4)
+    y = rng.rand(103)
+    folds = list(KFold(n_splits=5, shuffle=True, random_state=1337).split(X))
+    return X, y, folds
+
+
+def test_folds_match_indexing(data):
+    X, y, folds = data
+    provider = FoldProvider(X, y, folds)
+
+    for i, (train_index, eval_index) in enumerate(folds):
+        X_train, y_train = provider.train_fold(i)
+        X_eval, y_eval = provider.eval_fold(i)
+
+        assert np.array_equal(np.sort(provider.train_index(i)), np.sort(train_index))
+        assert np.array_equal(np.sort(provider.eval_index(i)), np.sort(eval_index))
+        assert np.array_equal(X_train, X[provider.train_index(i)])
+        assert np.array_equal(y_train, y[provider.train_index(i)])
+        assert np.array_equal(X_eval, X[provider.eval_index(i)])
+        assert np.array_equal(y_eval, y[provider.eval_index(i)])
+
+
+def test_targets_in_fold_order(data):
+    X, y, folds = data
+    provider = FoldProvider(X, y, folds)
+
+    assert np.array_equal(provider.y_, y[np.concatenate([e for _, e in folds])])
+
+
+def test_eval_fold_outlives_train_fold(data):
+    X, y, folds = data
+    provider = FoldProvider(X, y, folds)
+
+    X_eval, _ = provider.eval_fold(0)
+    provider.train_fold(1)
+    assert np.array_equal(X_eval, X[provider.eval_index(0)])
+
+
+def test_no_copy_of_input(data):
+    X, y, folds = data
+    provider = FoldProvider(X, y, folds)
+
+    assert np.shares_memory(provider.X_, X)
+    assert provider.X_buffer_.shape[0] == X.shape[0] - min(e.shape[0] for _, e in folds)
+
+
+def test_train_fold_allocates_nothing():
+    rng = np.random.RandomState(1337)
+    X = rng.rand(20000, 20)
+    y = rng.rand(20000)
+    provider = FoldProvider(X, y, list(KFold(n_splits=5, shuffle=True, random_state=1337).split(X)))
+
+    tracemalloc.start()
+    for i in range(5):
+        provider.train_fold(i)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    # only the index arrays are allocated, never a temporary the size of the training set
+    assert peak < X.nbytes / 10
+
+
+def test_folds_must_partition(data):
+    X, y, folds = data
+    with pytest.raises(Exception):
+        FoldProvider(X, y, folds[:-1])
+
+    train_index, eval_index = folds[0]
+    with pytest.raises(Exception):
+        FoldProvider(X, y, [(train_index, eval_index + X.shape[0])] + folds[1:])
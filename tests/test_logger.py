@@ -0,0 +1,98 @@
+import os
+import json
+import multiprocessing
+import pytest
+
+from ionyx.utils import Logger, AsyncLogger, print_status_message
+
+
+def _read(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+# inherited by forked workers, since the logger itself can't be pickled
+_shared = {}
+
+
+def _log_from_worker(worker):
+    for i in range(50):
+        _shared['logger'].log('worker', worker=worker, i=i)
+    return worker
+
+
+def test_status_message_to_logger(tmp_path):
+    path = str(tmp_path / 'log.txt')
+    logger = Logger(path, 'replace')
+    print_status_message('hello', True, logger)
+    logger.close()
+
+    with open(path) as f:
+        line = f.read()
+    assert line.startswith('(') and line.endswith(') hello\n')
+
+
+def test_status_message_to_async_logger(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    logger = AsyncLogger(path, 'replace')
+    print_status_message('hello', True, logger)
+    logger.close()
+
+    assert [r['message'] for r in _read(path)] == ['hello']
+
+
+def test_records_and_fields(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    logger = AsyncLogger(path, 'replace', batch_size=7)
+    for i in range(100):
+        logger.log('step', phase='fit', fold=i % 5, duration=0.5, extra=i)
+    logger.flush()
+    records = _read(path)
+    logger.close()
+
+    assert len(records) == 100
+    assert [r['extra'] for r in records] == list(range(100))
+    assert records[0]['phase'] == 'fit' and records[0]['fold'] == 0 and records[0]['duration'] == 0.5
+    assert records[0]['pid'] == os.getpid()
+
+
+def test_forked_workers_not_lost(tmp_path):
+    path = str(tmp_path / 'log.jsonl')
+    logger = AsyncLogger(path, 'replace')
+    logger.log('parent')
+    _shared['logger'] = logger
+
+    # pool workers exit with os._exit, so anything they leave queued is lost
+    with multiprocessing.get_context('fork').Pool(3) as pool:
+        pool.map(_log_from_worker, range(6))
+    logger.close()
+
+    records = _read(path)
+    assert len(records) == 301
+    assert len(set(r['pid'] for r in records)) > 1
+
+
+def test_partial_writes_completed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'log.jsonl')
+    logger = AsyncLogger(path, 'replace')
+    write = os.write
+    monkeypatch.setattr(os, 'write', lambda fd, data: write(fd, data[:3]))
+    # a different pid makes the logger write synchronously on this thread
+    logger.pid_ = -1
+    logger.log('a fairly long message that needs several writes')
+    monkeypatch.undo()
+    logger.pid_ = os.getpid()
+    logger.close()
+
+    assert _read(path)[0]['message'] == 'a fairly long message that needs several writes'
+
+
+def test_dead_writer_raises(tmp_path):
+    logger = AsyncLogger(str(tmp_path / 'log.jsonl'), 'replace', max_queue_size=1, flush_interval=0.01)
+    logger.queue_.put(None)
+    logger.thread_.join()
+
+    with pytest.raises(Exception):
+        for _ in range(3):
+            logger.log('nobody is listening')
+    logger.close()
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from sklearn import metrics
+
+from ionyx.utils import score, score_metrics
+
+
+@pytest.fixture
+def binary():
+    rng = np.random.RandomState(1337)
+    y = rng.randint(0, 2, 1000)
+    # coarse probabilities so that there are plenty of ties
+    y_prob = np.round(np.clip(0.3 * y + 0.7 * rng.rand(1000), 0, 1), 2)
+    return y, y_prob
+
+
+@pytest.fixture
+def regression():
+    rng = np.random.RandomState(1337)
+    y = rng.normal(10, 3, 1000)
+    return y, y + rng.normal(0, 1, 1000)
+
+
+def test_binary_metrics_match_sklearn(binary):
+    y, y_prob = binary
+    y_label = (y_prob >= 0.5).astype(y.dtype)
+    scores = score_metrics(y, y_prob, ['accuracy', 'f1', 'log_loss', 'roc_auc'])
+
+    assert scores['accuracy'] == pytest.approx(metrics.accuracy_score(y, y_label))
+    assert scores['f1'] == pytest.approx(metrics.f1_score(y, y_label))
+    assert scores['log_loss'] == pytest.approx(metrics.log_loss(y, y_prob))
+    assert scores['roc_auc'] == pytest.approx(metrics.roc_auc_score(y, y_prob))
+
+
+def test_regression_metrics_match_sklearn(regression):
+    y, y_pred = regression
+    scores = score_metrics(y, y_pred, ['mean_absolute_error', 'mean_squared_error', 'r2'])
+
+    assert scores['mean_absolute_error'] == pytest.approx(metrics.mean_absolute_error(y, y_pred))
+    assert scores['mean_squared_error'] == pytest.approx(metrics.mean_squared_error(y, y_pred))
+    assert scores['r2'] == pytest.approx(metrics.r2_score(y, y_pred))
+
+
+def test_single_metric_matches_list(regression):
+    y, y_pred = regression
+    assert score(y, y_pred, 'r2') == pytest.approx(score(y, y_pred, ['r2'])['r2'])
+
+
+def test_roc_auc_other_binary_labels(binary):
+    y, y_prob = binary
+    assert score(y + 1, y_prob, 'roc_auc') == pytest.approx(metrics.roc_auc_score(y, y_prob))
+
+
+def test_roc_auc_rejects_multiclass():
+    y = np.array([0, 1, 2, 1, 0, 2])
+    with pytest.raises(ValueError):
+        score(y, np.linspace(0, 1, 6), 'roc_auc')
@@ -0,0 +1,131 @@
+import json
+import socket
+import threading
+import numpy as np
+import pytest
+from http.client import HTTPConnection
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from ionyx.serving import PredictionServer, PredictionClient, run_load_test
+
+
+@pytest.fixture
+def pipeline():
+    rng = np.random.RandomState(1337)
+    X = rng.rand(200, 4)
+    y = (X[:, 0] > 0.5).astype(int)
+    scaler = StandardScaler().fit(X)
+    model = LogisticRegression().fit(scaler.transform(X), y)
+    return X, model, scaler
+
+
+@pytest.fixture
+def server(pipeline):
+    _, model, scaler = pipeline
+    server = PredictionServer(model, [scaler], max_latency=0.02, port=0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def _post(port, instances):
+    connection = HTTPConnection('127.0.0.1', port)
+    connection.request('POST', '/predict', json.dumps({'instances': instances}))
+    response = connection.getresponse()
+    result = json.loads(response.read().decode())
+    connection.close()
+    return response.status, result
+
+
+def test_predictions_match_model(pipeline, server):
+    X, model, scaler = pipeline
+    client = PredictionClient(port=server.port)
+    y_pred = client.predict(X[:10])
+    client.close()
+
+    assert np.array_equal(y_pred, model.predict(scaler.transform(X[:10])))
+
+
+def test_concurrent_requests_are_batched(pipeline, server):
+    X, model, scaler = pipeline
+    results = [None] * 8
+
+    def request(i):
+        client = PredictionClient(port=server.port)
+        results[i] = client.predict(X[i:i + 1])
+        client.close()
+
+    threads = [threading.Thread(target=request, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert np.array_equal(np.concatenate(results), model.predict(scaler.transform(X[:8])))
+    assert server.stats()['requests'] == 8
+    assert server.stats()['batches'] < 8
+
+
+def test_wrong_width_rejected(pipeline, server):
+    X, _, _ = pipeline
+    results = [None] * 3
+
+    def request(i, instances):
+        results[i] = _post(server.port, instances)
+
+    # the bad request lands in the same batch as the good ones without failing them
+    requests = [X[:1].tolist(), X[:1, :3].tolist(), X[1:2].tolist()]
+    threads = [threading.Thread(target=request, args=(i, r)) for i, r in enumerate(requests)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert [status for status, _ in results] == [200, 400, 200]
+    assert _post(server.port, X[:1].tolist())[0] == 200
+
+
+def test_unknown_width_only_fails_its_batch(pipeline):
+    X, model, scaler = pipeline
+    server = PredictionServer(model, [scaler], max_latency=0.0, port=0)
+    # widths aren't checked up front when the expected number of features isn't known
+    server.n_features = None
+    server.start()
+    try:
+        assert _post(server.port, X[:1, :3].tolist())[0] == 400
+        assert _post(server.port, X[:1].tolist())[0] == 200
+    finally:
+        server.stop()
+
+
+def test_start_raises_when_port_in_use(pipeline):
+    _, model, _ = pipeline
+    blocker = socket.socket()
+    blocker.bind(('127.0.0.1', 0))
+    blocker.listen(1)
+    try:
+        with pytest.raises(OSError):
+            PredictionServer(model, port=blocker.getsockname()[1]).start()
+    finally:
+        blocker.close()
+
+
+def test_stop_with_open_connection(pipeline, capfd):
+    X, model, scaler = pipeline
+    server = PredictionServer(model, [scaler], port=0)
+    server.start()
+    client = PredictionClient(port=server.port)
+    client.predict(X[:1])
+    server.stop()
+    client.close()
+
+    assert 'CancelledError' not in capfd.readouterr().err
+
+
+def test_load_test_sends_every_request(pipeline, server):
+    X, _, _ = pipeline
+    results = run_load_test(X, n_clients=3, n_requests=10, port=server.port)
+
+    assert results['requests'] == 10
+    assert results['server']['requests'] == 10